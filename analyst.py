@@ -0,0 +1,377 @@
+import argparse
+import asyncio
+import json
+import threading
+from typing import Callable
+
+from data.api import FinancialDatasetsClient
+from data.cache import PriceCache
+from data.lookback import plan_start_date
+from data.models import create_price_prompts
+from data.prompt_cache import PromptCache
+from data.settings import PROMPT_FORMATS
+from llm.answer import ANSWER_SCHEMA
+from llm.ensemble import order_by_speed, quorum_by_key, quorum_by_model
+from llm.ollama import MODEL_NAMES, OllamaScheduler
+from llm.prompts import system_prompt, ticker_prompt
+from llm.response_cache import ResponseCache
+from llm.results import ResultsStore, in_model_order
+from llm.telemetry import SUMMARY_HEADERS, Telemetry, mean_wall_seconds
+from llm.tokens import TokenCounter
+from tabulate import tabulate
+
+
+def parse_max_tokens(values: list[str]) -> dict[str, int]:
+    max_tokens = {}
+    for value in values:
+        model_name, _, tokens = value.rpartition("=")
+        if not model_name or not tokens.isdigit():
+            raise ValueError(f"--max-tokens must be MODEL=N, got {value}")
+        max_tokens[model_name] = int(tokens)
+    return max_tokens
+
+
+def parse_prompt_formats(values: list[str]) -> dict[str, str]:
+    prompt_formats = dict.fromkeys(MODEL_NAMES, "verbose")
+    for value in values:
+        model_name, _, prompt_format = value.rpartition("=")
+        if prompt_format not in PROMPT_FORMATS:
+            raise ValueError(
+                f"--prompt-format must be one of {PROMPT_FORMATS}, got {value}"
+            )
+        if model_name:
+            prompt_formats[model_name] = prompt_format
+        else:
+            prompt_formats = dict.fromkeys(MODEL_NAMES, prompt_format)
+    return prompt_formats
+
+
+class Analyst:
+    """
+    Everything an analysis needs, built once from the command-line options
+    of main.py: the data client and caches, the model scheduler, telemetry
+    and the results store. The service in service.py keeps one Analyst for
+    all its jobs, so imports, HTTP connections and loaded models stay warm.
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.prompt_formats = parse_prompt_formats(args.prompt_format)
+        # Models grouped by prompt format, in MODEL_NAMES order
+        self.format_models = {}
+        for model_name in MODEL_NAMES:
+            self.format_models.setdefault(self.prompt_formats[model_name], []).append(
+                model_name
+            )
+
+        self.results_store = ResultsStore(args.results_path)
+        self.cache = None if args.no_cache else PriceCache(args.cache_path)
+        self.prompt_cache = (
+            None if args.no_prompt_cache else PromptCache(args.prompt_cache_path)
+        )
+        self.client = FinancialDatasetsClient(
+            base_url=args.api_base_url,
+            record_dir=args.record_dir,
+            max_in_flight=args.max_in_flight,
+            requests_per_second=args.requests_per_second,
+        )
+
+        # Ollama Settings
+        self.response_cache = (
+            None
+            if args.no_llm_cache
+            else ResponseCache(
+                args.llm_cache_path,
+                ttl_seconds=(
+                    args.llm_cache_ttl_hours * 3600
+                    if args.llm_cache_ttl_hours is not None
+                    else None
+                ),
+            )
+        )
+        # Measured before this run adds to the metrics file
+        self.model_order = order_by_speed(
+            MODEL_NAMES, mean_wall_seconds(args.metrics_path)
+        )
+        self.telemetry = Telemetry(args.metrics_path)
+        self.scheduler = OllamaScheduler(
+            base_urls=args.ollama_url.split(","),
+            max_concurrency=args.llm_concurrency,
+            max_per_endpoint=args.llm_endpoint_concurrency,
+            keep_alive=args.keep_alive,
+            seed=args.seed,
+            cache=self.response_cache,
+            max_tokens=parse_max_tokens(args.max_tokens),
+            stream=args.stream,
+            answer_format=None if args.no_json_schema else ANSWER_SCHEMA,
+            telemetry=self.telemetry,
+        )
+
+        # Jobs of the service render their prompts one at a time
+        self._render_lock = threading.Lock()
+        # Estimated unless the counts are logged: loading the tokenizers
+        # imports transformers and downloads them
+        self.token_counter = TokenCounter(
+            load_tokenizers=args.prompt_token_log is not None
+        )
+        # Prompt tokens per model and ticker of the last job
+        self.prompt_tokens = {}
+        # Tokens of each model's system message, counted with its first
+        # prompts. The system message is the same for every ticker, so
+        # Ollama can reuse its evaluation across a model's calls
+        self.system_tokens = {}
+
+    async def warm_up(self):
+        """
+        Load every model and open the connections the first job would
+        otherwise wait for.
+        """
+        await self.scheduler.warm_up(MODEL_NAMES)
+
+    def render_prompts(
+        self, tickers: list[str], end_date: str
+    ) -> dict[str, dict[str, str]]:
+        """
+        Fetch the tickers' prices and render their prompts, keyed by prompt
+        format and then by ticker.
+        """
+        with self._render_lock:
+            return self._render_prompts(tickers, end_date)
+
+    def _render_prompts(
+        self, tickers: list[str], end_date: str
+    ) -> dict[str, dict[str, str]]:
+        # Fetch only the trading days the prompt's indicators need
+        start_date = plan_start_date(end_date)
+
+        # Get price signals for all tickers concurrently
+        all_prices = self.client.get_prices_many(
+            tickers, start_date=start_date, end_date=end_date, cache=self.cache
+        )
+        price_prompts = {
+            prompt_format: create_price_prompts(
+                all_prices, cache=self.prompt_cache, prompt_format=prompt_format
+            )
+            for prompt_format in self.format_models
+        }
+
+        prompts = {prompt_format: {} for prompt_format in self.format_models}
+        for ticker in tickers:
+            # Get price signals
+            for prompt_format in self.format_models:
+                prompts[prompt_format][ticker] = ticker_prompt(
+                    ticker, price_prompts[prompt_format][ticker], prompt_format
+                )
+
+            # Get financial metrics signals
+            # financial_metrics = self.client.get_financial_metrics(
+            #     ticker=ticker,
+            #     start_date=start_date,
+            #     end_date=end_date,
+            # )
+            # prompts[...][ticker] += financial_metrics.create_prompt(self.prompt_cache)
+
+            # Get insider trade signals
+            # insider_trades = self.client.get_insider_trades(
+            #     ticker=ticker,
+            #     start_date=start_date,
+            #     end_date=end_date,
+            # )
+            # prompts[...][ticker] += insider_trades.create_prompt(self.prompt_cache)
+
+        self.count_prompt_tokens(prompts, end_date)
+        return prompts
+
+    def count_prompt_tokens(self, prompts: dict[str, dict[str, str]], end_date: str):
+        # Prompt tokens per model, with the model's own tokenizer where available
+        for prompt_format, model_names in self.format_models.items():
+            system = system_prompt(prompt_format)
+            for model_name in model_names:
+                if model_name not in self.system_tokens:
+                    self.system_tokens[model_name] = self.token_counter.count(
+                        model_name, system
+                    )
+                self.prompt_tokens[model_name] = {
+                    ticker: self.token_counter.count(model_name, system + "\n" + prompt)
+                    for ticker, prompt in prompts[prompt_format].items()
+                }
+        if self.args.prompt_token_log:
+            with open(self.args.prompt_token_log, "a") as f:
+                for model_name, counts in self.prompt_tokens.items():
+                    for ticker, tokens in counts.items():
+                        record = {
+                            "date": end_date,
+                            "ticker": ticker,
+                            "model": model_name,
+                            "format": self.prompt_formats[model_name],
+                            "tokens": tokens,
+                            "system_tokens": self.system_tokens[model_name],
+                            "exact": self.token_counter.exact(model_name),
+                        }
+                        f.write(json.dumps(record) + "\n")
+
+    async def analyze(
+        self,
+        tickers: list[str],
+        end_date: str,
+        resume: bool = False,
+        on_ticker: Callable[[str, dict[str, str | None]], None] | None = None,
+    ) -> dict[str, dict[str, str | None]]:
+        """
+        Ask the models about each ticker as of `end_date`. Returns the
+        replies keyed by ticker and then by model name, None for models the
+        quorum skipped. `on_ticker` is called with each ticker's replies as
+        soon as they are all in.
+
+        Each reply is stored as soon as it arrives. With `resume`, stored
+        replies are reused, and tickers every model has answered are not
+        fetched again. Models a quorum skipped count as answered only when
+        this run has a quorum too.
+        """
+        results = {}
+        if resume:
+            stored = self.results_store.results(end_date, tickers)
+            for ticker in tickers:
+                answered = {
+                    model_name
+                    for model_name, content in stored[ticker].items()
+                    if content is not None or self.args.quorum is not None
+                }
+                if set(MODEL_NAMES) <= answered:
+                    results[ticker] = in_model_order(stored[ticker])
+                    if on_ticker is not None:
+                        on_ticker(ticker, results[ticker])
+        pending = [ticker for ticker in tickers if ticker not in results]
+        if not pending:
+            return results
+        # Fetching and rendering block, and the service runs several jobs
+        # on one event loop
+        prompts = await asyncio.to_thread(self.render_prompts, pending, end_date)
+        replies = await self.ask(
+            {
+                (ticker, end_date): {
+                    prompt_format: prompts[prompt_format][ticker]
+                    for prompt_format in prompts
+                }
+                for ticker in pending
+            },
+            resume=resume,
+            on_reply=None
+            if on_ticker is None
+            else lambda key, contents: on_ticker(key[0], contents),
+        )
+        for (ticker, _), contents in replies.items():
+            results[ticker] = contents
+        return {ticker: results[ticker] for ticker in tickers}
+
+    async def ask(
+        self,
+        jobs: dict[tuple[str, str], dict[str, str]],
+        resume: bool = False,
+        on_reply: (
+            Callable[[tuple[str, str], dict[str, str | None]], None] | None
+        ) = None,
+    ) -> dict[tuple[str, str], dict[str, str | None]]:
+        """
+        Ask the models about rendered prompts, keyed by (ticker, end date)
+        and then by prompt format. Returns the replies keyed the same way
+        and then by model name, and calls `on_reply` as in analyze().
+        """
+        quorum = self.args.quorum
+        keys = list(jobs)
+        results = {}
+
+        async def invoke(model_name: str, key: tuple[str, str]) -> str:
+            # Results are stored as soon as they arrive, so an interrupted
+            # run can be resumed
+            ticker, end_date = key
+            if resume:
+                content = self.results_store.get(ticker, end_date, model_name)
+                if content is not None:
+                    return content
+            prompt_format = self.prompt_formats[model_name]
+            content = await self.scheduler.invoke(
+                model_name, jobs[key][prompt_format], system_prompt(prompt_format)
+            )
+            self.results_store.put(ticker, end_date, model_name, content, prompt_format)
+            return content
+
+        def finish(key: tuple[str, str], contents: dict[str, str]):
+            # Models the quorum did not need are stored as skipped, so a
+            # report can tell them from models that were never run
+            if quorum is not None:
+                ticker, end_date = key
+                for model_name in MODEL_NAMES:
+                    if model_name not in contents:
+                        self.results_store.put_skipped(
+                            ticker,
+                            end_date,
+                            model_name,
+                            self.prompt_formats[model_name],
+                        )
+            results[key] = in_model_order(contents)
+            if on_reply is not None:
+                on_reply(key, results[key])
+
+        async def analyze_key(key: tuple[str, str]) -> dict[str, str]:
+            if quorum is not None:
+                return await quorum_by_key(invoke, key, self.model_order, quorum)
+            contents = await asyncio.gather(
+                *(invoke(model_name, key) for model_name in MODEL_NAMES)
+            )
+            return dict(zip(MODEL_NAMES, contents))
+
+        if self.args.schedule == "model":
+            if quorum is not None:
+                contents = await quorum_by_model(invoke, keys, self.model_order, quorum)
+            else:
+                contents = {key: {} for key in keys}
+                for model_name in MODEL_NAMES:
+                    replies = await asyncio.gather(
+                        *(invoke(model_name, key) for key in keys)
+                    )
+                    for key, content in zip(keys, replies):
+                        contents[key][model_name] = content
+            for key in keys:
+                finish(key, contents[key])
+        else:
+            # Every key's calls are queued up front; results are reported in
+            # order as soon as a key's models have all answered
+            tasks = {key: asyncio.ensure_future(analyze_key(key)) for key in keys}
+            for key in keys:
+                finish(key, await tasks[key])
+        return results
+
+    def print_stats(self, prometheus_textfile: str | None = None):
+        self.telemetry.close()
+        if prometheus_textfile:
+            self.telemetry.write_prometheus(prometheus_textfile)
+        print(tabulate(self.telemetry.summary_rows(), headers=SUMMARY_HEADERS))
+        print(self.scheduler.stats)
+        if self.args.quorum is not None:
+            print(
+                f"quorum of {self.args.quorum}: {len(self.telemetry.calls)} model calls "
+                f"made, order {', '.join(self.model_order)}"
+            )
+        for model_name in MODEL_NAMES:
+            counts = self.prompt_tokens.get(model_name)
+            if not counts:
+                continue
+            estimate = "" if self.token_counter.exact(model_name) else "~"
+            print(
+                f"prompt tokens: {model_name} ({self.prompt_formats[model_name]}) "
+                f"{estimate}{sum(counts.values()) / len(counts):.0f} per ticker, "
+                f"{self.system_tokens[model_name]} of them in the system message"
+            )
+        if self.args.stream:
+            print(
+                f"streaming: {self.scheduler.early_stops} replies stopped after the "
+                "JSON answer"
+            )
+
+        if self.cache is not None:
+            print(self.cache.stats)
+        if self.prompt_cache is not None:
+            print(self.prompt_cache.stats)
+        if self.response_cache is not None:
+            print(self.response_cache.stats)
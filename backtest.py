@@ -0,0 +1,173 @@
+"""
+Walk-forward backtest of the models' ratings. The end date walks over every
+`step`-th trading day of a period; each ticker's prompt for that day is the
+one a live run would have rendered, and the models' ratings are compared
+with the realized 5-trading-day return, bucketed into the five ratings as the
+prompt defines them.
+
+    python main.py --tickers=AAPL,MSFT --backtest-start=2024-01-01 --end-date=2024-12-31
+    python main.py --tickers=AAPL,MSFT --backtest-start=2024-01-01 --report
+
+Replies go to the results store like those of live runs, so an interrupted
+backtest continues where it stopped, and --report scores the stored replies
+(of backtests and of live runs) without calling the models.
+"""
+
+import argparse
+import asyncio
+
+import numpy as np
+from tabulate import tabulate
+
+from data.api import FinancialDatasetsClient
+from data.cache import PriceCache
+from data.walk_forward import PricePanel, fetch_range, walk_forward
+from llm.evaluation import (
+    CONFUSION_HEADERS,
+    SCORE_HEADERS,
+    ModelScore,
+    rating_indices,
+    realized_ratings,
+    score_rows,
+)
+from llm.prompts import ticker_prompt
+from llm.results import ResultsStore
+from llm.settings import MODEL_NAMES
+
+
+def load_panel(
+    client: FinancialDatasetsClient,
+    tickers: list[str],
+    start_date: str,
+    end_date: str,
+    cache: PriceCache | None = None,
+) -> PricePanel:
+    first, last = fetch_range(start_date, end_date)
+    responses = client.get_prices_many(tickers, first, last, cache)
+    return PricePanel.from_responses(responses)
+
+
+async def collect(
+    analyst,
+    panel: PricePanel,
+    start_date: str,
+    end_date: str,
+    step: int = 1,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Ask the models about every snapshot of the walk that every model has
+    not answered yet, a batch of (ticker, end date) pairs at a time. Returns
+    the number of snapshots.
+    """
+    answered = {}
+    # Models a quorum skipped count as answered only when this run has one
+    for ticker, date, model_name, _ in analyst.results_store.ratings(
+        start_date, end_date, panel.tickers, skipped=analyst.args.quorum is not None
+    ):
+        answered.setdefault((ticker, date), set()).add(model_name)
+
+    snapshots = 0
+    for batch in walk_forward(panel, start_date, end_date, step, batch_size):
+        snapshots += len(batch)
+        keys = batch.keys
+        pending = [
+            i
+            for i, key in enumerate(keys)
+            if not set(MODEL_NAMES) <= answered.get(key, set())
+        ]
+        if not pending:
+            continue
+        price_prompts = {
+            prompt_format: batch.prompts(prompt_format)
+            for prompt_format in analyst.format_models
+        }
+        await analyst.ask(
+            {
+                keys[i]: {
+                    prompt_format: ticker_prompt(keys[i][0], prompts[i], prompt_format)
+                    for prompt_format, prompts in price_prompts.items()
+                }
+                for i in pending
+            },
+            resume=True,
+        )
+        print(f"Backtest: {snapshots} snapshots through {keys[-1][1]}")
+    return snapshots
+
+
+def evaluate(
+    results_store: ResultsStore, panel: PricePanel, start_date: str, end_date: str
+) -> list[ModelScore]:
+    """
+    Score each model's stored ratings in the period against the realized
+    ratings. Replies whose realized return is not known yet are left out.
+    """
+    rows = results_store.ratings(start_date, end_date, panel.tickers)
+    if not rows:
+        return []
+    tickers, dates, model_names, ratings = zip(*rows)
+    column = {ticker: i for i, ticker in enumerate(panel.tickers)}
+    # A live run with a weekend end date saw the last session's bars
+    date_rows = np.searchsorted(panel.dates, np.array(dates), side="right") - 1
+    realized = realized_ratings(panel.forward_returns())[
+        date_rows, [column[ticker] for ticker in tickers]
+    ]
+    realized[date_rows < 0] = -1
+    predicted = rating_indices(ratings)
+    model_names = np.array(model_names)
+    return [
+        ModelScore.from_ratings(
+            model_name,
+            predicted[model_names == model_name],
+            realized[model_names == model_name],
+        )
+        for model_name in MODEL_NAMES
+        if (model_names == model_name).any()
+    ]
+
+
+def print_scores(scores: list[ModelScore]):
+    if not scores:
+        print("No stored ratings with a known realized return in the backtest period")
+        return
+    print(tabulate(score_rows(scores), headers=SCORE_HEADERS))
+    for score in scores:
+        print(f"\n{score.model}: realized (rows) vs rated (columns)")
+        print(tabulate(score.confusion_rows(), headers=CONFUSION_HEADERS))
+
+
+def run_backtest(args: argparse.Namespace, tickers: list[str], end_date: str):
+    if args.report:
+        client = FinancialDatasetsClient(
+            base_url=args.api_base_url,
+            max_in_flight=args.max_in_flight,
+            requests_per_second=args.requests_per_second,
+        )
+        cache = None if args.no_cache else PriceCache(args.cache_path)
+        results_store = ResultsStore(args.results_path)
+    else:
+        # Imported here so that --report does not import the model libraries
+        from analyst import Analyst
+
+        analyst = Analyst(args)
+        client, cache, results_store = (
+            analyst.client,
+            analyst.cache,
+            analyst.results_store,
+        )
+
+    panel = load_panel(client, tickers, args.backtest_start, end_date, cache)
+    if not args.report:
+        asyncio.run(
+            collect(
+                analyst,
+                panel,
+                args.backtest_start,
+                end_date,
+                step=args.backtest_step,
+                batch_size=args.backtest_batch,
+            )
+        )
+        analyst.print_stats(args.prometheus_textfile)
+    print_scores(evaluate(results_store, panel, args.backtest_start, end_date))
@@ -0,0 +1,76 @@
+"""
+Compare the old regex-and-replace reply parsing with llm.answer.parse_answer
+on replies shaped like those the models produce:
+
+    python -m benchmarks.answer_parse --replies 20000
+
+Prints the time per reply and how many replies each parser could not get a
+rating out of. Schema-constrained replies are bare JSON objects; free
+replies may think first, wrap the JSON in a code fence or keep writing
+after it.
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+
+from llm.answer import RATINGS, parse_answer
+
+
+def legacy_parse(content: str) -> tuple[str, str]:
+    # The parser main.py used before llm.answer
+    json_str = (
+        re.sub(r"<think>.*?</think>", "", content, flags=re.DOTALL)
+        .replace("```json", "")
+        .replace("```", "")
+        .strip()
+    )
+    try:
+        data = json.loads(json_str)
+        rating = data.get("rating", "unavailable").lower()
+        reasoning = data.get("reasoning", "unavailable")
+    except Exception:
+        rating = "unavailable"
+        reasoning = json_str
+    return rating, reasoning
+
+
+def make_replies(count: int, seed: int = 0) -> dict[str, list[str]]:
+    rng = random.Random(seed)
+    words = ["momentum", "volume", "trend", "support", "resistance", "breakout"]
+    shapes = {
+        "schema": lambda answer, text: answer,
+        "fenced": lambda answer, text: f"```json\n{answer}\n```",
+        "thinking": lambda answer, text: f"<think>\n{text}\n</think>\n\n{answer}",
+        "trailing": lambda answer, text: (
+            f"<think>\n{text}\n</think>\n\n{answer}\n\nNote that {text}."
+        ),
+    }
+    replies = {shape: [] for shape in shapes}
+    for _ in range(count):
+        text = " ".join(rng.choices(words, k=200))
+        answer = json.dumps(
+            {"reasoning": text[:400], "rating": rng.choice(RATINGS)}
+        )
+        for shape, make in shapes.items():
+            replies[shape].append(make(answer, text))
+    return replies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--replies", type=int, default=20000)
+    args = parser.parse_args()
+
+    for shape, replies in make_replies(args.replies).items():
+        for name, parse in (("legacy", legacy_parse), ("parse_answer", parse_answer)):
+            started = time.perf_counter()
+            ratings = [parse(reply)[0] for reply in replies]
+            elapsed = time.perf_counter() - started
+            unavailable = ratings.count("unavailable")
+            print(
+                f"{shape:>8} {name:>12}: {elapsed / len(replies) * 1e6:.1f}us/reply, "
+                f"{unavailable}/{len(replies)} unavailable"
+            )
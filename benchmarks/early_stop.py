@@ -0,0 +1,67 @@
+"""
+Compare waiting for complete replies with streaming them and cancelling
+generation once the JSON answer is complete, against a local fake Ollama
+server whose reasoning models keep writing after the JSON.
+
+    python -m benchmarks.early_stop --tickers 4 --ms-per-token 5
+
+Exits with a non-zero status if the two modes give different answers.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from llm.answer import AnswerStream
+from llm.fake_ollama import FakeOllamaServer
+from llm.ollama import MODEL_NAMES, OllamaScheduler
+
+
+def answer_of(content: str) -> dict | None:
+    stream = AnswerStream()
+    stream.feed(content)
+    return stream.answer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=4)
+    parser.add_argument("--ms-per-token", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=5)
+    args = parser.parse_args()
+
+    prompts = {f"T{i}": f"Ticker T{i}" for i in range(args.tickers)}
+    answers = {}
+    for stream in (False, True):
+        server = FakeOllamaServer(
+            ms_per_token=args.ms_per_token, num_parallel=args.concurrency
+        ).start()
+        # Unconstrained, so reasoning models keep writing after their answer
+        scheduler = OllamaScheduler(
+            base_urls=[server.base_url],
+            max_concurrency=args.concurrency,
+            stream=stream,
+            answer_format=None,
+        )
+        started = time.perf_counter()
+        results = asyncio.run(scheduler.analyze_by_model(prompts, MODEL_NAMES))
+        elapsed = time.perf_counter() - started
+        # Let the server notice the last disconnects
+        time.sleep(0.1)
+        server.shutdown()
+
+        answers[stream] = {
+            (ticker, model_name): answer_of(content)
+            for ticker, contents in results.items()
+            for model_name, content in contents.items()
+        }
+        print(
+            f"{'streaming' if stream else 'complete'}: {elapsed:.2f}s, "
+            f"{server.tokens} tokens generated, {server.cancelled} cancelled, "
+            f"{scheduler.early_stops} early stops"
+        )
+
+    mismatches = [key for key in answers[False] if answers[False][key] != answers[True][key]]
+    print(f"{len(answers[False])} replies, {len(mismatches)} different answers")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,111 @@
+"""
+Measure price fetch throughput and tail latency against the local replay server.
+
+    python -m benchmarks.fetch_throughput --record-dir recordings --latency-ms 50 --jitter-ms 25 --rate-429 0.02
+    python -m benchmarks.fetch_throughput --record-dir recordings --rate-429 0.5 --rate-5xx 0.1 --retry-after 0.01
+
+Rate-limited and failed responses are retried by the client. Exits with a
+non-zero status if any request still fails after its retries, or if
+get_prices_many() against a server that fails every request does not name
+each ticker in its FetchError.
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from data.api import FetchError, FinancialDatasetsClient
+from data.replay import ReplayServer
+
+
+def timed_fetch(client, ticker, start_date, end_date):
+    started = time.perf_counter()
+    try:
+        client.fetch_prices(ticker, start_date, end_date)
+        ok = True
+    except Exception as e:
+        print(f"{ticker}: {e}")
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--record-dir", type=str, required=True)
+    parser.add_argument("--start-date", type=str, default="2000-01-01")
+    parser.add_argument("--end-date", type=str, default="2100-01-01")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    parser.add_argument("--requests-per-second", type=float, default=None)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--max-retries", type=int, default=20)
+    parser.add_argument("--retry-backoff", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        args.record_dir,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    ).start()
+    tickers = sorted(server.prices)
+    if not tickers:
+        raise SystemExit(f"No price recordings found in {args.record_dir}")
+
+    client = FinancialDatasetsClient(
+        base_url=server.base_url,
+        max_in_flight=args.max_in_flight,
+        requests_per_second=args.requests_per_second,
+        max_retries=args.max_retries,
+        retry_backoff=args.retry_backoff,
+    )
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.max_in_flight) as executor:
+        results = list(
+            executor.map(
+                lambda i: timed_fetch(
+                    client, tickers[i % len(tickers)], args.start_date, args.end_date
+                ),
+                range(args.requests),
+            )
+        )
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    errors = sum(not ok for _, ok in results)
+    print(f"requests:   {args.requests} ({errors} errors, {client.retries} retries)")
+    print(f"throughput: {args.requests / elapsed:.1f} req/s")
+    print(
+        "latency:    "
+        + ", ".join(
+            f"p{q}={np.percentile(latencies, q):.1f}ms" for q in (50, 95, 99)
+        )
+        + f", max={latencies.max():.1f}ms"
+    )
+
+    # Every ticker's failure is reported, not only the first one's
+    failing = ReplayServer(args.record_dir, rate_5xx=1.0).start()
+    client = FinancialDatasetsClient(
+        base_url=failing.base_url, max_retries=2, retry_backoff=0.001
+    )
+    try:
+        client.get_prices_many(tickers, args.start_date, args.end_date)
+        reported = set()
+    except FetchError as e:
+        reported = set(e.errors)
+    failing.shutdown()
+    print(f"failing server: {len(reported)}/{len(tickers)} tickers reported")
+
+    sys.exit(1 if errors or reported != set(tickers) else 0)
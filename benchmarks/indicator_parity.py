@@ -0,0 +1,176 @@
+"""
+Check that data.indicators matches the original ta-based computation and
+compare their speed.
+
+    python -m benchmarks.indicator_parity --cases 200
+
+Exits with a non-zero status if any indicator or rendered prompt differs.
+Requires the `ta` package, which the prompt itself no longer needs.
+"""
+
+import argparse
+import sys
+import time
+import warnings
+from datetime import date, timedelta
+
+import numpy as np
+from ta import add_all_ta_features
+from ta.momentum import RSIIndicator
+from ta.volume import OnBalanceVolumeIndicator
+
+from data.indicators import compute_snapshot
+from data.models import PriceResponse, render_price_prompt
+
+warnings.filterwarnings("ignore")
+
+TA_COLUMNS = [
+    "trend_sma_fast",
+    "trend_sma_slow",
+    "trend_ema_fast",
+    "trend_ema_slow",
+    "trend_macd",
+    "trend_macd_signal",
+    "trend_macd_diff",
+    "trend_adx",
+    "trend_adx_pos",
+    "trend_adx_neg",
+    "trend_cci",
+    "trend_dpo",
+    "trend_vortex_ind_pos",
+    "trend_vortex_ind_neg",
+    "trend_ichimoku_conv",
+    "trend_ichimoku_base",
+    "trend_kst",
+    "trend_kst_sig",
+    "momentum_rsi",
+    "momentum_stoch_rsi_k",
+    "momentum_stoch_rsi_d",
+    "momentum_tsi",
+    "momentum_uo",
+    "momentum_roc",
+    "momentum_kama",
+    "volatility_bbm",
+    "volatility_bbh",
+    "volatility_bbl",
+    "volatility_atr",
+    "volatility_dch",
+    "volatility_dcl",
+    "volume_mfi",
+    "volume_cmf",
+    "volume_em",
+    "volume_fi",
+    "volume_vpt",
+]
+
+
+def make_response(bars: int, seed: int) -> PriceResponse:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, rng.uniform(0.005, 0.05), bars)))
+    if seed % 7 == 0:
+        # Flat stretches exercise the zero-division paths
+        close[bars // 3 : bars // 2] = close[bars // 3]
+    close = np.round(close, 2)
+    open_ = np.round(close * (1 + rng.normal(0, 0.005, bars)), 2)
+    high = np.round(np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, bars))), 2)
+    low = np.round(np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, bars))), 2)
+    volume = rng.integers(1_000_000, 50_000_000, bars)
+    start = date(2020, 1, 1)
+    time = np.array(
+        [(start + timedelta(days=i)).strftime("%Y-%m-%dT04:00:00Z") for i in range(bars)],
+        dtype=object,
+    )
+    return PriceResponse.from_columns(
+        "TEST",
+        {"open": open_, "close": close, "high": high, "low": low, "volume": volume, "time": time},
+    )
+
+
+def reference_snapshot(response: PriceResponse) -> dict:
+    # The computation create_prompt performed before data.indicators
+    prices_df = response.to_frame()
+    df_ta = add_all_ta_features(
+        prices_df.copy(),
+        open="open",
+        high="high",
+        low="low",
+        close="close",
+        volume="volume",
+        fillna=True,
+    )
+    latest = df_ta.iloc[-1]
+    snapshot = {column: latest[column] for column in TA_COLUMNS}
+    rsi_28 = RSIIndicator(close=prices_df["close"], window=28)
+    snapshot["momentum_rsi_long"] = rsi_28.rsi().iloc[-1]
+    obv = OnBalanceVolumeIndicator(
+        close=prices_df["close"], volume=prices_df["volume"]
+    ).on_balance_volume()
+    snapshot["obv"] = obv.iloc[-1]
+    snapshot["obv_ma10"] = obv.rolling(10).mean().iloc[-1]
+    snapshot["obv_slope"] = np.polyfit(range(10), obv[-10:], 1)[0]
+    snapshot["price_slope"] = np.polyfit(range(10), prices_df["close"].iloc[-10:], 1)[0]
+    snapshot["prev_close"] = prices_df.iloc[-2]["close"]
+    for column in ["open", "close", "high", "low", "volume"]:
+        snapshot[column] = prices_df.iloc[-1][column]
+    snapshot["average_volume"] = prices_df["volume"].mean()
+    snapshot["return_1month"] = (
+        (prices_df["close"].iloc[-1] / prices_df["close"].iloc[-21] - 1) * 100
+        if len(prices_df) >= 21
+        else np.nan
+    )
+    snapshot["return_3month"] = (
+        prices_df["close"].iloc[-1] / prices_df["close"].iloc[0] - 1
+    ) * 100
+    return snapshot
+
+
+def engine_snapshot(response: PriceResponse) -> dict:
+    columns = response.columns
+    return compute_snapshot(
+        open=columns["open"],
+        high=columns["high"],
+        low=columns["low"],
+        close=columns["close"],
+        volume=columns["volume"],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cases", type=int, default=200)
+    parser.add_argument("--rtol", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    failures = 0
+    reference_time = engine_time = 0.0
+    for seed in range(args.cases):
+        bars = int(np.random.default_rng(seed).integers(30, 400))
+        response = make_response(bars, seed)
+
+        started = time.perf_counter()
+        expected = reference_snapshot(response)
+        reference_time += time.perf_counter() - started
+        started = time.perf_counter()
+        actual = engine_snapshot(response)
+        engine_time += time.perf_counter() - started
+
+        for key, value in expected.items():
+            if key.endswith("_slope"):
+                same = np.sign(value) == np.sign(actual[key])
+            else:
+                same = np.isclose(actual[key], value, rtol=args.rtol, atol=1e-9, equal_nan=True)
+            if not same:
+                failures += 1
+                print(f"seed={seed} bars={bars} {key}: expected {value}, got {actual[key]}")
+
+        date_ = response.columns["time"][-1][:10]
+        if render_price_prompt(date_, expected) != render_price_prompt(date_, actual):
+            failures += 1
+            print(f"seed={seed} bars={bars}: rendered prompts differ")
+
+    print(
+        f"{args.cases} cases, {failures} mismatches; "
+        f"ta {reference_time / args.cases * 1000:.1f} ms/ticker, "
+        f"engine {engine_time / args.cases * 1000:.1f} ms/ticker"
+    )
+    sys.exit(1 if failures else 0)
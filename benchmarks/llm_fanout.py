@@ -0,0 +1,54 @@
+"""
+Compare running every model one after another with the concurrent fan-out
+of llm.ollama.OllamaScheduler, against a local fake Ollama server.
+
+    python -m benchmarks.llm_fanout --tickers 4 --concurrency 10 --num-parallel 10
+
+Each model gets a different time to first token, so the fan-out should take
+about as long per ticker as the slowest model rather than the sum of all.
+"""
+
+import argparse
+import asyncio
+import time
+
+from llm.fake_ollama import FakeOllamaServer
+from llm.ollama import MODEL_NAMES, OllamaScheduler
+
+MODEL_LATENCY_MS = dict(zip(MODEL_NAMES, (200.0, 300.0, 300.0, 400.0, 600.0)))
+
+
+async def run(base_url: str, tickers: int, concurrency: int) -> float:
+    scheduler = OllamaScheduler(base_urls=[base_url], max_concurrency=concurrency)
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(scheduler.analyze(f"Ticker T{i}", MODEL_NAMES) for i in range(tickers))
+    )
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--num-parallel", type=int, default=10)
+    parser.add_argument("--ms-per-token", type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(
+        ms_per_token=args.ms_per_token,
+        model_latency_ms=MODEL_LATENCY_MS,
+        num_parallel=args.num_parallel,
+    ).start()
+
+    sequential = asyncio.run(run(server.base_url, args.tickers, 1))
+    concurrent = asyncio.run(run(server.base_url, args.tickers, args.concurrency))
+    server.shutdown()
+
+    print(
+        f"{args.tickers} tickers x {len(MODEL_NAMES)} models; per ticker: "
+        f"sequential {sequential / args.tickers:.2f}s, "
+        f"concurrent {concurrent / args.tickers:.2f}s "
+        f"(slowest model {max(MODEL_LATENCY_MS.values()) / 1000:.2f}s, "
+        f"sum {sum(MODEL_LATENCY_MS.values()) / 1000:.2f}s + generation)"
+    )
@@ -0,0 +1,50 @@
+"""
+Compare ticker-major and model-major scheduling against a local fake Ollama
+server that holds one model at a time and takes `--load-ms` to load one.
+
+    python -m benchmarks.model_schedule --tickers 6 --load-ms 1000
+
+Ticker-major reloads a model on almost every call; model-major loads each
+model once. Prints wall-clock time and the load_duration Ollama reported.
+"""
+
+import argparse
+import asyncio
+import time
+
+from llm.fake_ollama import FakeOllamaServer
+from llm.ollama import MODEL_NAMES, OllamaScheduler
+
+
+async def ticker_major(scheduler: OllamaScheduler, prompts: dict[str, str]):
+    for prompt in prompts.values():
+        await scheduler.analyze(prompt, MODEL_NAMES)
+
+
+async def model_major(scheduler: OllamaScheduler, prompts: dict[str, str]):
+    await scheduler.analyze_by_model(prompts, MODEL_NAMES)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=6)
+    parser.add_argument("--load-ms", type=float, default=1000.0)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    prompts = {f"T{i}": f"Ticker T{i}" for i in range(args.tickers)}
+    for name, plan in (("ticker-major", ticker_major), ("model-major", model_major)):
+        server = FakeOllamaServer(
+            latency_ms=args.latency_ms,
+            load_ms=args.load_ms,
+            num_parallel=args.concurrency,
+        ).start()
+        scheduler = OllamaScheduler(
+            base_urls=[server.base_url], max_concurrency=args.concurrency
+        )
+        started = time.perf_counter()
+        asyncio.run(plan(scheduler, prompts))
+        elapsed = time.perf_counter() - started
+        server.shutdown()
+        print(f"{name}: {elapsed:.1f}s wall, {server.loads} loads; {scheduler.stats}")
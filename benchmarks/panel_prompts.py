@@ -0,0 +1,46 @@
+"""
+Compare rendering price prompts ticker by ticker with the panel path that
+computes indicators for all tickers sharing the same dates at once.
+
+    python -m benchmarks.panel_prompts --tickers 3000 --bars 63
+
+A few tickers get a shorter history so they end up in their own group.
+Exits with a non-zero status if any prompt differs between the two paths.
+"""
+
+import argparse
+import sys
+import time
+
+from benchmarks.indicator_parity import make_response
+from data.models import PriceResponse, create_price_prompts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=3000)
+    parser.add_argument("--bars", type=int, default=63)
+    args = parser.parse_args()
+
+    responses = {}
+    for seed in range(args.tickers):
+        bars = args.bars - 3 if seed % 100 == 99 else args.bars
+        columns = make_response(bars, seed).columns
+        responses[f"T{seed}"] = PriceResponse.from_columns(f"T{seed}", columns)
+
+    started = time.perf_counter()
+    expected = {ticker: r.create_prompt() for ticker, r in responses.items()}
+    loop_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = create_price_prompts(responses)
+    panel_time = time.perf_counter() - started
+
+    mismatches = [ticker for ticker in expected if expected[ticker] != actual[ticker]]
+    for ticker in mismatches[:10]:
+        print(f"{ticker}: prompts differ")
+    print(
+        f"{args.tickers} tickers x {args.bars} bars, {len(mismatches)} mismatches; "
+        f"per ticker {loop_time:.2f}s, panel {panel_time:.2f}s "
+        f"({loop_time / panel_time:.1f}x)"
+    )
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,93 @@
+"""
+Compare per-row Pydantic parsing of a price response with the columnar path.
+
+    python -m benchmarks.price_parse --bars 100000
+
+Each mode runs in a fresh interpreter so that peak RSS is not shared.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from data.models import PriceResponse
+
+
+def make_payload(bars: int) -> bytes:
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    start = date(1990, 1, 1)
+    prices = [
+        {
+            "open": round(c * 0.99, 2),
+            "close": round(c, 2),
+            "high": round(c * 1.01, 2),
+            "low": round(c * 0.98, 2),
+            "volume": int(v),
+            "time": (start + timedelta(days=i)).strftime("%Y-%m-%dT04:00:00Z"),
+        }
+        for i, (c, v) in enumerate(zip(close, rng.integers(1e6, 5e7, bars)))
+    ]
+    return json.dumps({"ticker": "TEST", "prices": prices}).encode()
+
+
+def parse_rows(payload: bytes) -> pd.DataFrame:
+    # The pre-columnar path of create_prompt
+    response = PriceResponse(**json.loads(payload))
+    prices_df = pd.DataFrame([p.model_dump() for p in response.prices])
+    prices_df["date"] = pd.to_datetime(prices_df["time"])
+    prices_df.set_index("date", inplace=True)
+    for col in ["open", "close", "high", "low", "volume"]:
+        prices_df[col] = pd.to_numeric(prices_df[col], errors="coerce")
+    prices_df.sort_index(inplace=True)
+    return prices_df
+
+
+def parse_columns(payload: bytes) -> pd.DataFrame:
+    return PriceResponse.from_json(payload).to_frame()
+
+
+def run(mode: str, bars: int, repeat: int):
+    payload = make_payload(bars)
+    parse = parse_rows if mode == "rows" else parse_columns
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(payload)
+        best = min(best, time.perf_counter() - started)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": best, "rss_kb": rss_after - rss_before}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bars", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mode", choices=["rows", "columns"], default=None)
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.mode, args.bars, args.repeat)
+        sys.exit()
+
+    for mode in ["rows", "columns"]:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.price_parse", "--mode", mode]
+            + ["--bars", str(args.bars), "--repeat", str(args.repeat)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output)
+        print(
+            f"{mode:8s} {args.bars / result['seconds']:>12,.0f} bars/s"
+            f"  peak RSS +{result['rss_kb'] / 1024:,.1f} MB"
+        )
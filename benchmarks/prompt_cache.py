@@ -0,0 +1,58 @@
+"""
+Measure rendering price prompts cold, from the on-disk tier of the prompt
+cache (a new process) and from the in-memory tier (a repeated call).
+
+    python -m benchmarks.prompt_cache --tickers 3000 --bars 63
+
+Exits with a non-zero status if a cached prompt differs from a fresh one.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.indicator_parity import make_response
+from data.models import PriceResponse, create_price_prompts
+from data.prompt_cache import PromptCache
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=3000)
+    parser.add_argument("--bars", type=int, default=63)
+    args = parser.parse_args()
+
+    responses = {}
+    for seed in range(args.tickers):
+        columns = make_response(args.bars, seed).columns
+        responses[f"T{seed}"] = PriceResponse.from_columns(f"T{seed}", columns)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "prompts.sqlite")
+
+        started = time.perf_counter()
+        expected = create_price_prompts(responses, cache=PromptCache(path))
+        cold_time = time.perf_counter() - started
+
+        cache = PromptCache(path)
+        started = time.perf_counter()
+        from_disk = create_price_prompts(responses, cache=cache)
+        disk_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        from_memory = create_price_prompts(responses, cache=cache)
+        memory_time = time.perf_counter() - started
+        cache.close()
+
+    mismatches = [
+        ticker
+        for ticker in expected
+        if not expected[ticker] == from_disk[ticker] == from_memory[ticker]
+    ]
+    print(cache.stats)
+    print(
+        f"{args.tickers} tickers x {args.bars} bars, {len(mismatches)} mismatches; "
+        f"cold {cold_time:.2f}s, disk {disk_time:.3f}s, memory {memory_time:.3f}s"
+    )
+    sys.exit(1 if mismatches else 0)
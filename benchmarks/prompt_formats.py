@@ -0,0 +1,92 @@
+"""
+Compare the verbose and compact prompt formats: prompt tokens per model and,
+against a real Ollama server, how often a model gives the same rating for
+both.
+
+    python -m benchmarks.prompt_formats --tickers 20
+    python -m benchmarks.prompt_formats --tickers 20 --ollama-url http://localhost:11434 --seed 0
+
+Token counts use each model's tokenizer when `transformers` can load it and
+are estimated (~) otherwise. Tokens in the system message are the same for
+every ticker and are shown separately. Without `--ollama-url` only the token
+counts are printed: the canned replies of llm.fake_ollama do not depend on
+what the prompt says.
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.indicator_parity import make_response
+from data.models import PROMPT_FORMATS, PriceResponse, create_price_prompts
+from llm.answer import parse_answer
+from llm.ollama import MODEL_NAMES, OllamaScheduler
+from llm.prompts import system_prompt, ticker_prompt
+from llm.tokens import TokenCounter
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=20)
+    parser.add_argument("--bars", type=int, default=63)
+    parser.add_argument("--ollama-url", type=str, default=None)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    responses = {
+        f"T{seed}": PriceResponse.from_columns(
+            f"T{seed}", make_response(args.bars, seed).columns
+        )
+        for seed in range(args.tickers)
+    }
+    prompts = {}
+    for prompt_format in PROMPT_FORMATS:
+        price_prompts = create_price_prompts(responses, prompt_format=prompt_format)
+        prompts[prompt_format] = {
+            ticker: ticker_prompt(ticker, price_prompt, prompt_format)
+            for ticker, price_prompt in price_prompts.items()
+        }
+
+    counter = TokenCounter()
+    for model_name in MODEL_NAMES:
+        estimate = "" if counter.exact(model_name) else "~"
+        counts = []
+        for prompt_format in PROMPT_FORMATS:
+            system = counter.count(model_name, system_prompt(prompt_format))
+            per_ticker = sum(
+                counter.count(model_name, prompt)
+                for prompt in prompts[prompt_format].values()
+            ) / len(responses)
+            counts.append(per_ticker)
+            print(
+                f"{model_name:>16} {prompt_format:>7}: {estimate}{per_ticker:.0f} "
+                f"tokens per ticker + {system} in the system message"
+            )
+        print(f"{'':>16} {'':>7}  compact/verbose: {counts[1] / counts[0]:.0%}")
+
+    if args.ollama_url:
+        scheduler = OllamaScheduler(
+            base_urls=[args.ollama_url],
+            max_concurrency=args.concurrency,
+            seed=args.seed,
+        )
+
+        async def run_all():
+            return {
+                prompt_format: await scheduler.analyze_by_model(
+                    prompts[prompt_format],
+                    MODEL_NAMES,
+                    system=system_prompt(prompt_format),
+                )
+                for prompt_format in PROMPT_FORMATS
+            }
+
+        results = asyncio.run(run_all())
+        for model_name in MODEL_NAMES:
+            same = sum(
+                parse_answer(results["verbose"][ticker][model_name])[0]
+                == parse_answer(results["compact"][ticker][model_name])[0]
+                for ticker in responses
+            )
+            print(
+                f"{model_name:>16}: same rating for {same}/{len(responses)} tickers"
+            )
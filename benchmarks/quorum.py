@@ -0,0 +1,112 @@
+"""
+Compare asking every model with the quorum ensemble against a local fake
+Ollama server whose models agree on a ticker's rating with probability
+`--agreement`, as they tend to for strongly trending stocks.
+
+    python -m benchmarks.quorum --tickers 20 --agreement 0.8 --quorum 3
+
+Models get different latencies, so the speed order matters. Prints wall
+time and model calls of each plan, and how often the quorum's rating differs
+from the plurality rating of all models.
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from llm.answer import parse_answer
+from llm.ensemble import order_by_speed, quorum_by_key, quorum_by_model
+from llm.fake_ollama import FakeOllamaServer
+from llm.ollama import MODEL_NAMES, OllamaScheduler
+from llm.telemetry import Telemetry
+
+# Time to first token of each model; later models in MODEL_NAMES are slower
+MODEL_LATENCY_MS = {name: 50.0 * (i + 1) for i, name in enumerate(MODEL_NAMES)}
+
+
+def plurality(contents: dict[str, str]) -> str:
+    ratings = Counter(parse_answer(content)[0] for content in contents.values())
+    return ratings.most_common(1)[0][0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=20)
+    parser.add_argument("--agreement", type=float, default=0.8)
+    parser.add_argument("--quorum", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--ms-per-token", type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(
+        ms_per_token=args.ms_per_token,
+        model_latency_ms=MODEL_LATENCY_MS,
+        num_parallel=args.concurrency,
+        max_loaded_models=len(MODEL_NAMES),
+        agreement=args.agreement,
+    ).start()
+    tickers = [f"T{i}" for i in range(args.tickers)]
+    # Listed slowest first, so the speed order has to be measured
+    model_names = MODEL_NAMES[::-1]
+
+    def run(plan):
+        telemetry = Telemetry()
+        scheduler = OllamaScheduler(
+            base_urls=[server.base_url],
+            max_concurrency=args.concurrency,
+            telemetry=telemetry,
+        )
+
+        def invoke(model_name, ticker):
+            return scheduler.invoke(model_name, f"Ticker {ticker}")
+
+        started = time.perf_counter()
+        results = asyncio.run(plan(invoke))
+        return results, time.perf_counter() - started, telemetry
+
+    async def every_model(invoke):
+        results = {ticker: {} for ticker in tickers}
+        for model_name in model_names:
+            contents = await asyncio.gather(
+                *(invoke(model_name, ticker) for ticker in tickers)
+            )
+            for ticker, content in zip(tickers, contents):
+                results[ticker][model_name] = content
+        return results
+
+    everything, elapsed, telemetry = run(every_model)
+    print(f"all models: {elapsed:.2f}s, {len(telemetry.calls)} calls")
+    wall = {}
+    for metrics in telemetry.calls:
+        wall.setdefault(metrics.model, []).append(metrics.wall_seconds)
+    model_order = order_by_speed(
+        model_names, {name: sum(s) / len(s) for name, s in wall.items()}
+    )
+    expected = {ticker: plurality(everything[ticker]) for ticker in tickers}
+
+    async def by_model(invoke):
+        return await quorum_by_model(invoke, tickers, model_order, args.quorum)
+
+    async def by_ticker(invoke):
+        return dict(
+            zip(
+                tickers,
+                await asyncio.gather(
+                    *(
+                        quorum_by_key(invoke, ticker, model_order, args.quorum)
+                        for ticker in tickers
+                    )
+                ),
+            )
+        )
+
+    plans = (("quorum, model-major", by_model), ("quorum, per ticker", by_ticker))
+    for name, plan in plans:
+        results, elapsed, telemetry = run(plan)
+        differ = sum(plurality(results[t]) != expected[t] for t in tickers)
+        print(
+            f"{name}: {elapsed:.2f}s, {len(telemetry.calls)} calls, "
+            f"{differ}/{len(tickers)} ratings differ from asking every model"
+        )
+    server.shutdown()
@@ -0,0 +1,134 @@
+"""
+Measure how many completions per second llm.rewards scores, against the
+reward function train_trl.py used before it (print every reply, parse it,
+rebuild the rating table for every score):
+
+    python -m benchmarks.rewards --completions 20000 --group-size 8
+
+Completions are shaped like the replies of benchmarks.answer_parse, plus
+some without a rating. The legacy function is timed printing to /dev/null
+and to a pseudo-terminal that a thread drains, as when training runs in a
+terminal (the terminal's own rendering is not included). Exits with a
+non-zero status if the accuracy rewards differ from the legacy scores.
+"""
+
+import argparse
+import contextlib
+import os
+import pty
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.answer_parse import make_replies
+from llm.answer import RATINGS, parse_answer
+from llm.rewards import RatingReward, RewardLog
+
+
+def extract_rating(response):
+    print("raw response: ", response)
+    return parse_answer(response)[0]
+
+
+def get_rating_score(rating, label):
+    d = {
+        "strong buy": 2,
+        "buy": 1,
+        "hold": 0,
+        "sell": -1,
+        "strong sell": -2,
+    }
+    diff = abs(d.get(rating.lower(), 10) - d[label])
+    return -min(diff, 2)
+
+
+def legacy_reward(prompts, completions, answer, **kwargs) -> list[float]:
+    # train_trl.reward_func before llm.rewards
+    extracted_responses = [extract_rating(c) for c in completions]
+    results = [get_rating_score(x, y) for x, y in zip(extracted_responses, answer)]
+    print("scores: ", results)
+    return results
+
+
+@contextlib.contextmanager
+def terminal_stdout():
+    # stdout to a pseudo-terminal whose output a thread reads and discards
+    master, slave = pty.openpty()
+    reader = threading.Thread(target=_drain, args=(master,), daemon=True)
+    reader.start()
+    with os.fdopen(slave, "w") as terminal, contextlib.redirect_stdout(terminal):
+        yield
+    reader.join()
+    os.close(master)
+
+
+def _drain(fd: int):
+    try:
+        while os.read(fd, 65536):
+            pass
+    except OSError:
+        # The terminal was closed
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--completions", type=int, default=20000)
+    parser.add_argument(
+        "--group-size", type=int, default=8, help="Completions per reward call"
+    )
+    parser.add_argument("--log-path", type=str, default="/tmp/rewards.jsonl")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    completions = [
+        reply
+        for replies in make_replies(args.completions // 4 + 1).values()
+        for reply in replies
+    ][: args.completions]
+    for i in range(0, len(completions), 10):
+        completions[i] = "I cannot rate this stock."
+    rng.shuffle(completions)
+    answers = rng.choices(RATINGS, k=len(completions))
+    returns = [rng.gauss(0.0, 4.0) for _ in completions]
+    calls = range(0, len(completions), args.group_size)
+
+    def run(reward) -> tuple[float, list[float]]:
+        started = time.perf_counter()
+        rewards = []
+        for start in calls:
+            end = start + args.group_size
+            rewards += reward(
+                None,
+                completions[start:end],
+                answer=answers[start:end],
+                forward_return=returns[start:end],
+            )
+        return time.perf_counter() - started, rewards
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        legacy_time, legacy = run(legacy_reward)
+    with terminal_stdout():
+        terminal_time, _ = run(legacy_reward)
+    accuracy_time, accuracy = run(RatingReward())
+    log = RewardLog(args.log_path, sample_rate=0.01)
+    weights = {"accuracy": 1.0, "format": 0.25, "distance": 1.0}
+    all_time, _ = run(RatingReward(weights, log))
+    log.close()
+
+    mismatches = int((np.array(legacy) != np.array(accuracy)).sum())
+    for name, seconds in (
+        ("legacy, to a terminal", terminal_time),
+        ("legacy, to /dev/null", legacy_time),
+        ("accuracy", accuracy_time),
+        ("all components, logged", all_time),
+    ):
+        print(
+            f"{name:>22}: {len(completions) / seconds:.0f} completions/s "
+            f"({seconds / len(calls) * 1e6:.0f}us per call of {args.group_size})"
+        )
+    print(f"{mismatches}/{len(completions)} accuracy rewards differ from legacy")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,69 @@
+"""
+Check that the analyst service answers malformed POST /analyze bodies with
+a 400 and a JSON error instead of failing in the handler, and still runs
+valid jobs:
+
+    python -m benchmarks.service_requests
+
+The service runs on a free local port with a stand-in analyst, so no data
+API or Ollama server is needed. Exits with a non-zero status if any body
+gets an unexpected status.
+"""
+
+import json
+import sys
+import urllib.error
+import urllib.request
+
+from service import AnalystService
+
+# Body and the status it should get
+CASES = [
+    (b'{"tickers": "MSFT"}', 400),
+    (b"[1]", 400),
+    (b'"AAPL"', 400),
+    (b'{"tickers": ["AAPL"], "end_date": 20240101}', 400),
+    (b'{"tickers": ["AAPL"], "end_date": "2024-13-01"}', 400),
+    (b'{"tickers": []}', 400),
+    (b'{"tickers": ["AAPL", 1]}', 400),
+    (b"{not json", 400),
+    (b'{"tickers": ["AAPL", "MSFT"], "end_date": "2024-01-02"}', 200),
+]
+
+
+class StubAnalyst:
+    prompt_formats = {"stub": "verbose"}
+
+    async def warm_up(self):
+        pass
+
+    async def analyze(self, tickers, end_date, resume=False):
+        reply = json.dumps({"reasoning": end_date, "rating": "hold"})
+        return {ticker: {"stub": reply} for ticker in tickers}
+
+
+def post(url: str, body: bytes) -> tuple[int, dict]:
+    request = urllib.request.Request(
+        url, data=body, headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+if __name__ == "__main__":
+    service = AnalystService(StubAnalyst(), port=0).start()
+    failures = 0
+    for body, expected in CASES:
+        try:
+            status, reply = post(f"{service.base_url}/analyze", body)
+        except Exception as e:
+            status, reply = None, {"error": f"{type(e).__name__}: {e}"}
+        ok = status == expected
+        failures += not ok
+        detail = reply.get("error") or ", ".join(reply.get("results", {}))
+        print(f"{'ok' if ok else 'FAIL':>4} {status} {body.decode()}: {detail}")
+    service.shutdown()
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,74 @@
+"""
+Check that main.py starts within a fixed budget for the commands that do
+not analyze anything, and that they do not import the data, model or
+DataFrame libraries:
+
+    python -m benchmarks.startup --runs 7 --budget-ms 400
+
+Prints the median wall-clock time of each command next to a bare Python
+start, and any heavy package it imported. Exits with status 1 if a command
+is over budget or imports one of them.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from startup import time_imports
+
+# Packages only the analysis itself needs
+HEAVY_PACKAGES = (
+    "langchain_core",
+    "langchain_ollama",
+    "langsmith",
+    "numpy",
+    "ollama",
+    "pandas",
+    "pydantic",
+    "requests",
+    "transformers",
+)
+COMMANDS = {
+    "help": ["--help"],
+    "argument error": ["--quorum=9"],
+    "report": ["--tickers=AAPL,MSFT", "--report", "--results-path=:memory:"],
+}
+
+
+def median_seconds(argv: list[str], runs: int) -> float:
+    seconds = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *argv], capture_output=True)
+        seconds.append(time.perf_counter() - started)
+    return statistics.median(seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=400,
+        help="Maximum median start-up time of each command",
+    )
+    args = parser.parse_args()
+
+    python = median_seconds(["-c", "pass"], args.runs)
+    print(f"bare python: {python * 1000:.0f}ms")
+    failures = 0
+    for name, command in COMMANDS.items():
+        seconds = median_seconds(["main.py", *command], args.runs)
+        _, _, imports, _ = time_imports(["main.py", *command], quiet=True)
+        heavy = sorted({i.package for i in imports} & set(HEAVY_PACKAGES))
+        over = seconds * 1000 > args.budget_ms
+        failures += over or bool(heavy)
+        print(
+            f"{name}: {seconds * 1000:.0f}ms, {len(imports)} modules imported"
+            + (f", over the {args.budget_ms:.0f}ms budget" if over else "")
+            + (f", imports {', '.join(heavy)}" if heavy else "")
+        )
+    sys.exit(1 if failures else 0)
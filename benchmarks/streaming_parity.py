@@ -0,0 +1,80 @@
+"""
+Check that data.streaming.IndicatorState, fed one bar at a time, matches
+compute_snapshot() over the same bars, and compare the cost of a daily
+update with recomputing the whole history.
+
+    python -m benchmarks.streaming_parity --cases 100
+
+Every case saves the state to JSON halfway and continues from the loaded
+copy. Cases run to several hundred bars, well past main.py's window, and
+every value is compared with compute_snapshot() over all bars so far. Exits
+with a non-zero status if any indicator or rendered prompt differs.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.indicator_parity import make_response
+from data.indicators import compute_snapshot
+from data.models import PRICE_COLUMNS, render_price_prompt
+from data.streaming import IndicatorState
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cases", type=int, default=100)
+    parser.add_argument("--rtol", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    failures = checks = updates = 0
+    update_time = batch_time = 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.json")
+        for seed in range(args.cases):
+            bars = int(np.random.default_rng(seed).integers(60, 400))
+            columns = make_response(bars, seed).columns
+            state = IndicatorState("TEST")
+            for i in range(bars):
+                if i == bars // 2:
+                    state.save(path)
+                    state = IndicatorState.load(path)
+
+                started = time.perf_counter()
+                state.update(**{col: columns[col][i] for col in PRICE_COLUMNS + ("time",)})
+                update_time += time.perf_counter() - started
+                updates += 1
+                if i < 29 or (i % 10 and i != bars - 1):
+                    continue
+
+                started = time.perf_counter()
+                expected = compute_snapshot(
+                    **{col: columns[col][: i + 1] for col in PRICE_COLUMNS}
+                )
+                batch_time += time.perf_counter() - started
+                actual = state.snapshot()
+                checks += 1
+
+                for key, value in expected.items():
+                    if key.endswith("_slope"):
+                        same = np.sign(value) == np.sign(actual[key])
+                    else:
+                        same = np.isclose(
+                            actual[key], value, rtol=args.rtol, atol=1e-9, equal_nan=True
+                        )
+                    if not same:
+                        failures += 1
+                        print(f"seed={seed} bar={i} {key}: expected {value}, got {actual[key]}")
+                if render_price_prompt("", expected) != render_price_prompt("", actual):
+                    failures += 1
+                    print(f"seed={seed} bar={i}: rendered prompts differ")
+
+    print(
+        f"{checks} snapshots, {failures} mismatches; "
+        f"update {update_time / updates * 1e6:.0f} us/bar, "
+        f"batch recompute {batch_time / checks * 1000:.1f} ms"
+    )
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,82 @@
+"""
+Measure the walk-forward snapshot throughput of data.walk_forward against
+computing each (ticker, end date) window on its own, as a loop over
+PriceResponse.create_prompt() for every day would:
+
+    python -m benchmarks.walk_forward --tickers 500 --days 2520 --batch-size 10000
+
+Every `--check-every`-th snapshot's prompt is compared with create_prompt()
+on the same window; exits with a non-zero status if any differs. Also times
+the realized-rating labels of the whole panel.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.indicator_parity import make_response
+from data.lookback import required_bars
+from data.models import PriceResponse
+from data.walk_forward import PricePanel, walk_forward
+from llm.evaluation import realized_ratings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=100)
+    parser.add_argument("--days", type=int, default=1260)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--check-every", type=int, default=997)
+    args = parser.parse_args()
+
+    responses = {}
+    for seed in range(args.tickers):
+        # Some tickers list later, so their first windows are incomplete
+        days = args.days - 200 if seed % 10 == 9 else args.days
+        columns = make_response(args.days, seed).columns
+        columns = {col: values[args.days - days :] for col, values in columns.items()}
+        responses[f"T{seed}"] = PriceResponse.from_columns(f"T{seed}", columns)
+
+    started = time.perf_counter()
+    panel = PricePanel.from_responses(responses)
+    panel_time = time.perf_counter() - started
+
+    bars = required_bars()
+    snapshots = mismatches = checks = 0
+    check_time = 0.0
+    started = time.perf_counter()
+    for batch in walk_forward(panel, batch_size=args.batch_size):
+        for i in range(-snapshots % args.check_every, len(batch), args.check_every):
+            check_started = time.perf_counter()
+            ticker = panel.tickers[batch.columns[i]]
+            row = batch.rows[i]
+            columns = responses[ticker].columns
+            end = int(np.searchsorted(columns["time"], panel.times[row])) + 1
+            window = {col: values[end - bars : end] for col, values in columns.items()}
+            expected = PriceResponse.from_columns(ticker, window).create_prompt()
+            check_time += time.perf_counter() - check_started
+            checks += 1
+            if batch.prompt(i) != expected:
+                mismatches += 1
+                print(f"{ticker} {panel.dates[row]}: prompts differ")
+        snapshots += len(batch)
+    walk_time = time.perf_counter() - started - check_time
+
+    started = time.perf_counter()
+    realized = realized_ratings(panel.forward_returns())
+    label_time = time.perf_counter() - started
+
+    per_window = check_time / max(checks, 1)
+    print(
+        f"{args.tickers} tickers x {args.days} days: {snapshots} snapshots, "
+        f"{checks} checked, {mismatches} mismatches"
+    )
+    print(
+        f"panel {panel_time:.2f}s; walk-forward {walk_time:.1f}s "
+        f"({snapshots / walk_time:.0f} snapshots/s); one window at a time "
+        f"{per_window * 1000:.2f} ms ({1 / per_window:.0f} snapshots/s, "
+        f"{per_window * snapshots / walk_time:.1f}x slower); "
+        f"labels {label_time * 1000:.0f} ms for {int((realized >= 0).sum())} snapshots"
+    )
+    sys.exit(1 if mismatches else 0)
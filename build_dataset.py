@@ -0,0 +1,233 @@
+"""
+Build the GRPO training set from price histories: one example per ticker and
+trading day, the prompt a live run of main.py would have sent and the rating
+the following 5 trading days earned, bucketed as the prompt's instructions
+define them (+5%, +1%, -1%, -5%).
+
+    python build_dataset.py --tickers=AAPL,MSFT,NVDA --start-date=2020-01-01 --end-date=2024-06-30
+    python build_dataset.py --tickers-file=universe.txt --start-date=2015-01-01 \\
+        --end-date=2024-06-30 --workers=8 --output-dir=datasets/train
+
+Prices come through the price cache, so only missing ranges are downloaded.
+The tickers are split into groups that a process pool turns into examples.
+Each worker streams its examples into Parquet shards of at most
+--shard-rows rows, so memory stays bounded by one batch per worker however
+many examples are written. train_trl.py loads the shards with
+datasets.load_dataset("parquet", ...), which memory-maps them.
+
+Build the held-out set for evaluation from a later, disjoint date range.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data.api import FetchError, FinancialDatasetsClient
+from data.cache import PriceCache
+from data.models import PriceResponse
+from data.settings import DEFAULT_BASE_URL, PROMPT_FORMATS
+from data.walk_forward import PricePanel, fetch_range, walk_forward
+from llm.answer import RATINGS
+from llm.evaluation import realized_ratings
+from llm.prompts import ticker_prompt
+
+SCHEMA = pa.schema(
+    [
+        ("prompt", pa.string()),
+        ("answer", pa.string()),
+        ("ticker", pa.string()),
+        ("date", pa.string()),
+        # Percent change of the close over the next 5 trading days
+        ("forward_return", pa.float64()),
+    ]
+)
+
+
+def write_group(
+    group: int,
+    columns: dict[str, dict[str, np.ndarray]],
+    output_dir: str,
+    start_date: str,
+    end_date: str,
+    step: int = 1,
+    prompt_format: str = "verbose",
+    batch_size: int = 5000,
+    shard_rows: int = 100_000,
+) -> tuple[int, dict[str, int]]:
+    """
+    Write the examples of one group of tickers, given as price columns keyed
+    by ticker, to `part-<group>-<n>.parquet` shards. Returns the number of
+    examples and their count per answer.
+    """
+    panel = PricePanel.from_responses(
+        {
+            ticker: PriceResponse.from_columns(ticker, ticker_columns)
+            for ticker, ticker_columns in columns.items()
+        }
+    )
+    forward_returns = panel.forward_returns()
+    realized = realized_ratings(forward_returns)
+
+    examples = 0
+    answers = dict.fromkeys(RATINGS, 0)
+    writer, shard, shard_examples = None, 0, 0
+    try:
+        for batch in walk_forward(panel, start_date, end_date, step, batch_size):
+            labels = realized[batch.rows, batch.columns]
+            # End dates whose next 5 trading days are not in the data yet
+            labeled = np.flatnonzero(labels >= 0)
+            if not len(labeled):
+                continue
+            keys = batch.keys
+            prompts = [
+                ticker_prompt(keys[i][0], batch.prompt(i, prompt_format), prompt_format)
+                for i in labeled
+            ]
+            table = pa.table(
+                {
+                    "prompt": prompts,
+                    "answer": [RATINGS[label] for label in labels[labeled]],
+                    "ticker": [keys[i][0] for i in labeled],
+                    "date": [keys[i][1] for i in labeled],
+                    "forward_return": forward_returns[
+                        batch.rows[labeled], batch.columns[labeled]
+                    ],
+                },
+                schema=SCHEMA,
+            )
+            for label in labels[labeled]:
+                answers[RATINGS[label]] += 1
+            examples += len(table)
+
+            offset = 0
+            while offset < len(table):
+                if writer is None:
+                    name = f"part-{group:05d}-{shard:04d}.parquet"
+                    writer = pq.ParquetWriter(os.path.join(output_dir, name), SCHEMA)
+                    shard, shard_examples = shard + 1, 0
+                rows = min(len(table) - offset, shard_rows - shard_examples)
+                writer.write_table(table.slice(offset, rows))
+                offset += rows
+                shard_examples += rows
+                if shard_examples == shard_rows:
+                    writer.close()
+                    writer = None
+    finally:
+        if writer is not None:
+            writer.close()
+    return examples, answers
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the GRPO training set")
+    parser.add_argument("--tickers", type=str, help="Comma-separated ticker symbols")
+    parser.add_argument(
+        "--tickers-file", type=str, help="File with one ticker symbol per line"
+    )
+    parser.add_argument("--start-date", type=str, required=True)
+    parser.add_argument("--end-date", type=str, required=True)
+    parser.add_argument(
+        "--step", type=int, default=1, help="Only use every Nth trading day"
+    )
+    parser.add_argument("--prompt-format", choices=PROMPT_FORMATS, default="verbose")
+    parser.add_argument("--output-dir", type=str, default="datasets/train")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="Worker processes"
+    )
+    parser.add_argument(
+        "--group-size",
+        type=int,
+        default=50,
+        help="Tickers per worker task; their windows are computed together",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=5000,
+        help="(ticker, day) windows computed at once per worker; bounds its memory",
+    )
+    parser.add_argument("--shard-rows", type=int, default=100_000)
+    parser.add_argument("--cache-path", type=str, default=".cache/prices.sqlite")
+    parser.add_argument("--api-base-url", type=str, default=DEFAULT_BASE_URL)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers = [line.strip() for line in f if line.strip()]
+    elif args.tickers:
+        tickers = [ticker.strip() for ticker in args.tickers.split(",")]
+    else:
+        parser.error("--tickers or --tickers-file is required")
+    sizes = (args.step, args.workers, args.group_size, args.batch_size, args.shard_rows)
+    if min(sizes) < 1:
+        parser.error(
+            "--step, --workers, --group-size, --batch-size and --shard-rows must be "
+            "at least 1"
+        )
+    os.makedirs(args.output_dir, exist_ok=True)
+    if glob.glob(os.path.join(args.output_dir, "*.parquet")):
+        parser.error(f"{args.output_dir} already holds Parquet shards")
+
+    started = time.perf_counter()
+    client = FinancialDatasetsClient(
+        base_url=args.api_base_url, max_in_flight=args.max_in_flight
+    )
+    cache = PriceCache(args.cache_path)
+    first, last = fetch_range(args.start_date, args.end_date)
+    try:
+        responses = client.get_prices_many(tickers, first, last, cache)
+    except FetchError as e:
+        sys.exit(str(e))
+    print(cache.stats)
+    load_seconds = time.perf_counter() - started
+
+    examples = 0
+    answers = dict.fromkeys(RATINGS, 0)
+    # Contiguous groups, so each shard covers a range of the ticker list
+    groups = [
+        tickers[i : i + args.group_size]
+        for i in range(0, len(tickers), args.group_size)
+    ]
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(
+                write_group,
+                group,
+                {ticker: responses[ticker].columns for ticker in group_tickers},
+                args.output_dir,
+                args.start_date,
+                args.end_date,
+                args.step,
+                args.prompt_format,
+                args.batch_size,
+                args.shard_rows,
+            )
+            for group, group_tickers in enumerate(groups)
+        ]
+        for future in futures:
+            group_examples, group_answers = future.result()
+            examples += group_examples
+            for answer, count in group_answers.items():
+                answers[answer] += count
+
+    seconds = time.perf_counter() - started - load_seconds
+    shards = len(glob.glob(os.path.join(args.output_dir, "*.parquet")))
+    print(
+        f"{examples} examples in {shards} shards in {args.output_dir}, "
+        f"{seconds:.1f}s ({examples / max(seconds, 1e-9):.0f} examples/s) after "
+        f"{load_seconds:.1f}s loading prices"
+    )
+    print(
+        ", ".join(
+            f"{answer} {count / max(examples, 1):.1%}"
+            for answer, count in answers.items()
+        )
+    )
@@ -0,0 +1,290 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from data.cache import PriceCache
+from data.models import FinancialMetricsResponse, InsiderTradeResponse, PriceResponse
+from data.settings import DEFAULT_BASE_URL
+
+# Responses worth retrying: rate limiting and server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Longest wait before a retry, whether from Retry-After or the backoff
+MAX_RETRY_WAIT = 60.0
+
+
+def recording_key(path: str, params: dict) -> str:
+    """
+    File name under which the response to a request is recorded.
+    """
+    query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+    return hashlib.sha1(f"{path}?{query}".encode()).hexdigest() + ".json"
+
+
+class APIError(Exception):
+    """
+    A request the API answered with an error, after any retries.
+    """
+
+    def __init__(self, ticker: str, status_code: int, text: str, attempts: int = 1):
+        message = f"Error fetching data: {ticker} - {status_code} - {text}"
+        if attempts > 1:
+            message += f" (after {attempts} attempts)"
+        super().__init__(message)
+        self.ticker = ticker
+        self.status_code = status_code
+
+
+class FetchError(Exception):
+    """
+    Tickers whose prices could not be fetched, with the error of each.
+    """
+
+    def __init__(self, errors: dict[str, Exception]):
+        lines = [f"{ticker}: {error}" for ticker, error in errors.items()]
+        super().__init__(
+            f"Could not fetch prices for {', '.join(errors)}\n" + "\n".join(lines)
+        )
+        self.errors = errors
+
+
+class RateLimiter:
+    """
+    Spaces calls evenly so that at most `requests_per_second` start per second.
+    """
+
+    def __init__(self, requests_per_second: float | None = None):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class FinancialDatasetsClient:
+    """
+    Client for the financialdatasets.ai API sharing one pooled HTTP session.
+
+    At most `max_in_flight` requests are outstanding at any time and at most
+    `requests_per_second` are started per second, however many threads use
+    the client. Rate-limited (429) and server error (5xx) responses are
+    retried up to `max_retries` times, waiting as long as their Retry-After
+    header asks or else `retry_backoff` seconds, doubled on every attempt,
+    but never more than MAX_RETRY_WAIT.
+    If `record_dir` is set, every successful response is also saved there so
+    it can be served back by `data.replay`.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        api_key: str | None = None,
+        timeout: float = 30,
+        max_in_flight: int = 8,
+        requests_per_second: float | None = None,
+        record_dir: str | None = None,
+        max_retries: int = 5,
+        retry_backoff: float = 0.5,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retries = 0
+        self._retries_lock = threading.Lock()
+        self.record_dir = record_dir
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+        self.max_in_flight = max_in_flight
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if api_key := api_key or os.environ.get("FINANCIAL_DATASETS_API_KEY"):
+            self.session.headers["X-API-KEY"] = api_key
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._rate_limiter = RateLimiter(requests_per_second)
+
+    def close(self):
+        self.session.close()
+
+    def get_json(self, path: str, ticker: str, params: dict) -> dict:
+        for attempt in range(self.max_retries + 1):
+            with self._in_flight:
+                self._rate_limiter.wait()
+                response = self.session.get(
+                    f"{self.base_url}{path}", params=params, timeout=self.timeout
+                )
+            if response.status_code == 200:
+                break
+            retry = response.status_code in RETRY_STATUSES
+            if not retry or attempt == self.max_retries:
+                raise APIError(ticker, response.status_code, response.text, attempt + 1)
+            # Wait outside the in-flight slot, so other requests can use it
+            time.sleep(self.retry_delay(response, attempt))
+            with self._retries_lock:
+                self.retries += 1
+        data = response.json()
+        if self.record_dir:
+            self.record(path, params, data)
+        return data
+
+    def retry_delay(self, response: requests.Response, attempt: int) -> float:
+        # Retry-After in seconds or as an HTTP date, else exponential backoff
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                try:
+                    when = parsedate_to_datetime(retry_after)
+                    seconds = (when - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    seconds = None
+            if seconds is not None:
+                return min(max(seconds, 0.0), MAX_RETRY_WAIT)
+        return min(self.retry_backoff * 2**attempt, MAX_RETRY_WAIT)
+
+    def record(self, path: str, params: dict, data: dict):
+        file_path = os.path.join(self.record_dir, recording_key(path, params))
+        with open(file_path, "w") as f:
+            json.dump({"path": path, "params": params, "body": data}, f)
+
+    def fetch_prices(self, ticker: str, start_date: str, end_date: str) -> list[dict]:
+        """
+        Fetch daily price bars from API.
+        """
+        data = self.get_json(
+            "/prices/",
+            ticker,
+            {
+                "ticker": ticker,
+                "interval": "day",
+                "interval_multiplier": 1,
+                "start_date": start_date,
+                "end_date": end_date,
+            },
+        )
+        return data.get("prices") or []
+
+    def get_prices(
+        self,
+        ticker: str,
+        start_date: str,
+        end_date: str,
+        cache: PriceCache | None = None,
+    ) -> PriceResponse:
+        """
+        Fetch price data from cache, downloading only the missing date ranges.
+        """
+        if cache is None:
+            prices = self.fetch_prices(ticker, start_date, end_date)
+        else:
+            # If not in cache or no data in range, fetch from API
+            prices = cache.get_prices(
+                ticker,
+                "day",
+                start_date,
+                end_date,
+                fetch=lambda start, end: self.fetch_prices(ticker, start, end),
+            )
+        return PriceResponse.from_records(ticker, prices)
+
+    def get_prices_many(
+        self,
+        tickers: list[str],
+        start_date: str,
+        end_date: str,
+        cache: PriceCache | None = None,
+    ) -> dict[str, PriceResponse]:
+        """
+        Fetch price data for all tickers concurrently. Raises FetchError
+        naming every ticker that failed once all of them are done.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            futures = {
+                ticker: executor.submit(
+                    self.get_prices, ticker, start_date, end_date, cache
+                )
+                for ticker in tickers
+            }
+            wait(futures.values())
+        errors = {
+            ticker: future.exception()
+            for ticker, future in futures.items()
+            if future.exception() is not None
+        }
+        if errors:
+            raise FetchError(errors)
+        return {ticker: future.result() for ticker, future in futures.items()}
+
+    def get_financial_metrics(
+        self, ticker: str, start_date: str, end_date: str
+    ) -> FinancialMetricsResponse:
+        """
+        Fetch financial metrics data from API.
+        """
+        data = self.get_json(
+            "/financial-metrics/snapshot", ticker, {"ticker": ticker}
+        )
+        return FinancialMetricsResponse(**data)
+
+    def get_insider_trades(
+        self, ticker: str, start_date: str, end_date: str
+    ) -> InsiderTradeResponse:
+        """
+        Fetch insider trade data from API.
+        """
+        data = self.get_json(
+            "/insider-trades/",
+            ticker,
+            {
+                "ticker": ticker,
+                "filing_date_gte": start_date,
+                "filing_date_lte": end_date,
+            },
+        )
+        return InsiderTradeResponse(**data)
+
+
+_default_client = None
+
+
+def default_client() -> FinancialDatasetsClient:
+    global _default_client
+    if _default_client is None:
+        _default_client = FinancialDatasetsClient()
+    return _default_client
+
+
+def get_prices(
+    ticker: str, start_date: str, end_date: str, cache: PriceCache | None = None
+) -> PriceResponse:
+    return default_client().get_prices(ticker, start_date, end_date, cache)
+
+
+def get_financial_metrics(
+    ticker: str, start_date: str, end_date: str
+) -> FinancialMetricsResponse:
+    return default_client().get_financial_metrics(ticker, start_date, end_date)
+
+
+def get_insider_trades(
+    ticker: str, start_date: str, end_date: str
+) -> InsiderTradeResponse:
+    return default_client().get_insider_trades(ticker, start_date, end_date)
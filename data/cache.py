@@ -0,0 +1,227 @@
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    gaps_fetched: int = 0
+    bars_from_cache: int = 0
+    bars_fetched: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"price cache: {self.hits} hits, {self.misses} misses "
+            f"({self.hit_rate:.0%} hit rate), {self.gaps_fetched} gaps fetched, "
+            f"{self.bars_from_cache} bars from cache, {self.bars_fetched} bars downloaded"
+        )
+
+
+class PriceCache:
+    """
+    On-disk price store keyed by ticker, interval and date.
+
+    Besides the bars themselves, the cache remembers which date ranges have
+    already been requested from the API, so weekends, holidays and days
+    without trading are not mistaken for gaps. Only the uncovered parts of a
+    requested range are fetched and merged in.
+    """
+
+    def __init__(self, path: str = ".cache/prices.sqlite"):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS prices (
+                ticker TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                date TEXT NOT NULL,
+                time TEXT NOT NULL,
+                open REAL,
+                close REAL,
+                high REAL,
+                low REAL,
+                volume INTEGER,
+                PRIMARY KEY (ticker, interval, date)
+            );
+            CREATE TABLE IF NOT EXISTS coverage (
+                ticker TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL
+            );
+            """
+        )
+
+    def close(self):
+        self._conn.close()
+
+    def missing_ranges(
+        self, ticker: str, interval: str, start_date: str, end_date: str
+    ) -> list[tuple[str, str]]:
+        """
+        Return the (start, end) date ranges within [start_date, end_date]
+        that have not been fetched yet.
+        """
+        with self._lock:
+            covered = self._coverage(ticker, interval)
+
+        gaps = []
+        cursor = _parse(start_date)
+        end = _parse(end_date)
+        for cov_start, cov_end in covered:
+            if cov_end < cursor:
+                continue
+            if cov_start > end:
+                break
+            if cov_start > cursor:
+                gaps.append((cursor, min(cov_start - timedelta(days=1), end)))
+            cursor = max(cursor, cov_end + timedelta(days=1))
+            if cursor > end:
+                break
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return [(_format(a), _format(b)) for a, b in gaps]
+
+    def load(
+        self, ticker: str, interval: str, start_date: str, end_date: str
+    ) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT open, close, high, low, volume, time FROM prices "
+                "WHERE ticker = ? AND interval = ? AND date BETWEEN ? AND ? "
+                "ORDER BY date",
+                (ticker, interval, start_date, end_date),
+            ).fetchall()
+        return [
+            {
+                "open": o,
+                "close": c,
+                "high": h,
+                "low": l,
+                "volume": v,
+                "time": t,
+            }
+            for o, c, h, l, v, t in rows
+        ]
+
+    def store(
+        self,
+        ticker: str,
+        interval: str,
+        start_date: str,
+        end_date: str,
+        prices: list[dict],
+    ):
+        """
+        Upsert bars fetched for [start_date, end_date] and mark that range as
+        covered. Today's bar may still change, so coverage stops at yesterday.
+        """
+        rows = [
+            (
+                ticker,
+                interval,
+                p["time"][:10],
+                p["time"],
+                p["open"],
+                p["close"],
+                p["high"],
+                p["low"],
+                p["volume"],
+            )
+            for p in prices
+        ]
+        covered_end = min(_parse(end_date), date.today() - timedelta(days=1))
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO prices "
+                "(ticker, interval, date, time, open, close, high, low, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            if covered_end >= _parse(start_date):
+                covered = self._coverage(ticker, interval)
+                covered.append((_parse(start_date), covered_end))
+                self._conn.execute(
+                    "DELETE FROM coverage WHERE ticker = ? AND interval = ?",
+                    (ticker, interval),
+                )
+                self._conn.executemany(
+                    "INSERT INTO coverage (ticker, interval, start_date, end_date) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (ticker, interval, _format(a), _format(b))
+                        for a, b in _merge(covered)
+                    ],
+                )
+
+    def get_prices(
+        self,
+        ticker: str,
+        interval: str,
+        start_date: str,
+        end_date: str,
+        fetch: Callable[[str, str], list[dict]],
+    ) -> list[dict]:
+        """
+        Return bars for [start_date, end_date], calling fetch(start, end) only
+        for the date ranges that are not cached yet.
+        """
+        gaps = self.missing_ranges(ticker, interval, start_date, end_date)
+        bars_fetched = 0
+        for gap_start, gap_end in gaps:
+            fetched = fetch(gap_start, gap_end)
+            self.store(ticker, interval, gap_start, gap_end, fetched)
+            bars_fetched += len(fetched)
+
+        prices = self.load(ticker, interval, start_date, end_date)
+        with self._lock:
+            if gaps:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+            self.stats.gaps_fetched += len(gaps)
+            self.stats.bars_fetched += bars_fetched
+            self.stats.bars_from_cache += max(len(prices) - bars_fetched, 0)
+        return prices
+
+    def _coverage(self, ticker: str, interval: str) -> list[tuple[date, date]]:
+        rows = self._conn.execute(
+            "SELECT start_date, end_date FROM coverage "
+            "WHERE ticker = ? AND interval = ? ORDER BY start_date",
+            (ticker, interval),
+        ).fetchall()
+        return [(_parse(a), _parse(b)) for a, b in rows]
+
+
+def _parse(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _format(value: date) -> str:
+    return value.strftime("%Y-%m-%d")
+
+
+def _merge(ranges: list[tuple[date, date]]) -> list[tuple[date, date]]:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
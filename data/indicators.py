@@ -0,0 +1,551 @@
+import numpy as np
+
+# Indicator parameters used by add_all_ta_features, which the prompt
+# template was originally written against
+SMA_FAST, SMA_SLOW = 12, 26
+EMA_FAST, EMA_SLOW = 12, 26
+MACD_SIGNAL = 9
+ADX_WINDOW = 14
+CCI_WINDOW, CCI_CONSTANT = 20, 0.015
+DPO_WINDOW = 20
+VORTEX_WINDOW = 14
+ICHIMOKU_CONV, ICHIMOKU_BASE = 9, 26
+KST_ROC = (10, 15, 20, 30)
+KST_WINDOWS = (10, 10, 10, 15)
+KST_SIGNAL = 9
+RSI_WINDOW, RSI_LONG_WINDOW = 14, 28
+STOCH_RSI_WINDOW, STOCH_RSI_SMOOTH = 14, 3
+TSI_SLOW, TSI_FAST = 25, 13
+UO_WINDOWS, UO_WEIGHTS = (7, 14, 28), (4.0, 2.0, 1.0)
+ROC_WINDOW = 12
+KAMA_WINDOW, KAMA_FAST, KAMA_SLOW = 10, 2, 30
+BB_WINDOW, BB_DEV = 20, 2
+ATR_WINDOW = 10
+DONCHIAN_WINDOW = 20
+MFI_WINDOW = 14
+CMF_WINDOW = 20
+EOM_WINDOW = 14
+FI_WINDOW = 13
+OBV_TREND_WINDOW = 10
+RETURN_1MONTH_BARS = 21
+
+
+def compute_snapshot(
+    open: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+) -> dict:
+    """
+    Compute the latest value of every indicator referenced by the price prompt.
+
+    Values match add_all_ta_features(..., fillna=True) plus the separate
+    RSI-28 and OBV computations of the original prompt, but only the needed
+    series are computed, directly on NumPy arrays. Inputs are either 1-D
+    arrays (one ticker, returning scalars) or aligned 2-D dates x tickers
+    arrays (returning one value per ticker).
+    """
+    single = np.ndim(close) == 1
+    o, h, l, c = (_as_2d(x) for x in (open, high, low, close))
+    v = _as_2d(volume)
+    n = len(c)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        snapshot = {}
+        prev_c = _shift(c, 1)
+        # ta fills shifted closes with the mean close
+        close_mean = _mean(c)
+        prev_c_mean = _shift(c, 1, fill_value=close_mean)
+        tr = _true_range(h, l, prev_c)
+
+        # Trend
+        ema_fast = _ewm(c, 2 / (EMA_FAST + 1))
+        ema_slow = _ewm(c, 2 / (EMA_SLOW + 1))
+        macd = ema_fast - ema_slow
+        macd_signal = _ewm(macd, 2 / (MACD_SIGNAL + 1))
+        snapshot["trend_sma_fast"] = _last(_rolling_mean(c, SMA_FAST), 0)
+        snapshot["trend_sma_slow"] = _last(_rolling_mean(c, SMA_SLOW), 0)
+        snapshot["trend_ema_fast"] = _last(ema_fast, 0)
+        snapshot["trend_ema_slow"] = _last(ema_slow, 0)
+        snapshot["trend_macd"] = _last(macd, 0)
+        snapshot["trend_macd_signal"] = _last(macd_signal, 0)
+        snapshot["trend_macd_diff"] = _last(macd - macd_signal, 0)
+        (
+            snapshot["trend_adx"],
+            snapshot["trend_adx_pos"],
+            snapshot["trend_adx_neg"],
+        ) = _adx(h, l, c, ADX_WINDOW)
+
+        tp = (h + l + c) / 3.0
+        cci = (tp - _rolling_mean(tp, CCI_WINDOW)) / (
+            CCI_CONSTANT * _rolling_apply(tp, CCI_WINDOW, _mad)
+        )
+        snapshot["trend_cci"] = _last(cci, 0)
+
+        dpo = _shift(c, int(0.5 * DPO_WINDOW + 1), close_mean)
+        dpo = dpo - _rolling_mean(c, DPO_WINDOW)
+        snapshot["trend_dpo"] = _last(dpo, 0)
+
+        trn = _rolling_sum(_true_range(h, l, prev_c_mean), VORTEX_WINDOW)
+        vmp = np.abs(h - _shift(l, 1))
+        vmm = np.abs(l - _shift(h, 1))
+        snapshot["trend_vortex_ind_pos"] = _last(
+            _rolling_sum(vmp, VORTEX_WINDOW) / trn, 1
+        )
+        snapshot["trend_vortex_ind_neg"] = _last(
+            _rolling_sum(vmm, VORTEX_WINDOW) / trn, 1
+        )
+
+        snapshot["trend_ichimoku_conv"] = _last(
+            0.5 * (_rolling_max(h, ICHIMOKU_CONV) + _rolling_min(l, ICHIMOKU_CONV))
+        )
+        snapshot["trend_ichimoku_base"] = _last(
+            0.5 * (_rolling_max(h, ICHIMOKU_BASE) + _rolling_min(l, ICHIMOKU_BASE))
+        )
+
+        kst = 0.0
+        for weight, (roc, window) in enumerate(zip(KST_ROC, KST_WINDOWS), start=1):
+            shifted = _shift(c, roc, close_mean)
+            kst = kst + weight * _rolling_mean((c - shifted) / shifted, window)
+        kst = 100 * kst
+        snapshot["trend_kst"] = _last(kst, 0)
+        snapshot["trend_kst_sig"] = _last(_rolling_mean(kst, KST_SIGNAL), 0)
+
+        # Momentum
+        rsi = _fill(_rsi(c, RSI_WINDOW), 50)
+        snapshot["momentum_rsi"] = rsi[-1]
+        # RSI-28 is computed without fillna, so it is NaN on short histories
+        rsi_long = _rsi(c, RSI_LONG_WINDOW)[-1]
+        snapshot["momentum_rsi_long"] = np.where(
+            n >= RSI_LONG_WINDOW, rsi_long, np.nan
+        )
+
+        lowest = _rolling_min(rsi, STOCH_RSI_WINDOW, STOCH_RSI_WINDOW)
+        highest = _rolling_max(rsi, STOCH_RSI_WINDOW, STOCH_RSI_WINDOW)
+        stoch_rsi = (rsi - lowest) / (highest - lowest)
+        stoch_rsi_k = _rolling_mean(stoch_rsi, STOCH_RSI_SMOOTH, STOCH_RSI_SMOOTH)
+        stoch_rsi_d = _rolling_mean(stoch_rsi_k, STOCH_RSI_SMOOTH, STOCH_RSI_SMOOTH)
+        snapshot["momentum_stoch_rsi_k"] = _last(stoch_rsi_k, 0)
+        snapshot["momentum_stoch_rsi_d"] = _last(stoch_rsi_d, 0)
+
+        diff = c - prev_c
+        smoothed = _ewm(_ewm(diff, 2 / (TSI_SLOW + 1)), 2 / (TSI_FAST + 1))
+        smoothed_abs = _ewm(
+            _ewm(np.abs(diff), 2 / (TSI_SLOW + 1)), 2 / (TSI_FAST + 1)
+        )
+        snapshot["momentum_tsi"] = _last(100 * (smoothed / smoothed_abs), 0)
+
+        buying_pressure = c - np.minimum(l, prev_c)
+        uo = 0.0
+        for window, weight in zip(UO_WINDOWS, UO_WEIGHTS):
+            uo = uo + weight * (
+                _rolling_sum(buying_pressure, window) / _rolling_sum(tr, window)
+            )
+        uo = 100.0 * uo / sum(UO_WEIGHTS)
+        snapshot["momentum_uo"] = _last(uo, 50)
+
+        prev_roc = _shift(c, ROC_WINDOW)
+        snapshot["momentum_roc"] = _last((c - prev_roc) / prev_roc * 100, 0)
+        snapshot["momentum_kama"] = _kama(c, KAMA_WINDOW, KAMA_FAST, KAMA_SLOW)
+
+        # Volatility
+        bbm = _rolling_mean(c, BB_WINDOW)
+        std = _rolling_std(c, BB_WINDOW, bbm)
+        snapshot["volatility_bbm"] = _last(bbm)
+        snapshot["volatility_bbh"] = _last(bbm + BB_DEV * std)
+        snapshot["volatility_bbl"] = _last(bbm - BB_DEV * std)
+        snapshot["volatility_atr"] = _atr(tr, ATR_WINDOW)
+        snapshot["volatility_dch"] = _last(_rolling_max(h, DONCHIAN_WINDOW))
+        snapshot["volatility_dcl"] = _last(_rolling_min(l, DONCHIAN_WINDOW))
+
+        # Volume
+        up_down = np.where(tp > _shift(tp, 1), 1, np.where(tp < _shift(tp, 1), -1, 0))
+        money_flow = tp * v * up_down
+        positive = _rolling_apply(
+            np.where(money_flow >= 0.0, money_flow, 0.0), MFI_WINDOW, _pairwise_sum
+        )
+        negative = np.abs(
+            _rolling_apply(
+                np.where(money_flow < 0.0, money_flow, 0.0), MFI_WINDOW, _pairwise_sum
+            )
+        )
+        snapshot["volume_mfi"] = _last(100 - (100 / (1 + positive / negative)), 50)
+
+        mfv = ((c - l) - (h - c)) / (h - l)
+        mfv = np.where(np.isnan(mfv), 0.0, mfv) * v
+        cmf = _rolling_sum(mfv, CMF_WINDOW) / _rolling_sum(v, CMF_WINDOW)
+        snapshot["volume_cmf"] = _last(cmf, 0)
+
+        emv = (_diff(h) + _diff(l)) * (h - l) / (2 * v) * 100000000
+        snapshot["volume_em"] = _last(emv, 0)
+        snapshot["volume_fi"] = _last(_ewm(diff * v, 2 / (FI_WINDOW + 1)), 0)
+        snapshot["volume_vpt"] = _last(_nancumsum((c / prev_c - 1) * v), 0)
+
+        obv = np.cumsum(np.where(c < prev_c, -v, v), axis=0)
+        snapshot["obv"] = obv[-1]
+        snapshot["obv_ma10"] = _mean(obv[-OBV_TREND_WINDOW:])
+        snapshot["obv_slope"] = _slope(obv[-OBV_TREND_WINDOW:])
+        snapshot["price_slope"] = _slope(c[-OBV_TREND_WINDOW:])
+
+        # Key statistics
+        snapshot["prev_close"] = c[-2]
+        snapshot["open"] = o[-1]
+        snapshot["close"] = c[-1]
+        snapshot["high"] = h[-1]
+        snapshot["low"] = l[-1]
+        snapshot["volume"] = v[-1]
+        snapshot["average_volume"] = _mean(v)
+        snapshot["return_1month"] = (
+            (c[-1] / c[-RETURN_1MONTH_BARS] - 1) * 100
+            if n >= RETURN_1MONTH_BARS
+            else np.full(c.shape[1], np.nan)
+        )
+        snapshot["return_3month"] = (c[-1] / c[0] - 1) * 100
+
+    if single:
+        return {key: value[0] for key, value in snapshot.items()}
+    return snapshot
+
+
+def _as_2d(x) -> np.ndarray:
+    x = np.asarray(x)
+    if x.dtype != np.int64:
+        x = x.astype(np.float64, copy=False)
+    return x.reshape(len(x), -1)
+
+
+def _rows(x: np.ndarray) -> list:
+    """
+    Rows of a dates x tickers array for the recursive kernels: plain floats
+    for a single ticker, which is much faster than 1-element arrays.
+    """
+    return x[:, 0].tolist() if x.shape[1] == 1 else list(x)
+
+
+def _from_rows(rows: list, shape: tuple) -> np.ndarray:
+    return np.array(rows, dtype=np.float64).reshape((len(rows),) + shape[1:])
+
+
+def _sum(x: np.ndarray) -> np.ndarray:
+    # Per-column sum in NumPy's pairwise 1-D order, the same as pandas'
+    # Series.sum, so a ticker gets the same values alone or in a panel
+    if x.shape[1] == 1:
+        return np.array([x[:, 0].sum(dtype=np.float64)])
+    return np.asarray(_pairwise_sum(list(x)), dtype=np.float64)
+
+
+def _mean(x: np.ndarray) -> np.ndarray:
+    return _sum(x) / len(x)
+
+
+def _shift(x: np.ndarray, periods: int, fill_value=np.nan) -> np.ndarray:
+    out = np.empty(x.shape, dtype=np.float64)
+    out[:periods] = fill_value
+    out[periods:] = x[:-periods]
+    return out
+
+
+def _diff(x: np.ndarray) -> np.ndarray:
+    return x - _shift(x, 1)
+
+
+def _nancumsum(x: np.ndarray) -> np.ndarray:
+    # Like pandas cumsum: NaN stays NaN, later sums skip it
+    out = np.nancumsum(x, axis=0)
+    out[np.isnan(x)] = np.nan
+    return out
+
+
+def _true_range(high, low, prev_close) -> np.ndarray:
+    return np.fmax(
+        np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close)
+    )
+
+
+def _lags(x: np.ndarray, window: int):
+    """
+    Yield (lag, values) pairs where values[t] = x[t - lag] for t >= lag.
+    """
+    for lag in range(min(window, len(x))):
+        yield lag, x[: len(x) - lag]
+
+
+def _rolling_count(x: np.ndarray, window: int) -> np.ndarray:
+    count = np.zeros(x.shape, dtype=np.int64)
+    valid = ~np.isnan(x)
+    for lag, values in _lags(valid, window):
+        count[lag:] += values
+    return count
+
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    total, count, flat = _running_sum(x, window)
+    return np.where(flat, x * count, np.where(count > 0, total, 0.0))
+
+
+def _rolling_mean(x: np.ndarray, window: int, min_periods: int = 0) -> np.ndarray:
+    """
+    Rolling mean over partial windows, NaN below min_periods observations.
+    """
+    total, count, flat = _running_sum(x, window)
+    mean = np.where(flat, x, total / count)
+    return np.where(count >= max(min_periods, 1), mean, np.nan)
+
+
+def _running_sum(x: np.ndarray, window: int) -> tuple:
+    """
+    Window sums with pandas' running sum, compensated as values enter and
+    leave the window, plus the observation count and whether all observations
+    in the window are equal (pandas then returns the value itself).
+
+    Means and ratios of decimal prices often land exactly on a rounding tie
+    of the prompt's formatting, so the sums follow pandas' arithmetic step by
+    step rather than summing each window afresh. NaNs are skipped.
+    """
+    rows = _rows(x)
+    sums = []
+    if x.shape[1] == 1:
+        total = compensation_add = compensation_remove = 0.0
+        for i, value in enumerate(rows):
+            if i >= window and (old := rows[i - window]) == old:
+                y = -old - compensation_remove
+                t = total + y
+                compensation_remove = t - total - y
+                total = t
+            if value == value:
+                y = value - compensation_add
+                t = total + y
+                compensation_add = t - total - y
+                total = t
+            sums.append(total)
+    else:
+        total = compensation_add = compensation_remove = np.zeros(x.shape[1])
+        for i, value in enumerate(rows):
+            if i >= window:
+                old = rows[i - window]
+                y = -old - compensation_remove
+                t = total + y
+                compensation_remove = np.where(
+                    old == old, t - total - y, compensation_remove
+                )
+                total = np.where(old == old, t, total)
+            y = value - compensation_add
+            t = total + y
+            compensation_add = np.where(value == value, t - total - y, compensation_add)
+            total = np.where(value == value, t, total)
+            sums.append(total)
+
+    count = _rolling_count(x, window)
+    flat = (_rolling_max(x, window) == _rolling_min(x, window)) & ~np.isnan(x)
+    return _from_rows(sums, x.shape), count, flat
+
+
+def _rolling_std(x: np.ndarray, window: int, mean: np.ndarray) -> np.ndarray:
+    squares = np.zeros(x.shape)
+    for lag, lagged in _lags(x, window):
+        squares[lag:] += (lagged - mean[lag:]) ** 2
+    return np.sqrt(squares / _rolling_count(x, window))
+
+
+def _rolling_apply(x: np.ndarray, window: int, function) -> np.ndarray:
+    """
+    Apply function to the list of rows in each partial window, like ta's
+    rolling(window, min_periods=0).apply(function, raw=True).
+    """
+    out = np.empty(x.shape)
+    for t in range(min(window - 1, len(x))):
+        out[t] = function([x[k] for k in range(t + 1)])
+    if len(x) >= window:
+        out[window - 1 :] = function(
+            [x[k : len(x) - window + 1 + k] for k in range(window)]
+        )
+    return out
+
+
+def _mad(values: list) -> np.ndarray:
+    mean = _pairwise_sum(values) / len(values)
+    return _pairwise_sum([np.abs(value - mean) for value in values]) / len(values)
+
+
+def _pairwise_sum(values: list):
+    """
+    Sum equally shaped arrays in the order NumPy sums a 1-D array (eight
+    interleaved partial sums, halved recursively above 128 values), so sums
+    match np.sum exactly.
+    """
+    if len(values) > 128:
+        half = len(values) // 2
+        half -= half % 8
+        return _pairwise_sum(values[:half]) + _pairwise_sum(values[half:])
+    if len(values) < 8:
+        total = -0.0
+        for value in values:
+            total = total + value
+        return total
+    partial = list(values[:8])
+    end = len(values) - len(values) % 8
+    for i in range(8, end, 8):
+        for j in range(8):
+            partial[j] = partial[j] + values[i + j]
+    total = ((partial[0] + partial[1]) + (partial[2] + partial[3])) + (
+        (partial[4] + partial[5]) + (partial[6] + partial[7])
+    )
+    for value in values[end:]:
+        total = total + value
+    return total
+
+
+def _rolling_max(x: np.ndarray, window: int, min_periods: int = 0) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    for lag, lagged in _lags(x, window):
+        np.fmax(out[lag:], lagged, out=out[lag:])
+    if min_periods:
+        out[_rolling_count(x, window) < min_periods] = np.nan
+    return out
+
+
+def _rolling_min(x: np.ndarray, window: int, min_periods: int = 0) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    for lag, lagged in _lags(x, window):
+        np.fmin(out[lag:], lagged, out=out[lag:])
+    if min_periods:
+        out[_rolling_count(x, window) < min_periods] = np.nan
+    return out
+
+
+def _ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    pandas' ewm(alpha=alpha, adjust=False).mean() arithmetic, for series
+    whose only NaNs are leading ones.
+    """
+    factor = 1.0 - alpha
+    denominator = factor + alpha
+    out = np.full(x.shape, np.nan)
+    start = int(np.argmax(~np.isnan(x).all(axis=1)))
+    rows = _rows(x[start:])
+    weighted = rows[0]
+    result = [weighted]
+    if x.shape[1] == 1:
+        for current in rows[1:]:
+            if weighted != current:
+                weighted = (factor * weighted + alpha * current) / denominator
+            result.append(weighted)
+    else:
+        for current in rows[1:]:
+            weighted = np.where(
+                weighted != current,
+                (factor * weighted + alpha * current) / denominator,
+                weighted,
+            )
+            result.append(weighted)
+    out[start:] = _from_rows(result, x.shape)
+    return out
+
+
+def _rsi(close: np.ndarray, window: int) -> np.ndarray:
+    diff = _diff(close)
+    up = np.where(diff > 0, diff, 0.0)
+    down = -np.where(diff < 0, diff, 0.0)
+    up_mean = _ewm(up, 1 / window)
+    down_mean = _ewm(down, 1 / window)
+    return np.where(down_mean == 0, 100, 100 - (100 / (1 + up_mean / down_mean)))
+
+
+def _atr(true_range: np.ndarray, window: int) -> np.ndarray:
+    atr = _mean(true_range[:window])
+    atr = atr[0] if true_range.shape[1] == 1 else atr
+    for value in _rows(true_range[window:]):
+        atr = (atr * (window - 1) + value) / float(window)
+    return _last(np.reshape(atr, (1, -1)), 0)
+
+
+def _adx(high, low, close, window: int):
+    n = len(close)
+    shape = close.shape
+    prev_close = _shift(close, 1)
+    # np.amax/np.amin in ta propagate the NaN of the first bar
+    directional = np.maximum(high, prev_close) - np.minimum(low, prev_close)
+    diff_up = _diff(high)
+    diff_down = -_diff(low)
+    pos = np.abs(((diff_up > diff_down) & (diff_up > 0)) * diff_up)
+    neg = np.abs(((diff_down > diff_up) & (diff_down > 0)) * diff_down)
+
+    # Wilder sums seeded with bars [1, window]. ta never fills in the last
+    # smoothed value and leaves it at 0, which it treats as "no data".
+    length = n - (window - 1)
+    smoothed = []
+    for series in (directional, pos, neg):
+        values = _rows(series[window + 1 : n])
+        total = _sum(series[1 : window + 1])
+        total = total[0] if shape[1] == 1 else total
+        sums = [total]
+        for value in values:
+            total = total - (total / float(window)) + value
+            sums.append(total)
+        sums.append(0.0 * total)
+        smoothed.append(_from_rows(sums, shape))
+    trs, dip, din = smoothed
+
+    dip_pct = np.where(trs != 0, 100 * (dip / np.where(trs != 0, trs, 1)), 0.0)
+    din_pct = np.where(trs != 0, 100 * (din / np.where(trs != 0, trs, 1)), 0.0)
+    total = dip_pct + din_pct
+    dx = np.where(
+        total != 0, 100 * np.abs((dip_pct - din_pct) / np.where(total != 0, total, 1)), 0.0
+    )
+
+    adx = _mean(dx[0:window])
+    adx = adx[0] if shape[1] == 1 else adx
+    for value in _rows(dx[window : length - 1]):
+        adx = ((adx * (window - 1)) + value) / float(window)
+
+    return (
+        _last(np.reshape(adx, (1, -1)), 20),
+        _last(dip_pct[length - 2 : length - 1], 20),
+        _last(din_pct[length - 2 : length - 1], 20),
+    )
+
+
+def _kama(close: np.ndarray, window: int, pow1: int, pow2: int) -> np.ndarray:
+    # np.roll wraps around, as in ta
+    volatility = np.abs(close - np.roll(close, 1, axis=0))
+    change = np.abs(close - np.roll(close, window, axis=0))
+    noise = _rolling_sum(volatility, window)
+    efficiency = np.divide(change, noise, out=np.zeros_like(change), where=noise != 0)
+    fast, slow = 2.0 / (pow1 + 1), 2.0 / (pow2 + 1.0)
+    smoothing = (efficiency * (fast - slow) + slow) ** 2.0
+
+    closes = _rows(close)
+    kama = closes[0]
+    for price, constant in zip(closes[1:], _rows(smoothing[1:])):
+        kama = kama + constant * (price - kama)
+    return _last(np.reshape(kama, (1, -1)), close[-1])
+
+
+def _slope(y: np.ndarray) -> np.ndarray:
+    # Least-squares slope against 0..len(y)-1, as np.polyfit(..., 1)[0]
+    x = np.arange(len(y)) - (len(y) - 1) / 2
+    return _sum(x[:, np.newaxis] * (y - _mean(y))) / (x @ x)
+
+
+def _fill(x: np.ndarray, value) -> np.ndarray:
+    """
+    Replace inf/NaN by the previous valid value, or `value` before the first.
+    """
+    x = np.where(np.isfinite(x), x, np.nan)
+    valid = ~np.isnan(x)
+    index = np.where(valid, np.arange(len(x))[:, np.newaxis], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = np.take_along_axis(x, index, axis=0)
+    return np.where(np.isnan(filled), value, filled)
+
+
+def _last(x: np.ndarray, value=np.nan) -> np.ndarray:
+    """
+    Last valid value per column, like ta's fillna on the last row.
+    """
+    finite = np.isfinite(x)
+    has_valid = finite.any(axis=0)
+    last_index = len(x) - 1 - np.argmax(finite[::-1], axis=0)
+    last = np.take_along_axis(x, last_index[np.newaxis], axis=0)[0]
+    return np.where(has_valid, last, value)
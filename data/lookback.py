@@ -0,0 +1,100 @@
+"""
+Size the price window to what the prompt's indicators actually need.
+
+Each value in the price prompt is listed with the number of trading bars it
+needs before ta would report it without fillna, derived from the indicator
+parameters in data.indicators. The fetch window is the largest of these,
+converted to calendar dates with the NYSE holiday calendar.
+"""
+
+from datetime import datetime
+
+from data.indicators import (
+    ADX_WINDOW,
+    ATR_WINDOW,
+    BB_WINDOW,
+    CCI_WINDOW,
+    CMF_WINDOW,
+    DONCHIAN_WINDOW,
+    DPO_WINDOW,
+    EMA_FAST,
+    EMA_SLOW,
+    FI_WINDOW,
+    ICHIMOKU_BASE,
+    ICHIMOKU_CONV,
+    KAMA_WINDOW,
+    KST_ROC,
+    KST_SIGNAL,
+    KST_WINDOWS,
+    MACD_SIGNAL,
+    MFI_WINDOW,
+    OBV_TREND_WINDOW,
+    RETURN_1MONTH_BARS,
+    ROC_WINDOW,
+    RSI_LONG_WINDOW,
+    RSI_WINDOW,
+    SMA_FAST,
+    SMA_SLOW,
+    STOCH_RSI_SMOOTH,
+    STOCH_RSI_WINDOW,
+    TSI_FAST,
+    TSI_SLOW,
+    UO_WINDOWS,
+    VORTEX_WINDOW,
+)
+from data.trading_calendar import first_of_last_sessions
+
+# The "3M" statistics (return and average volume) span the whole window
+RETURN_3MONTH_BARS = 63
+
+# Bars needed per prompt value. Indicators on price changes need one extra
+# bar for the previous close; chained windows add up, less the shared bar.
+INDICATOR_BARS = {
+    "sma": max(SMA_FAST, SMA_SLOW),
+    "ema": max(EMA_FAST, EMA_SLOW),
+    "macd": EMA_SLOW + MACD_SIGNAL - 1,
+    "adx": 2 * ADX_WINDOW,
+    "cci": CCI_WINDOW,
+    "dpo": max(DPO_WINDOW, int(0.5 * DPO_WINDOW + 1) + 1),
+    "vortex": VORTEX_WINDOW + 1,
+    "ichimoku": max(ICHIMOKU_CONV, ICHIMOKU_BASE),
+    "kst": max(r + w for r, w in zip(KST_ROC, KST_WINDOWS)) + KST_SIGNAL - 1,
+    "rsi": max(RSI_WINDOW, RSI_LONG_WINDOW) + 1,
+    "stoch_rsi": RSI_WINDOW + STOCH_RSI_WINDOW + 2 * (STOCH_RSI_SMOOTH - 1),
+    "tsi": TSI_SLOW + TSI_FAST,
+    "uo": max(UO_WINDOWS) + 1,
+    "roc": ROC_WINDOW + 1,
+    "kama": KAMA_WINDOW + 1,
+    "bollinger": BB_WINDOW,
+    "atr": ATR_WINDOW + 1,
+    "donchian": DONCHIAN_WINDOW,
+    "mfi": MFI_WINDOW + 1,
+    "cmf": CMF_WINDOW,
+    "eom": 2,
+    "force_index": FI_WINDOW + 1,
+    "vpt": 2,
+    "obv_trend": OBV_TREND_WINDOW,
+    "return_1month": RETURN_1MONTH_BARS,
+    "return_3month": RETURN_3MONTH_BARS,
+}
+
+
+def required_bars(indicators: list[str] | None = None) -> int:
+    """
+    Number of trading bars needed for the given indicators (default: all).
+    """
+    names = indicators or list(INDICATOR_BARS)
+    unknown = [name for name in names if name not in INDICATOR_BARS]
+    if unknown:
+        raise ValueError(f"Unknown indicators: {', '.join(unknown)}")
+    return max(INDICATOR_BARS[name] for name in names)
+
+
+def plan_start_date(end_date: str, bars: int | None = None) -> str:
+    """
+    Start date of the shortest window ending at end_date that holds `bars`
+    trading days (default: required_bars()).
+    """
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    start = first_of_last_sessions(end, bars or required_bars())
+    return start.strftime("%Y-%m-%d")
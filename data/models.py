@@ -1,12 +1,21 @@
-from pydantic import BaseModel
-import pandas as pd
+from pydantic import BaseModel, PrivateAttr
+import hashlib
+import json
+import re
+from typing import TYPE_CHECKING
 import numpy as np
-from ta.momentum import RSIIndicator
-from ta.volume import OnBalanceVolumeIndicator
-from ta import add_all_ta_features
-import warnings
+from data.indicators import compute_snapshot
+from data.prompt_cache import PromptCache
+from data.settings import PROMPT_FORMATS
 
-warnings.filterwarnings("ignore", category=FutureWarning)
+if TYPE_CHECKING:
+    import pandas as pd
+
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}([T ]|$)")
+
+# Part of every prompt cache key. Bump when a prompt template below or the
+# indicator computation in data.indicators changes its output.
+PROMPT_TEMPLATE_VERSION = 1
 
 
 class Price(BaseModel):
@@ -18,46 +27,220 @@ class Price(BaseModel):
     time: str
 
 
+PRICE_COLUMNS = ("open", "close", "high", "low", "volume")
+
+
 class PriceResponse(BaseModel):
+    """
+    Price bars for one ticker.
+
+    Responses built with `from_json`/`from_records` skip the per-bar `Price`
+    objects and keep the bars as NumPy columns instead; for those `prices`
+    is empty and the bars are available through `columns` and `to_frame()`.
+    """
+
     ticker: str
-    prices: list[Price]
-
-    def create_prompt(self) -> str:
-        def format_volume(volume):
-            sign = 1 if volume > 0 else -1
-            volume = abs(volume)
-            if volume >= 1_000_000_000:
-                return f"{sign * volume // 1_000_000_000}B"
-            if volume >= 1_000_000:
-                return f"{sign * volume // 1_000_000}M"
-            elif volume >= 1_000:
-                return f"{sign * volume // 1_000}K"
-            else:
-                return str(sign * volume)
-
-        prices_df = pd.DataFrame([p.model_dump() for p in self.prices])
-        prices_df["date"] = pd.to_datetime(prices_df["time"])
-        prices_df.set_index("date", inplace=True)
-        numeric_cols = ["open", "close", "high", "low", "volume"]
-        for col in numeric_cols:
-            prices_df[col] = pd.to_numeric(prices_df[col], errors="coerce")
-        prices_df.sort_index(inplace=True)
-
-        df_ta = add_all_ta_features(
-            prices_df.copy(),
-            open="open",
-            high="high",
-            low="low",
-            close="close",
-            volume="volume",
-            fillna=True,
+    prices: list[Price] = []
+    _columns: dict[str, np.ndarray] | None = PrivateAttr(default=None)
+
+    @classmethod
+    def from_json(cls, payload: str | bytes) -> "PriceResponse":
+        data = json.loads(payload)
+        return cls.from_records(data["ticker"], data.get("prices") or [])
+
+    @classmethod
+    def from_records(cls, ticker: str, records: list[dict]) -> "PriceResponse":
+        """
+        Decode bars straight into NumPy columns, validating column-wise.
+        """
+        n = len(records)
+        columns = {}
+        try:
+            for col in PRICE_COLUMNS:
+                columns[col] = np.fromiter(
+                    (r[col] for r in records), dtype=np.float64, count=n
+                )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid price data for {ticker}: {col}: {e}")
+
+        volume = columns["volume"]
+        if not np.all(np.isfinite(volume) & (volume == np.floor(volume))):
+            raise ValueError(f"Invalid price data for {ticker}: volume must be integral")
+        columns["volume"] = volume.astype(np.int64)
+        for col in PRICE_COLUMNS[:4]:
+            if not np.all(np.isfinite(columns[col])):
+                raise ValueError(f"Invalid price data for {ticker}: {col} must be finite")
+
+        time = np.array([r["time"] for r in records], dtype=object)
+        if not all(isinstance(t, str) for t in time):
+            raise ValueError(f"Invalid price data for {ticker}: time must be a string")
+        columns["time"] = time
+        return cls.from_columns(ticker, columns)
+
+    @classmethod
+    def from_columns(cls, ticker: str, columns: dict[str, np.ndarray]) -> "PriceResponse":
+        time = columns["time"]
+        if len(time) > 1 and not np.all(time[:-1] <= time[1:]):
+            order = np.argsort(time, kind="stable")
+            columns = {col: values[order] for col, values in columns.items()}
+        response = cls.model_construct(ticker=ticker, prices=[])
+        response._columns = columns
+        return response
+
+    @property
+    def columns(self) -> dict[str, np.ndarray]:
+        """
+        Bars as NumPy arrays keyed by column name, sorted by time.
+        """
+        if self._columns is None:
+            records = [p.model_dump() for p in self.prices]
+            columns = {
+                col: np.array(
+                    [r[col] for r in records],
+                    dtype=np.int64 if col == "volume" else np.float64,
+                )
+                for col in PRICE_COLUMNS
+            }
+            columns["time"] = np.array([r["time"] for r in records], dtype=object)
+            self._columns = PriceResponse.from_columns(self.ticker, columns)._columns
+        return self._columns
+
+    def to_frame(self) -> "pd.DataFrame":
+        """
+        Bars as a DataFrame indexed by date. The frame shares memory with
+        `columns` instead of copying it.
+        """
+        # Imported here: prompts are rendered from `columns` and never need
+        # pandas, which takes longer to import than everything else
+        import pandas as pd
+
+        columns = self.columns
+        index = pd.DatetimeIndex(pd.to_datetime(columns["time"]), name="date")
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def prompt_key(self, prompt_format: str = "verbose") -> str:
+        columns = self.columns
+        parts = [np.ascontiguousarray(columns[col]).tobytes() for col in PRICE_COLUMNS]
+        parts.append("\n".join(columns["time"]).encode())
+        kind = "price" if prompt_format == "verbose" else f"price-{prompt_format}"
+        return _prompt_key(kind, *parts)
+
+    def create_prompt(
+        self, cache: PromptCache | None = None, prompt_format: str = "verbose"
+    ) -> str:
+        render = _price_renderer(prompt_format)
+        if cache is not None:
+            return cache.get_or_render(
+                self.prompt_key(prompt_format),
+                lambda: self.create_prompt(prompt_format=prompt_format),
+            )
+        columns = self.columns
+        latest = compute_snapshot(
+            open=columns["open"],
+            high=columns["high"],
+            low=columns["low"],
+            close=columns["close"],
+            volume=columns["volume"],
         )
+        return render(format_date(columns["time"][-1]), latest)
+
+
+def create_price_prompts(
+    responses: dict[str, PriceResponse],
+    cache: PromptCache | None = None,
+    prompt_format: str = "verbose",
+) -> dict[str, str]:
+    """
+    Render the price prompt of many tickers at once.
+
+    Tickers with the same bar dates are stacked into dates x tickers arrays
+    and their indicators computed together in one compute_snapshot() call;
+    each prompt is identical to PriceResponse.create_prompt(). With a cache,
+    only the tickers whose bars are not cached yet are computed.
+    """
+    render = _price_renderer(prompt_format)
+    prompts = {}
+    keys = {}
+    if cache is not None:
+        for ticker, response in responses.items():
+            keys[ticker] = response.prompt_key(prompt_format)
+            prompt = cache.get(keys[ticker])
+            if prompt is not None:
+                prompts[ticker] = prompt
+
+    columns = {
+        ticker: response.columns
+        for ticker, response in responses.items()
+        if ticker not in prompts
+    }
+    groups = {}
+    for ticker, ticker_columns in columns.items():
+        groups.setdefault(tuple(ticker_columns["time"]), []).append(ticker)
+
+    for times, tickers in groups.items():
+        panel = compute_snapshot(
+            **{
+                col: np.column_stack([columns[t][col] for t in tickers])
+                for col in PRICE_COLUMNS
+            }
+        )
+        date = format_date(times[-1])
+        for i, ticker in enumerate(tickers):
+            latest = {key: values[i] for key, values in panel.items()}
+            prompts[ticker] = render(date, latest)
+
+    if cache is not None and columns:
+        cache.put_many({keys[ticker]: prompts[ticker] for ticker in columns})
+    return prompts
+
+
+def _price_renderer(prompt_format: str):
+    if prompt_format not in PROMPT_FORMATS:
+        raise ValueError(
+            f"Unknown prompt format {prompt_format}, expected one of {PROMPT_FORMATS}"
+        )
+    if prompt_format == "compact":
+        return render_compact_price_prompt
+    return render_price_prompt
+
+
+def _prompt_key(kind: str, *parts: bytes) -> str:
+    digest = hashlib.sha256(f"{kind}:{PROMPT_TEMPLATE_VERSION}".encode())
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
 
-        latest = df_ta.iloc[-1]
-        close_price = latest["close"]
 
-        # ========== TREND INDICATORS ==========
-        trend = f"""Trend Indicators
+def format_volume(volume):
+    sign = 1 if volume > 0 else -1
+    volume = abs(volume)
+    if volume >= 1_000_000_000:
+        return f"{sign * volume // 1_000_000_000}B"
+    if volume >= 1_000_000:
+        return f"{sign * volume // 1_000_000}M"
+    elif volume >= 1_000:
+        return f"{sign * volume // 1_000}K"
+    else:
+        return str(sign * volume)
+
+
+def format_date(time: str) -> str:
+    if ISO_DATE.match(time):
+        return time[:10]
+    import pandas as pd
+
+    return pd.to_datetime(time).strftime("%Y-%m-%d")
+
+
+def render_price_prompt(date: str, latest: dict) -> str:
+    """
+    Render the price section of the prompt from a compute_snapshot() result.
+    """
+    close_price = latest["close"]
+
+    # ========== TREND INDICATORS ==========
+    trend = f"""Trend Indicators
 - SMA (20-day): {latest['trend_sma_fast']:.2f}
 - SMA (50-day): {latest['trend_sma_slow']:.2f}
 - EMA (20-day): {latest['trend_ema_fast']:.2f}
@@ -78,11 +261,10 @@ class PriceResponse(BaseModel):
   - Signal: {latest['trend_kst_sig']:.2f}
 """
 
-        # ========== MOMENTUM INDICATORS ==========
-        rsi_28 = RSIIndicator(close=prices_df["close"], window=28)
-        momentum = f"""Momentum Indicators
+    # ========== MOMENTUM INDICATORS ==========
+    momentum = f"""Momentum Indicators
 - RSI (14-day): {latest['momentum_rsi']:.1f}
-- RSI (28-day): {round(rsi_28.rsi().iloc[-1], 1)}
+- RSI (28-day): {round(latest['momentum_rsi_long'], 1)}
 - Stoch RSI:
   - Fast K: {latest['momentum_stoch_rsi_k']:.2f}
   - Fast D: {latest['momentum_stoch_rsi_d']:.2f}
@@ -92,13 +274,13 @@ class PriceResponse(BaseModel):
 - KAMA (Kaufman's Adaptive Moving Average): {latest['momentum_kama']:.1f}
 """
 
-        # ========== VOLATILITY INDICATORS ==========
-        bb_upper = latest["volatility_bbm"] + latest["volatility_bbh"]
-        bb_lower = latest["volatility_bbm"] - latest["volatility_bbl"]
-        bb_position = (close_price - bb_lower) / (bb_upper - bb_lower)
-        bb_position = np.clip(bb_position, 0, 1)
+    # ========== VOLATILITY INDICATORS ==========
+    bb_upper = latest["volatility_bbm"] + latest["volatility_bbh"]
+    bb_lower = latest["volatility_bbm"] - latest["volatility_bbl"]
+    bb_position = (close_price - bb_lower) / (bb_upper - bb_lower)
+    bb_position = np.clip(bb_position, 0, 1)
 
-        volatility = f"""Volatility Indicators
+    volatility = f"""Volatility Indicators
 - Bollinger Bands:
   - Middle: {latest['volatility_bbm']:.1f}
   - Upper: {bb_upper:.1f}
@@ -110,50 +292,34 @@ class PriceResponse(BaseModel):
   - Lower Band: {latest['volatility_dch'] - latest['volatility_dcl']:.1f}
 """
 
-        # ========== VOLUME INDICATORS ==========
-        obv = OnBalanceVolumeIndicator(
-            close=prices_df["close"], volume=prices_df["volume"]
-        ).on_balance_volume()
-        obv_now = obv.iloc[-1]
-        obv_ma10 = obv.rolling(10).mean().iloc[-1]
-        obv_slope = np.polyfit(range(10), obv[-10:], 1)[0]
-        price_slope = np.polyfit(range(10), prices_df["close"].iloc[-10:], 1)[0]
-        obv_trend = "rising" if obv_slope > 0 else "falling"
-        price_trend = "rising" if price_slope > 0 else "falling"
-
-        volume = f"""Volume Indicators
+    # ========== VOLUME INDICATORS ==========
+    obv_now = int(latest["obv"])
+    obv_trend = "rising" if latest["obv_slope"] > 0 else "falling"
+    price_trend = "rising" if latest["price_slope"] > 0 else "falling"
+
+    volume = f"""Volume Indicators
 - MFI (Money Flow Index): {latest['volume_mfi']:.1f}
 - On-Balance Volume: {format_volume(obv_now)}
   - 10-day Trend: OBV is {obv_trend}, while price is {price_trend}.
-  - OBV vs 10-day MA: {'above' if obv_now > obv_ma10 else 'below'}
+  - OBV vs 10-day MA: {'above' if obv_now > latest['obv_ma10'] else 'below'}
 - Chaikin Money Flow (CMF): {latest['volume_cmf']:.2f}
 - Ease of Movement (EoM): {latest['volume_em']:.1f}
 - Force Index: {format_volume(latest['volume_fi'])}
 - Volume Price Trend (VPT): {format_volume(latest['volume_vpt'])}
 """
 
-        # Returns
-        return_1month = (
-            (prices_df["close"].iloc[-1] / prices_df["close"].iloc[-21] - 1) * 100
-            if len(prices_df) >= 21
-            else np.nan
-        )
-        return_3month = (
-            prices_df["close"].iloc[-1] / prices_df["close"].iloc[0] - 1
-        ) * 100
-
-        return f"""
+    return f"""
 ### Key Statistics
-Date: {pd.to_datetime(prices_df.iloc[-1]["time"]).strftime("%Y-%m-%d")}
-Previous Close: {prices_df.iloc[-2]['close']}
-Open: {prices_df.iloc[-1]['open']}
-Close: {prices_df.iloc[-1]['close']}
-High: {prices_df.iloc[-1]['high']}
-Low: {prices_df.iloc[-1]['low']}
-Volume: {format_volume(prices_df.iloc[-1]['volume'])}
-Average Volume (3M): {format_volume(prices_df["volume"].mean())}
-1-month return: {return_1month:.2f}%
-3-month return: {return_3month:.2f}%
+Date: {date}
+Previous Close: {latest['prev_close']}
+Open: {latest['open']}
+Close: {latest['close']}
+High: {latest['high']}
+Low: {latest['low']}
+Volume: {format_volume(int(latest['volume']))}
+Average Volume (3M): {format_volume(latest['average_volume'])}
+1-month return: {latest['return_1month']:.2f}%
+3-month return: {latest['return_3month']:.2f}%
 
 ### Technical Indicators
 {trend}
@@ -163,6 +329,54 @@ Average Volume (3M): {format_volume(prices_df["volume"].mean())}
 """
 
 
+def render_compact_price_prompt(date: str, latest: dict) -> str:
+    """
+    The price section of render_price_prompt() as one key=value line per
+    indicator group, with the same values at the same precision.
+    """
+    close_price = latest["close"]
+    bb_upper = latest["volatility_bbm"] + latest["volatility_bbh"]
+    bb_lower = latest["volatility_bbm"] - latest["volatility_bbl"]
+    bb_position = np.clip((close_price - bb_lower) / (bb_upper - bb_lower), 0, 1)
+    obv_now = int(latest["obv"])
+    obv_trend = "rising" if latest["obv_slope"] > 0 else "falling"
+    price_trend = "rising" if latest["price_slope"] > 0 else "falling"
+    obv_ma = "above" if obv_now > latest["obv_ma10"] else "below"
+
+    return (
+        f"Date={date} PrevClose={latest['prev_close']} Open={latest['open']} "
+        f"Close={close_price} High={latest['high']} Low={latest['low']} "
+        f"Vol={format_volume(int(latest['volume']))} "
+        f"AvgVol3M={format_volume(latest['average_volume'])} "
+        f"Ret1M={latest['return_1month']:.2f}% Ret3M={latest['return_3month']:.2f}%\n"
+        f"Trend: SMA20={latest['trend_sma_fast']:.2f} SMA50={latest['trend_sma_slow']:.2f} "
+        f"EMA20={latest['trend_ema_fast']:.2f} EMA50={latest['trend_ema_slow']:.2f} "
+        f"MACD={latest['trend_macd']:.2f},sig={latest['trend_macd_signal']:.2f},"
+        f"diff={latest['trend_macd_diff']:.2f} "
+        f"ADX={latest['trend_adx']:.2f},+DI={latest['trend_adx_pos']:.2f},"
+        f"-DI={latest['trend_adx_neg']:.2f} "
+        f"CCI={latest['trend_cci']:.2f} DPO={latest['trend_dpo']:.2f} "
+        f"VI+={latest['trend_vortex_ind_pos']:.2f} VI-={latest['trend_vortex_ind_neg']:.2f} "
+        f"Ichimoku=conv:{latest['trend_ichimoku_conv']:.2f},"
+        f"base:{latest['trend_ichimoku_base']:.2f} "
+        f"KST={latest['trend_kst']:.2f},sig={latest['trend_kst_sig']:.2f}\n"
+        f"Momentum: RSI14={latest['momentum_rsi']:.1f} "
+        f"RSI28={round(latest['momentum_rsi_long'], 1)} "
+        f"StochRSI=K:{latest['momentum_stoch_rsi_k']:.2f},"
+        f"D:{latest['momentum_stoch_rsi_d']:.2f} "
+        f"TSI={latest['momentum_tsi']:.1f} UO={latest['momentum_uo']:.1f} "
+        f"ROC={latest['momentum_roc']:.1f} KAMA={latest['momentum_kama']:.1f}\n"
+        f"Volatility: BB=mid:{latest['volatility_bbm']:.1f},up:{bb_upper:.1f},"
+        f"low:{bb_lower:.1f},pos:{bb_position:.2f} ATR={latest['volatility_atr']:.1f} "
+        f"Donchian=up:{latest['volatility_dch'] + latest['volatility_dcl']:.1f},"
+        f"low:{latest['volatility_dch'] - latest['volatility_dcl']:.1f}\n"
+        f"Volume: MFI={latest['volume_mfi']:.1f} OBV={format_volume(obv_now)} "
+        f"(10d {obv_trend}, price {price_trend}, {obv_ma} MA10) "
+        f"CMF={latest['volume_cmf']:.2f} EoM={latest['volume_em']:.1f} "
+        f"FI={format_volume(latest['volume_fi'])} VPT={format_volume(latest['volume_vpt'])}\n"
+    )
+
+
 class FinancialMetrics(BaseModel):
     ticker: str
     market_cap: float | None
@@ -209,7 +423,12 @@ class FinancialMetrics(BaseModel):
 class FinancialMetricsResponse(BaseModel):
     snapshot: FinancialMetrics
 
-    def create_prompt(self) -> str:
+    def prompt_key(self) -> str:
+        return _prompt_key("financial_metrics", self.model_dump_json().encode())
+
+    def create_prompt(self, cache: PromptCache | None = None) -> str:
+        if cache is not None:
+            return cache.get_or_render(self.prompt_key(), self.create_prompt)
         if not self.snapshot:
             return "No financial reports available."
 
@@ -311,7 +530,12 @@ class InsiderTrade(BaseModel):
 class InsiderTradeResponse(BaseModel):
     insider_trades: list[InsiderTrade]
 
-    def create_prompt(self) -> str:
+    def prompt_key(self) -> str:
+        return _prompt_key("insider_trades", self.model_dump_json().encode())
+
+    def create_prompt(self, cache: PromptCache | None = None) -> str:
+        if cache is not None:
+            return cache.get_or_render(self.prompt_key(), self.create_prompt)
         insider_trades = [
             x
             for x in self.insider_trades
@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class PromptCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / total if total else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"prompt cache: {self.memory_hits} memory hits, {self.disk_hits} disk hits, "
+            f"{self.misses} misses ({self.hit_rate:.0%} hit rate)"
+        )
+
+
+class PromptCache:
+    """
+    Rendered prompts keyed by a digest of their input data.
+
+    Lookups go to an in-memory LRU first and then to a SQLite file, so
+    reruns and backtests over unchanged inputs skip indicator computation
+    entirely. Keys come from the `prompt_key()` methods in data.models,
+    which include the template version; old entries are never read again
+    after a template change and can be dropped with `clear()`.
+    """
+
+    def __init__(self, path: str = ".cache/prompts.sqlite", max_entries: int = 4096):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.stats = PromptCacheStats()
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS prompts (
+                key TEXT PRIMARY KEY,
+                prompt TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+            """
+        )
+
+    def close(self):
+        self._conn.close()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            prompt = self._memory.get(key)
+            if prompt is not None:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return prompt
+
+            row = self._conn.execute(
+                "SELECT prompt FROM prompts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self.stats.disk_hits += 1
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, key: str, prompt: str):
+        self.put_many({key: prompt})
+
+    def put_many(self, prompts: dict[str, str]):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO prompts (key, prompt, created) VALUES (?, ?, ?)",
+                [(key, prompt, now) for key, prompt in prompts.items()],
+            )
+            for key, prompt in prompts.items():
+                self._remember(key, prompt)
+
+    def get_or_render(self, key: str, render: Callable[[], str]) -> str:
+        prompt = self.get(key)
+        if prompt is None:
+            prompt = render()
+            self.put(key, prompt)
+        return prompt
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM prompts")
+            self._memory.clear()
+
+    def _remember(self, key: str, prompt: str):
+        self._memory[key] = prompt
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
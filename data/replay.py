@@ -0,0 +1,171 @@
+"""
+Local stand-in for the financialdatasets.ai API.
+
+Serves responses recorded with `main.py --record-dir` (or
+`FinancialDatasetsClient(record_dir=...)`) with injectable latency, jitter and
+error rates, so fetch throughput and tail latency can be measured without
+network access or an API key:
+
+    python -m data.replay --record-dir recordings --port 8765 --latency-ms 50 --jitter-ms 20 --rate-429 0.01
+    FINANCIAL_DATASETS_BASE_URL=http://127.0.0.1:8765 python main.py --tickers=AAPL --no-cache
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+from data.api import recording_key
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        record_dir: str,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        rate_429: float = 0.0,
+        rate_5xx: float = 0.0,
+        retry_after: float | None = None,
+        seed: int | None = None,
+    ):
+        super().__init__((host, port), ReplayHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.recordings = {}
+        self.prices = {}
+        self.load(record_dir)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def load(self, record_dir: str):
+        for name in os.listdir(record_dir):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(record_dir, name)) as f:
+                recording = json.load(f)
+            self.recordings[name] = recording["body"]
+
+            # Also index price bars per ticker, so ranges that were never
+            # requested verbatim can be answered from overlapping recordings
+            if recording["path"] == "/prices/":
+                bars = self.prices.setdefault(recording["params"]["ticker"], {})
+                for bar in recording["body"].get("prices") or []:
+                    bars[bar["time"][:10]] = bar
+
+    def start(self) -> "ReplayServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def draw(self) -> tuple[float, float]:
+        with self._random_lock:
+            return self.random.random(), self.random.uniform(-1, 1)
+
+    def lookup(self, path: str, params: dict) -> dict | None:
+        body = self.recordings.get(recording_key(path, params))
+        if body is not None or path != "/prices/":
+            return body
+
+        bars = self.prices.get(params.get("ticker"))
+        if not bars:
+            return None
+        start, end = params.get("start_date", ""), params.get("end_date", "9999")
+        return {
+            "ticker": params["ticker"],
+            "prices": [bars[d] for d in sorted(bars) if start <= d <= end],
+        }
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, Nagle's
+    # algorithm adds ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        outcome, jitter = server.draw()
+        delay = max(server.latency_ms + jitter * server.jitter_ms, 0.0)
+        time.sleep(delay / 1000)
+
+        headers = {}
+        if server.retry_after is not None:
+            headers["Retry-After"] = f"{server.retry_after:g}"
+        if outcome < server.rate_429:
+            return self.reply(429, {"error": "Too Many Requests"}, headers)
+        if outcome < server.rate_429 + server.rate_5xx:
+            return self.reply(503, {"error": "Service Unavailable"}, headers)
+
+        url = urlparse(self.path)
+        body = server.lookup(url.path, dict(parse_qsl(url.query)))
+        if body is None:
+            return self.reply(404, {"error": f"No recording for {self.path}"})
+        self.reply(200, body)
+
+    def reply(self, status: int, body: dict, headers: dict | None = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve recorded financialdatasets.ai responses locally"
+    )
+    parser.add_argument("--record-dir", type=str, required=True)
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--rate-429", type=float, default=0.0, help="Fraction of 429 responses"
+    )
+    parser.add_argument(
+        "--rate-5xx", type=float, default=0.0, help="Fraction of 503 responses"
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=float,
+        default=None,
+        help="Seconds sent in the Retry-After header of 429 and 503 responses",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        args.record_dir,
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    print(f"Replaying {len(server.recordings)} recordings on {server.base_url}")
+    server.serve_forever()
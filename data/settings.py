@@ -0,0 +1,12 @@
+import os
+
+# Constants the command-line scripts need before any data is fetched. Kept
+# apart from data.api and data.models, which import requests, pydantic and
+# NumPy, so that parsing arguments or printing a report stays fast.
+
+DEFAULT_BASE_URL = os.environ.get(
+    "FINANCIAL_DATASETS_BASE_URL", "https://api.financialdatasets.ai"
+)
+# Renderings of the price section: the original bullet list, or one dense
+# key=value line per indicator group that takes far fewer prompt tokens
+PROMPT_FORMATS = ("verbose", "compact")
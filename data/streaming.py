@@ -0,0 +1,643 @@
+import json
+from collections import deque
+
+import numpy as np
+
+from data.indicators import (
+    ADX_WINDOW,
+    ATR_WINDOW,
+    BB_DEV,
+    BB_WINDOW,
+    CCI_CONSTANT,
+    CCI_WINDOW,
+    CMF_WINDOW,
+    DONCHIAN_WINDOW,
+    DPO_WINDOW,
+    EMA_FAST,
+    EMA_SLOW,
+    FI_WINDOW,
+    ICHIMOKU_BASE,
+    ICHIMOKU_CONV,
+    KAMA_FAST,
+    KAMA_SLOW,
+    KAMA_WINDOW,
+    KST_ROC,
+    KST_SIGNAL,
+    KST_WINDOWS,
+    MACD_SIGNAL,
+    MFI_WINDOW,
+    OBV_TREND_WINDOW,
+    RETURN_1MONTH_BARS,
+    ROC_WINDOW,
+    RSI_LONG_WINDOW,
+    RSI_WINDOW,
+    SMA_FAST,
+    SMA_SLOW,
+    STOCH_RSI_SMOOTH,
+    STOCH_RSI_WINDOW,
+    TSI_FAST,
+    TSI_SLOW,
+    UO_WEIGHTS,
+    UO_WINDOWS,
+    VORTEX_WINDOW,
+    _mad,
+    _pairwise_sum,
+    _slope,
+    compute_snapshot,
+)
+
+# ta fills the first rows of shifted closes (KST, DPO, Vortex) with the mean
+# of all closes, which changes with every bar. Up to this many bars the last
+# values still depend on those rows, so the snapshot is computed in batch.
+WARMUP_BARS = max(r + w for r, w in zip(KST_ROC, KST_WINDOWS)) - 1 + KST_SIGNAL
+
+# Longest look-back into past closes (KST's slowest rate of change)
+CLOSE_HISTORY = max(KST_ROC) + 1
+
+# Outputs reported as their last finite value, or the default before that
+LAST_DEFAULTS = {
+    "trend_sma_fast": 0,
+    "trend_sma_slow": 0,
+    "trend_ema_fast": 0,
+    "trend_ema_slow": 0,
+    "trend_macd": 0,
+    "trend_macd_signal": 0,
+    "trend_macd_diff": 0,
+    "trend_cci": 0,
+    "trend_dpo": 0,
+    "trend_vortex_ind_pos": 1,
+    "trend_vortex_ind_neg": 1,
+    "trend_ichimoku_conv": np.nan,
+    "trend_ichimoku_base": np.nan,
+    "trend_kst": 0,
+    "trend_kst_sig": 0,
+    "momentum_rsi": 50,
+    "momentum_stoch_rsi_k": 0,
+    "momentum_stoch_rsi_d": 0,
+    "momentum_tsi": 0,
+    "momentum_uo": 50,
+    "momentum_roc": 0,
+    "volatility_bbm": np.nan,
+    "volatility_bbh": np.nan,
+    "volatility_bbl": np.nan,
+    "volatility_dch": np.nan,
+    "volatility_dcl": np.nan,
+    "volume_mfi": 50,
+    "volume_cmf": 0,
+    "volume_em": 0,
+    "volume_fi": 0,
+    "volume_vpt": 0,
+}
+
+
+class IndicatorState:
+    """
+    Indicators of one ticker, updated one bar at a time.
+
+    Each `update` takes constant time regardless of how many bars were seen,
+    and `snapshot()` returns what `compute_snapshot` would return for all bars
+    passed to `update` so far. Values that the prompt rounds (moving averages,
+    CCI, MFI, ...) are identical; KAMA, KST and the Vortex indicator agree to
+    floating-point rounding. The state can be saved to and loaded from JSON.
+
+    All values cover every bar since the state began, including the average
+    volume and the 3-month return. main.py computes its snapshot over the
+    last required_bars() bars instead, so once more bars than that are seen
+    the two differ (see data.walk_forward for window-equivalent snapshots).
+    """
+
+    def __init__(self, ticker: str | None = None):
+        self.ticker = ticker
+        self.time = None
+        self.count = 0
+        # Bars are kept, and the snapshot computed in batch, until WARMUP_BARS
+        self.bars = []
+        self.last = {}
+
+        self.closes = deque(maxlen=CLOSE_HISTORY)
+        self.highs = deque(maxlen=max(ICHIMOKU_BASE, DONCHIAN_WINDOW))
+        self.lows = deque(maxlen=max(ICHIMOKU_BASE, DONCHIAN_WINDOW))
+        self.prev_tp = np.float64(np.nan)
+        self.first_close = None
+        self.volume_total = 0
+
+        self.sma_fast = _RollingWindow(SMA_FAST)
+        self.sma_slow = _RollingWindow(SMA_SLOW)
+        self.ema_fast = _Ewm(2 / (EMA_FAST + 1))
+        self.ema_slow = _Ewm(2 / (EMA_SLOW + 1))
+        self.macd_signal = _Ewm(2 / (MACD_SIGNAL + 1))
+        self.adx = _Adx(ADX_WINDOW)
+        self.tp = _RollingWindow(CCI_WINDOW)
+        self.dpo_close = _RollingWindow(DPO_WINDOW)
+        self.vortex_tr = _RollingWindow(VORTEX_WINDOW)
+        self.vortex_pos = _RollingWindow(VORTEX_WINDOW)
+        self.vortex_neg = _RollingWindow(VORTEX_WINDOW)
+        self.kst_roc = [_RollingWindow(window) for window in KST_WINDOWS]
+        self.kst_sig = _RollingWindow(KST_SIGNAL)
+
+        self.rsi_up = _Ewm(1 / RSI_WINDOW)
+        self.rsi_down = _Ewm(1 / RSI_WINDOW)
+        self.rsi_long_up = _Ewm(1 / RSI_LONG_WINDOW)
+        self.rsi_long_down = _Ewm(1 / RSI_LONG_WINDOW)
+        self.rsi_long = np.float64(np.nan)
+        self.rsi_history = deque(maxlen=STOCH_RSI_WINDOW)
+        self.stoch_rsi_k = _RollingWindow(STOCH_RSI_SMOOTH)
+        self.stoch_rsi_d = _RollingWindow(STOCH_RSI_SMOOTH)
+        self.tsi_slow = _Ewm(2 / (TSI_SLOW + 1))
+        self.tsi_fast = _Ewm(2 / (TSI_FAST + 1))
+        self.tsi_abs_slow = _Ewm(2 / (TSI_SLOW + 1))
+        self.tsi_abs_fast = _Ewm(2 / (TSI_FAST + 1))
+        self.uo_pressure = [_RollingWindow(window) for window in UO_WINDOWS]
+        self.uo_range = [_RollingWindow(window) for window in UO_WINDOWS]
+        self.kama = _Kama(KAMA_WINDOW, KAMA_FAST, KAMA_SLOW)
+
+        self.bb_close = _RollingWindow(BB_WINDOW)
+        self.atr_seed = []
+        self.atr = np.float64(np.nan)
+
+        self.money_flow = deque(maxlen=MFI_WINDOW)
+        self.cmf_flow = _RollingWindow(CMF_WINDOW)
+        self.cmf_volume = _RollingWindow(CMF_WINDOW)
+        self.force_index = _Ewm(2 / (FI_WINDOW + 1))
+        self.vpt = np.float64(0.0)
+        self.obv = 0
+        self.obv_history = deque(maxlen=OBV_TREND_WINDOW)
+
+    @classmethod
+    def from_columns(cls, columns: dict, ticker: str | None = None) -> "IndicatorState":
+        """
+        Build the state from time-sorted price columns, e.g. PriceResponse.columns.
+        """
+        state = cls(ticker)
+        times = columns.get("time")
+        for i in range(len(columns["close"])):
+            state.update(
+                columns["open"][i],
+                columns["high"][i],
+                columns["low"][i],
+                columns["close"][i],
+                columns["volume"][i],
+                None if times is None else str(times[i]),
+            )
+        return state
+
+    def update(self, open, high, low, close, volume, time: str | None = None):
+        """
+        Add the next bar. Bars must arrive in time order.
+        """
+        if time is not None and self.time is not None and time <= self.time:
+            raise ValueError(
+                f"Bar at {time} for {self.ticker} is not after the last bar at {self.time}"
+            )
+        bar = [np.float64(x) for x in (open, high, low, close)]
+        bar.append(int(volume) if float(volume).is_integer() else np.float64(volume))
+        if not all(np.isfinite(x) for x in bar):
+            raise ValueError(f"Invalid price data for {self.ticker}: {bar}")
+        self.time = time
+
+        if self.bars is None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self._step(*bar, close_mean=None, wrap_close=None)
+            return
+        self.bars.append(bar)
+        if len(self.bars) == WARMUP_BARS:
+            self._prime()
+
+    def snapshot(self) -> dict:
+        """
+        Latest value of every indicator referenced by the price prompt, as
+        compute_snapshot() returns for a single ticker.
+        """
+        if self.bars is not None:
+            o, h, l, c, v = (np.array(column) for column in zip(*self.bars))
+            return compute_snapshot(open=o, high=h, low=l, close=c, volume=v)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            snapshot = {key: self.last.get(key, LAST_DEFAULTS[key]) for key in LAST_DEFAULTS}
+            snapshot["trend_adx"], snapshot["trend_adx_pos"], snapshot["trend_adx_neg"] = (
+                self.adx.values()
+            )
+            snapshot["momentum_rsi_long"] = self.rsi_long
+            kama = self.kama.value(self.closes)
+            snapshot["momentum_kama"] = kama if np.isfinite(kama) else self.closes[-1]
+            snapshot["volatility_atr"] = self.atr if np.isfinite(self.atr) else 0
+
+            obv = np.array(self.obv_history)[:, np.newaxis]
+            closes = np.array(self.closes)[-OBV_TREND_WINDOW:, np.newaxis]
+            snapshot["obv"] = self.obv
+            snapshot["obv_ma10"] = obv[:, 0].sum(dtype=np.float64) / len(obv)
+            snapshot["obv_slope"] = _slope(obv)[0]
+            snapshot["price_slope"] = _slope(closes)[0]
+
+            open, high, low, close, volume = self.bar
+            snapshot["prev_close"] = self.closes[-2]
+            snapshot["open"] = open
+            snapshot["close"] = close
+            snapshot["high"] = high
+            snapshot["low"] = low
+            snapshot["volume"] = volume
+            snapshot["average_volume"] = self.volume_total / self.count
+            snapshot["return_1month"] = (close / self.closes[-RETURN_1MONTH_BARS] - 1) * 100
+            snapshot["return_3month"] = (close / self.first_close - 1) * 100
+        return snapshot
+
+    def to_dict(self) -> dict:
+        return {key: _encode(value) for key, value in vars(self).items()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IndicatorState":
+        state = cls.__new__(cls)
+        state.__dict__.update({key: _decode(value) for key, value in data.items()})
+        return state
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "IndicatorState":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def _prime(self):
+        # Replay the warm-up bars with the close mean that the batch
+        # computation uses for its filled rows at this point
+        bars, self.bars = self.bars, None
+        closes = np.array([bar[3] for bar in bars])[:, np.newaxis]
+        close_mean = np.nanmean(closes, axis=0)[0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for bar in bars:
+                self._step(*bar, close_mean=close_mean, wrap_close=bars[-1][3])
+
+    def _step(self, o, h, l, c, v, close_mean, wrap_close):
+        t = self.count
+        record = self._record
+        pc = self.closes[-1] if self.closes else np.float64(np.nan)
+        ph = self.highs[-1] if self.highs else np.float64(np.nan)
+        pl = self.lows[-1] if self.lows else np.float64(np.nan)
+        self.closes.append(c)
+        self.highs.append(h)
+        self.lows.append(l)
+        self.bar = (o, h, l, c, v)
+        if self.first_close is None:
+            self.first_close = c
+        self.volume_total += v
+        self.count += 1
+
+        tr = np.fmax(np.fmax(h - l, np.abs(h - pc)), np.abs(l - pc))
+        diff = c - pc
+
+        # Trend
+        record("trend_sma_fast", self.sma_fast.append(c).mean())
+        record("trend_sma_slow", self.sma_slow.append(c).mean())
+        ema_fast = self.ema_fast.append(c)
+        ema_slow = self.ema_slow.append(c)
+        macd = ema_fast - ema_slow
+        macd_signal = self.macd_signal.append(macd)
+        record("trend_ema_fast", ema_fast)
+        record("trend_ema_slow", ema_slow)
+        record("trend_macd", macd)
+        record("trend_macd_signal", macd_signal)
+        record("trend_macd_diff", macd - macd_signal)
+        self.adx.append(h, l, pc, ph, pl)
+
+        tp = (h + l + c) / 3.0
+        tp_mean = self.tp.append(tp).mean()
+        record(
+            "trend_cci",
+            (tp - tp_mean) / (CCI_CONSTANT * _mad(list(self.tp.values))),
+        )
+
+        dpo_shift = int(0.5 * DPO_WINDOW + 1)
+        shifted = self.closes[-1 - dpo_shift] if t >= dpo_shift else close_mean
+        record("trend_dpo", shifted - self.dpo_close.append(c).mean())
+
+        prev_close_mean = pc if t else close_mean
+        vortex_tr = np.fmax(
+            np.fmax(h - l, np.abs(h - prev_close_mean)), np.abs(l - prev_close_mean)
+        )
+        trn = self.vortex_tr.append(vortex_tr).sum()
+        record("trend_vortex_ind_pos", self.vortex_pos.append(np.abs(h - pl)).sum() / trn)
+        record("trend_vortex_ind_neg", self.vortex_neg.append(np.abs(l - ph)).sum() / trn)
+
+        highs, lows = list(self.highs), list(self.lows)
+        record(
+            "trend_ichimoku_conv",
+            0.5 * (max(highs[-ICHIMOKU_CONV:]) + min(lows[-ICHIMOKU_CONV:])),
+        )
+        record(
+            "trend_ichimoku_base",
+            0.5 * (max(highs[-ICHIMOKU_BASE:]) + min(lows[-ICHIMOKU_BASE:])),
+        )
+
+        kst = 0.0
+        for weight, (roc, window) in enumerate(zip(KST_ROC, self.kst_roc), start=1):
+            shifted = self.closes[-1 - roc] if t >= roc else close_mean
+            kst = kst + weight * window.append((c - shifted) / shifted).mean()
+        kst = 100 * kst
+        record("trend_kst", kst)
+        record("trend_kst_sig", self.kst_sig.append(kst).mean())
+
+        # Momentum
+        up = diff if diff > 0 else 0.0
+        down = -(diff if diff < 0 else 0.0)
+        record("momentum_rsi", _rsi(self.rsi_up.append(up), self.rsi_down.append(down)))
+        rsi = self.last.get("momentum_rsi", LAST_DEFAULTS["momentum_rsi"])
+        rsi_long = _rsi(self.rsi_long_up.append(up), self.rsi_long_down.append(down))
+        self.rsi_long = rsi_long if self.count >= RSI_LONG_WINDOW else np.float64(np.nan)
+
+        self.rsi_history.append(rsi)
+        if len(self.rsi_history) == STOCH_RSI_WINDOW:
+            lowest, highest = min(self.rsi_history), max(self.rsi_history)
+        else:
+            lowest = highest = np.float64(np.nan)
+        stoch_rsi = (rsi - lowest) / (highest - lowest)
+        stoch_rsi_k = self.stoch_rsi_k.append(stoch_rsi).mean(STOCH_RSI_SMOOTH)
+        stoch_rsi_d = self.stoch_rsi_d.append(stoch_rsi_k).mean(STOCH_RSI_SMOOTH)
+        record("momentum_stoch_rsi_k", stoch_rsi_k)
+        record("momentum_stoch_rsi_d", stoch_rsi_d)
+
+        smoothed = self.tsi_fast.append(self.tsi_slow.append(diff))
+        smoothed_abs = self.tsi_abs_fast.append(self.tsi_abs_slow.append(np.abs(diff)))
+        record("momentum_tsi", 100 * (smoothed / smoothed_abs))
+
+        buying_pressure = c - np.minimum(l, pc)
+        uo = 0.0
+        for weight, pressure, true_range in zip(
+            UO_WEIGHTS, self.uo_pressure, self.uo_range
+        ):
+            uo = uo + weight * (
+                pressure.append(buying_pressure).sum() / true_range.append(tr).sum()
+            )
+        record("momentum_uo", 100.0 * uo / sum(UO_WEIGHTS))
+
+        prev_roc = self.closes[-1 - ROC_WINDOW] if t >= ROC_WINDOW else np.nan
+        record("momentum_roc", (c - prev_roc) / prev_roc * 100)
+        self.kama.append(c, pc if t else wrap_close, self.closes)
+
+        # Volatility
+        bbm = self.bb_close.append(c).mean()
+        std = self.bb_close.std(bbm)
+        record("volatility_bbm", bbm)
+        record("volatility_bbh", bbm + BB_DEV * std)
+        record("volatility_bbl", bbm - BB_DEV * std)
+        if t < ATR_WINDOW:
+            self.atr_seed.append(tr)
+            self.atr = np.array(self.atr_seed).sum(dtype=np.float64) / len(self.atr_seed)
+        else:
+            self.atr = (self.atr * (ATR_WINDOW - 1) + tr) / float(ATR_WINDOW)
+        record("volatility_dch", max(highs[-DONCHIAN_WINDOW:]))
+        record("volatility_dcl", min(lows[-DONCHIAN_WINDOW:]))
+
+        # Volume
+        up_down = 1 if tp > self.prev_tp else (-1 if tp < self.prev_tp else 0)
+        self.prev_tp = tp
+        self.money_flow.append(tp * v * up_down)
+        positive = _pairwise_sum([x if x >= 0.0 else 0.0 for x in self.money_flow])
+        negative = np.abs(_pairwise_sum([x if x < 0.0 else 0.0 for x in self.money_flow]))
+        record("volume_mfi", 100 - (100 / (1 + positive / negative)))
+
+        mfv = ((c - l) - (h - c)) / (h - l)
+        mfv = (0.0 if np.isnan(mfv) else mfv) * v
+        record(
+            "volume_cmf",
+            self.cmf_flow.append(mfv).sum() / self.cmf_volume.append(v).sum(),
+        )
+        record("volume_em", ((h - ph) + (l - pl)) * (h - l) / (2 * v) * 100000000)
+        record("volume_fi", self.force_index.append(diff * v))
+        vpt = (c / pc - 1) * v
+        if not np.isnan(vpt):
+            self.vpt = self.vpt + vpt
+            record("volume_vpt", self.vpt)
+        self.obv += -v if c < pc else v
+        self.obv_history.append(self.obv)
+
+    def _record(self, key: str, value):
+        if np.isfinite(value):
+            self.last[key] = value
+
+
+class _RollingWindow:
+    """
+    The last `window` values with pandas' running sum over them, compensated
+    as values enter and leave, like data.indicators' rolling sums.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = np.float64(0.0)
+        self.compensation_add = np.float64(0.0)
+        self.compensation_remove = np.float64(0.0)
+
+    def append(self, value) -> "_RollingWindow":
+        if len(self.values) == self.window and (old := self.values[0]) == old:
+            y = -old - self.compensation_remove
+            t = self.total + y
+            self.compensation_remove = t - self.total - y
+            self.total = t
+        self.values.append(value)
+        if value == value:
+            y = value - self.compensation_add
+            t = self.total + y
+            self.compensation_add = t - self.total - y
+            self.total = t
+        return self
+
+    def sum(self):
+        valid = [x for x in self.values if x == x]
+        value = self.values[-1]
+        if value == value and max(valid) == min(valid):
+            return np.float64(value * len(valid))
+        return self.total if valid else np.float64(0.0)
+
+    def mean(self, min_periods: int = 0):
+        valid = [x for x in self.values if x == x]
+        if len(valid) < max(min_periods, 1):
+            return np.float64(np.nan)
+        value = self.values[-1]
+        if value == value and max(valid) == min(valid):
+            return value
+        return self.total / len(valid)
+
+    def std(self, mean):
+        squares = 0.0
+        for x in reversed(self.values):
+            squares += (x - mean) ** 2
+        return np.sqrt(squares / len(self.values))
+
+
+class _Ewm:
+    """
+    pandas' ewm(alpha=alpha, adjust=False).mean(), one value at a time.
+    """
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.started = False
+        self.value = np.float64(np.nan)
+
+    def append(self, value):
+        if not self.started:
+            # Leading NaNs are skipped, the first valid value starts the mean
+            self.started = bool(value == value)
+            self.value = value
+        elif self.value != value:
+            factor = 1.0 - self.alpha
+            self.value = (factor * self.value + self.alpha * value) / (
+                factor + self.alpha
+            )
+        return self.value
+
+
+class _Adx:
+    """
+    ta's ADX, +DI and -DI with Wilder smoothing.
+
+    ta never fills in the smoothed sums for the latest bar, so the reported
+    values trail by one bar; this keeps the same lag.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.count = 0
+        self.seed = []
+        self.sums = None
+        self.dx_seed = []
+        self.adx = np.float64(np.nan)
+        self.pos = np.float64(np.nan)
+        self.neg = np.float64(np.nan)
+
+    def append(self, high, low, prev_close, prev_high, prev_low):
+        window = self.window
+        t = self.count
+        self.count += 1
+        if not t:
+            return
+        directional = np.maximum(high, prev_close) - np.minimum(low, prev_close)
+        diff_up = high - prev_high
+        diff_down = -(low - prev_low)
+        pos = np.abs(((diff_up > diff_down) and (diff_up > 0)) * diff_up)
+        neg = np.abs(((diff_down > diff_up) and (diff_down > 0)) * diff_down)
+        if t < window:
+            self.seed.append((directional, pos, neg))
+            return
+        if t == window:
+            self.seed.append((directional, pos, neg))
+            self.sums = [
+                np.array(series).sum(dtype=np.float64) for series in zip(*self.seed)
+            ]
+            self.seed = []
+        else:
+            self.sums = [
+                total - (total / float(window)) + value
+                for total, value in zip(self.sums, (directional, pos, neg))
+            ]
+
+        trs, dip, din = self.sums
+        self.pos = 100 * (dip / trs) if trs != 0 else 0.0
+        self.neg = 100 * (din / trs) if trs != 0 else 0.0
+        total = self.pos + self.neg
+        dx = 100 * np.abs((self.pos - self.neg) / total) if total != 0 else 0.0
+        if len(self.dx_seed) < window:
+            self.dx_seed.append(dx)
+            if len(self.dx_seed) == window:
+                self.adx = np.array(self.dx_seed).sum(dtype=np.float64) / window
+        else:
+            self.adx = ((self.adx * (window - 1)) + dx) / float(window)
+
+    def values(self) -> tuple:
+        return tuple(
+            value if np.isfinite(value) else 20 for value in (self.adx, self.pos, self.neg)
+        )
+
+
+class _Kama:
+    """
+    ta's KAMA. ta computes the first bars' efficiency ratios with np.roll,
+    which wraps around to the latest closes, so those bars are recomputed
+    for every snapshot; later bars are folded into kama = a * start + b.
+    """
+
+    def __init__(self, window: int, pow1: int, pow2: int):
+        self.window = window
+        self.fast = 2.0 / (pow1 + 1)
+        self.slow = 2.0 / (pow2 + 1.0)
+        self.noise = _RollingWindow(window)
+        self.first_closes = []
+        self.first_volatility = []
+        self.a = np.float64(1.0)
+        self.b = np.float64(0.0)
+
+    def append(self, close, prev_close, closes: deque):
+        volatility = np.abs(close - prev_close)
+        noise = self.noise.append(volatility).sum()
+        if len(self.first_closes) < self.window:
+            self.first_closes.append(close)
+            self.first_volatility.append(volatility)
+            return
+        change = np.abs(close - closes[-1 - self.window])
+        constant = self._smoothing(change, noise)
+        self.a = (1 - constant) * self.a
+        self.b = (1 - constant) * self.b + constant * close
+
+    def value(self, closes: deque):
+        window = self.window
+        volatility = list(self.first_volatility)
+        volatility[0] = np.abs(self.first_closes[0] - closes[-1])
+        noise = _RollingWindow(window)
+        kama = self.first_closes[0]
+        for i, close in enumerate(self.first_closes):
+            total = noise.append(volatility[i]).sum()
+            if i:
+                change = np.abs(close - closes[-window + i])
+                kama = kama + self._smoothing(change, total) * (close - kama)
+        return self.a * kama + self.b
+
+    def _smoothing(self, change, noise):
+        efficiency = change / noise if noise != 0 else 0.0
+        return (efficiency * (self.fast - self.slow) + self.slow) ** 2.0
+
+
+def _rsi(up_mean, down_mean):
+    if down_mean == 0:
+        return np.float64(100)
+    return 100 - (100 / (1 + np.float64(up_mean) / down_mean))
+
+
+def _encode(value):
+    if isinstance(value, deque):
+        return {"deque": [_encode(x) for x in value], "maxlen": value.maxlen}
+    if isinstance(value, (_RollingWindow, _Ewm, _Adx, _Kama)):
+        return {
+            "class": type(value).__name__,
+            "state": {key: _encode(x) for key, x in vars(value).items()},
+        }
+    if isinstance(value, (list, tuple)):
+        return [_encode(x) for x in value]
+    if isinstance(value, dict):
+        return {key: _encode(x) for key, x in value.items()}
+    if isinstance(value, (np.integer, np.bool_)):
+        return value.item()
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict) and "deque" in value:
+        return deque((_decode(x) for x in value["deque"]), maxlen=value["maxlen"])
+    if isinstance(value, dict) and "class" in value:
+        obj = object.__new__(_CLASSES[value["class"]])
+        obj.__dict__.update({key: _decode(x) for key, x in value["state"].items()})
+        return obj
+    if isinstance(value, list):
+        return [_decode(x) for x in value]
+    if isinstance(value, dict):
+        return {key: _decode(x) for key, x in value.items()}
+    # Arithmetic on NumPy floats yields inf/NaN instead of ZeroDivisionError,
+    # as in the batch computation
+    if isinstance(value, float):
+        return np.float64(value)
+    return value
+
+
+_CLASSES = {cls.__name__: cls for cls in (_RollingWindow, _Ewm, _Adx, _Kama)}
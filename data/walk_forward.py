@@ -0,0 +1,197 @@
+"""
+Walk-forward snapshots of a ticker universe: the price prompt each ticker
+would have got on every trading day of a period, exactly as a live run of
+main.py with that end date renders it.
+
+A live run fetches the required_bars() trading days up to its end date, and
+several prompt values depend on where that window starts (ta's fillna uses
+the window's mean close, the 3M statistics span it). Carrying one
+IndicatorState across the years would drift from what the models saw, so
+every end date gets its own window. The bars are aligned once into a dates x
+tickers panel, each window is a strided view into it, and the windows of many
+(ticker, end date) pairs are stacked side by side and computed together in one
+compute_snapshot() call.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+from typing import Iterator
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from data.indicators import compute_snapshot
+from data.lookback import plan_start_date, required_bars
+from data.models import PRICE_COLUMNS, PriceResponse, _price_renderer, format_date
+from data.trading_calendar import last_of_next_sessions
+
+# Trading days between a prompt's end date and the close its rating is about
+HORIZON_BARS = 5
+
+
+def fetch_range(start_date: str, end_date: str) -> tuple[str, str]:
+    """
+    Dates of the bars needed for end dates from `start_date` to `end_date`:
+    the first end date's window through the bars that realize the last end
+    date's return.
+    """
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    return (
+        plan_start_date(start_date),
+        last_of_next_sessions(end, HORIZON_BARS).strftime("%Y-%m-%d"),
+    )
+
+
+@dataclass
+class PricePanel:
+    """
+    Daily bars of many tickers aligned on the union of their bar times.
+    """
+
+    tickers: list[str]
+    # Sorted bar times
+    times: np.ndarray
+    # dates x tickers; prices are NaN and volumes 0 where a ticker has no bar
+    columns: dict[str, np.ndarray]
+    # dates x tickers, whether the ticker has a bar
+    present: np.ndarray
+
+    @classmethod
+    def from_responses(cls, responses: dict[str, PriceResponse]) -> "PricePanel":
+        tickers = list(responses)
+        times = np.array(
+            sorted({t for r in responses.values() for t in r.columns["time"]}),
+            dtype=object,
+        )
+        shape = (len(times), len(tickers))
+        columns = {col: np.full(shape, np.nan) for col in PRICE_COLUMNS}
+        columns["volume"] = np.zeros(shape, dtype=np.int64)
+        present = np.zeros(shape, dtype=bool)
+        for i, response in enumerate(responses.values()):
+            ticker_columns = response.columns
+            rows = np.searchsorted(times, ticker_columns["time"])
+            for col in PRICE_COLUMNS:
+                columns[col][rows, i] = ticker_columns[col]
+            present[rows, i] = True
+        return cls(tickers, times, columns, present)
+
+    @cached_property
+    def dates(self) -> np.ndarray:
+        # As the prompt shows them, YYYY-MM-DD
+        return np.array([format_date(t) for t in self.times])
+
+    def complete_windows(self, bars: int) -> np.ndarray:
+        """
+        dates x tickers, whether the `bars` bars up to and including the
+        date are all present.
+        """
+        counts = np.cumsum(self.present, axis=0, dtype=np.int64)
+        complete = np.zeros(self.present.shape, dtype=bool)
+        if len(counts) >= bars:
+            before = np.vstack([np.zeros((1, counts.shape[1]), np.int64), counts])
+            window_counts = counts[bars - 1 :] - before[: len(counts) - bars + 1]
+            complete[bars - 1 :] = window_counts == bars
+        return complete
+
+    def forward_returns(self, horizon: int = HORIZON_BARS) -> np.ndarray:
+        """
+        dates x tickers, the percent change from each close to the close
+        `horizon` bars later; NaN where either bar is missing.
+        """
+        close = self.columns["close"]
+        returns = np.full(close.shape, np.nan)
+        if len(close) > horizon:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns[:-horizon] = (close[horizon:] / close[:-horizon] - 1) * 100
+        return returns
+
+
+@dataclass
+class SnapshotBatch:
+    """
+    Prompt values of many (ticker, end date) pairs computed together.
+    """
+
+    panel: PricePanel
+    # Panel row of each snapshot's end date and column of its ticker
+    rows: np.ndarray
+    columns: np.ndarray
+    # compute_snapshot() output, one value per snapshot
+    values: dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def keys(self) -> list[tuple[str, str]]:
+        # (ticker, end date) of each snapshot
+        dates = self.panel.dates
+        tickers = self.panel.tickers
+        return [(tickers[c], dates[r]) for r, c in zip(self.rows, self.columns)]
+
+    def snapshot(self, i: int) -> dict:
+        return {key: values[i] for key, values in self.values.items()}
+
+    def prompt(self, i: int, prompt_format: str = "verbose") -> str:
+        render = _price_renderer(prompt_format)
+        return render(self.panel.dates[self.rows[i]], self.snapshot(i))
+
+    def prompts(self, prompt_format: str = "verbose") -> list[str]:
+        """
+        Price prompts, identical to PriceResponse.create_prompt() on each
+        snapshot's window.
+        """
+        render = _price_renderer(prompt_format)
+        dates = self.panel.dates
+        return [
+            render(dates[row], self.snapshot(i)) for i, row in enumerate(self.rows)
+        ]
+
+
+def walk_forward(
+    panel: PricePanel,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    step: int = 1,
+    batch_size: int = 10_000,
+    bars: int | None = None,
+) -> Iterator[SnapshotBatch]:
+    """
+    Snapshots of every ticker whose window is complete, on every `step`-th
+    trading day from `start_date` to `end_date` (default: all), in date
+    order and in batches of at most `batch_size` (ticker, end date) pairs.
+    """
+    if step < 1 or batch_size < 1:
+        raise ValueError("step and batch_size must be at least 1")
+    bars = bars or required_bars()
+    dates = panel.dates
+    first = 0 if start_date is None else int(np.searchsorted(dates, start_date))
+    last = (
+        len(dates)
+        if end_date is None
+        else int(np.searchsorted(dates, end_date, side="right"))
+    )
+    end_rows = np.arange(max(first, bars - 1), last)[::step]
+    row_index, columns = np.nonzero(panel.complete_windows(bars)[end_rows])
+    rows = end_rows[row_index]
+    if not len(rows):
+        return
+
+    # (dates - bars + 1) x tickers x bars views; indexing copies only the
+    # selected windows
+    windows = {
+        col: sliding_window_view(panel.columns[col], bars, axis=0)
+        for col in PRICE_COLUMNS
+    }
+    for start in range(0, len(rows), batch_size):
+        batch_rows = rows[start : start + batch_size]
+        batch_columns = columns[start : start + batch_size]
+        starts = batch_rows - bars + 1
+        values = compute_snapshot(
+            **{
+                col: np.ascontiguousarray(windows[col][starts, batch_columns].T)
+                for col in PRICE_COLUMNS
+            }
+        )
+        yield SnapshotBatch(panel, batch_rows, batch_columns, values)
@@ -0,0 +1,284 @@
+"""
+Score fine-tuned checkpoints and the Ollama models on a held-out set that
+build_dataset.py wrote, in one report: accuracy against the realized
+ratings, the share of replies without a rating, and examples per second.
+
+    python evaluate.py --checkpoint=qwen-GRPO --checkpoint=Qwen/Qwen3-0.6B --limit=500
+    python evaluate.py --checkpoint=qwen-GRPO --no-ollama --batch-size=32 --device=cpu
+
+Checkpoints are loaded with transformers and generate greedily in batches of
+--batch-size prompts. Prompts are sorted by length so each batch pads little,
+left-padded, and generated with the KV cache. The Ollama models are asked
+through the same scheduler as main.py, one model at a time after loading it,
+so neither side's speed includes loading. Every reply is read with
+llm.answer.parse_answer, as main.py reads them.
+"""
+
+import argparse
+import asyncio
+import glob
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tabulate import tabulate
+
+from data.settings import PROMPT_FORMATS
+from llm.answer import ANSWER_SCHEMA, parse_answer
+from llm.evaluation import (
+    CONFUSION_HEADERS,
+    SCORE_HEADERS,
+    ModelScore,
+    rating_indices,
+    score_rows,
+)
+from llm.prompts import chat_messages, system_prompt
+from llm.settings import DEFAULT_OLLAMA_URL, MODEL_NAMES
+
+TEST_DATA = "datasets/test/*.parquet"
+EVALUATION_HEADERS = [*SCORE_HEADERS, "Examples/s", "Tokens/s"]
+
+
+def load_examples(pattern: str, limit: int | None = None, seed: int = 0) -> pa.Table:
+    """
+    The prompts and answers of the held-out shards, or `limit` of them
+    drawn at random.
+    """
+    files = sorted(glob.glob(pattern))
+    if not files:
+        raise ValueError(f"No Parquet shards match {pattern}")
+    table = pa.concat_tables(
+        pq.read_table(path, columns=["prompt", "answer", "ticker", "date"])
+        for path in files
+    )
+    if limit is not None and limit < len(table):
+        rng = np.random.default_rng(seed)
+        table = table.take(np.sort(rng.choice(len(table), limit, replace=False)))
+    return table
+
+
+def generate(
+    checkpoint: str,
+    prompts: list[str],
+    prompt_format: str = "verbose",
+    batch_size: int = 16,
+    max_new_tokens: int = 512,
+    temperature: float = 0.0,
+    device: str | None = None,
+) -> tuple[list[str], float, int]:
+    """
+    Replies of a transformers checkpoint to the prompts, the seconds spent
+    generating them and the number of tokens generated.
+    """
+    # Imported here so that evaluating the Ollama models alone needs neither
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+    tokenizer = AutoTokenizer.from_pretrained(checkpoint, padding_side="left")
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    model = AutoModelForCausalLM.from_pretrained(checkpoint, torch_dtype="auto")
+    model.to(device).eval()
+
+    texts = [
+        tokenizer.apply_chat_template(
+            chat_messages(prompt, prompt_format),
+            tokenize=False,
+            add_generation_prompt=True,
+            enable_thinking=False,
+        )
+        for prompt in prompts
+    ]
+    input_ids = tokenizer(texts, add_special_tokens=False)["input_ids"]
+    order = np.argsort([len(ids) for ids in input_ids], kind="stable")[::-1]
+    sampling = (
+        {"do_sample": True, "temperature": temperature}
+        if temperature > 0
+        else {"do_sample": False}
+    )
+
+    replies = [None] * len(prompts)
+    generated = 0
+    started = time.perf_counter()
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start : start + batch_size]
+            inputs = tokenizer(
+                [texts[i] for i in batch],
+                return_tensors="pt",
+                padding=True,
+                add_special_tokens=False,
+            ).to(device)
+            outputs = model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                use_cache=True,
+                pad_token_id=tokenizer.pad_token_id,
+                **sampling,
+            )
+            new_tokens = outputs[:, inputs["input_ids"].shape[1] :]
+            generated += int((new_tokens != tokenizer.pad_token_id).sum())
+            for i, reply in zip(
+                batch, tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+            ):
+                replies[i] = reply
+            print(f"{checkpoint}: {min(start + batch_size, len(order))}/{len(order)}")
+    return replies, time.perf_counter() - started, generated
+
+
+async def ask_ollama(
+    model_names: list[str],
+    prompts: list[str],
+    prompt_format: str = "verbose",
+    ollama_url: str = DEFAULT_OLLAMA_URL,
+    concurrency: int = 1,
+    temperature: float = 0.0,
+    answer_format: dict | None = ANSWER_SCHEMA,
+) -> dict[str, tuple[list[str], float, int]]:
+    """
+    Replies of each Ollama model to the prompts, the seconds spent on them
+    and the number of tokens generated, one model at a time.
+    """
+    # Imported here so that evaluating checkpoints alone does not need Ollama
+    from llm.ollama import OllamaScheduler
+    from llm.telemetry import Telemetry
+
+    telemetry = Telemetry()
+    scheduler = OllamaScheduler(
+        base_urls=ollama_url.split(","),
+        max_concurrency=concurrency,
+        temperature=temperature,
+        answer_format=answer_format,
+        telemetry=telemetry,
+    )
+    system = system_prompt(prompt_format)
+    results = {}
+    for model_name in model_names:
+        await scheduler.warm_up([model_name])
+        calls = len(telemetry.calls)
+        started = time.perf_counter()
+        replies = await asyncio.gather(
+            *(scheduler.invoke(model_name, prompt, system) for prompt in prompts)
+        )
+        seconds = time.perf_counter() - started
+        generated = sum(m.eval_count or 0 for m in telemetry.calls[calls:])
+        results[model_name] = (replies, seconds, generated)
+        print(f"{model_name}: {len(prompts)} replies in {seconds:.1f}s")
+    return results
+
+
+def evaluation_rows(
+    scores: list[ModelScore], speeds: dict[str, tuple[float, float]]
+) -> list[list]:
+    # score_rows() with the examples and tokens per second of each model
+    rows = score_rows(scores)
+    for row in rows:
+        examples, tokens = speeds.get(row[0], (None, None))
+        row += [
+            "" if examples is None else f"{examples:.2f}",
+            "" if tokens is None else f"{tokens:.0f}",
+        ]
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Score checkpoints and the Ollama models on held-out examples"
+    )
+    parser.add_argument("--test-data", type=str, default=TEST_DATA)
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        action="append",
+        default=[],
+        help="Local directory or Hugging Face model to evaluate; repeat for several",
+    )
+    parser.add_argument(
+        "--prompt-format",
+        choices=PROMPT_FORMATS,
+        default="verbose",
+        help="Format the held-out set was built with",
+    )
+    parser.add_argument("--limit", type=int, default=None, help="Examples to draw")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-new-tokens", type=int, default=512)
+    parser.add_argument("--device", type=str, default=None)
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        default=0.0,
+        help="Sampling temperature of every model; 0 decodes greedily",
+    )
+    parser.add_argument("--no-ollama", action="store_true")
+    parser.add_argument(
+        "--ollama-model",
+        type=str,
+        action="append",
+        help="Ollama model to evaluate; repeat for several. Defaults to all",
+    )
+    parser.add_argument("--ollama-url", type=str, default=DEFAULT_OLLAMA_URL)
+    parser.add_argument("--llm-concurrency", type=int, default=1)
+    parser.add_argument(
+        "--no-json-schema",
+        action="store_true",
+        help="Let the Ollama models reply freely, as the checkpoints do",
+    )
+    parser.add_argument("--confusion", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if min(args.batch_size, args.max_new_tokens, args.llm_concurrency) < 1:
+        parser.error(
+            "--batch-size, --max-new-tokens and --llm-concurrency must be at least 1"
+        )
+    if args.limit is not None and args.limit < 1:
+        parser.error("--limit must be at least 1")
+    model_names = [] if args.no_ollama else args.ollama_model or MODEL_NAMES
+    if not model_names and not args.checkpoint:
+        parser.error("Nothing to evaluate: give --checkpoint or leave out --no-ollama")
+    try:
+        examples = load_examples(args.test_data, args.limit, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    prompts = examples.column("prompt").to_pylist()
+    realized = rating_indices(examples.column("answer").to_pylist())
+    print(f"{len(prompts)} held-out examples from {args.test_data}")
+
+    replies = {}
+    for checkpoint in args.checkpoint:
+        replies[checkpoint] = generate(
+            checkpoint,
+            prompts,
+            args.prompt_format,
+            args.batch_size,
+            args.max_new_tokens,
+            args.temperature,
+            args.device,
+        )
+    if model_names:
+        replies.update(
+            asyncio.run(
+                ask_ollama(
+                    model_names,
+                    prompts,
+                    args.prompt_format,
+                    args.ollama_url,
+                    args.llm_concurrency,
+                    args.temperature,
+                    None if args.no_json_schema else ANSWER_SCHEMA,
+                )
+            )
+        )
+
+    scores, speeds = [], {}
+    for name, (model_replies, seconds, generated) in replies.items():
+        predicted = rating_indices([parse_answer(reply)[0] for reply in model_replies])
+        scores.append(ModelScore.from_ratings(name, predicted, realized))
+        speeds[name] = (len(model_replies) / seconds, generated / seconds)
+    print(tabulate(evaluation_rows(scores, speeds), headers=EVALUATION_HEADERS))
+    if args.confusion:
+        for score in scores:
+            print(f"\n{score.model}: realized (rows) vs rated (columns)")
+            print(tabulate(score.confusion_rows(), headers=CONFUSION_HEADERS))
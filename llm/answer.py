@@ -0,0 +1,149 @@
+import json
+import re
+
+ANSWER_KEYS = ("reasoning", "rating")
+RATINGS = ("strong buy", "buy", "hold", "sell", "strong sell")
+# Passed as Ollama's `format`, so the model can only produce a valid answer
+ANSWER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "reasoning": {"type": "string"},
+        "rating": {"type": "string", "enum": list(RATINGS)},
+    },
+    "required": list(ANSWER_KEYS),
+}
+
+_DECODER = json.JSONDecoder()
+_FENCE = re.compile(r"```(?:json)?")
+_RATING = re.compile(r'"rating"\s*:\s*"(strong buy|strong sell|buy|sell|hold)"', re.I)
+
+
+def parse_answer(text: str) -> tuple[str, str]:
+    """
+    Rating and reasoning of a model reply.
+
+    Schema-constrained replies are a bare JSON object and are decoded
+    directly. Otherwise `<think>` blocks are dropped and the first JSON
+    object with a rating is taken, wherever it is in the text; failing that,
+    a `"rating": "..."` pair is looked for on its own. Replies without any
+    rating give ("unavailable", the reply without think blocks and fences).
+    """
+    body = text.strip()
+    if body.startswith("{") and body.endswith("}"):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and "rating" in data:
+            return _answer(data)
+
+    body = _strip_think(body)
+    start = body.find("{")
+    while start >= 0:
+        try:
+            data = _DECODER.raw_decode(body, start)[0]
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and "rating" in data:
+            return _answer(data)
+        start = body.find("{", start + 1)
+
+    body = _FENCE.sub("", body).strip()
+    match = _RATING.search(body)
+    if match:
+        return match.group(1).lower(), body
+    return "unavailable", body
+
+
+def _strip_think(text: str) -> str:
+    # str.find instead of a regex, which is slow to scan long think blocks
+    start = text.find("<think>")
+    while start >= 0:
+        end = text.find("</think>", start)
+        if end < 0:
+            break
+        text = text[:start] + text[end + len("</think>") :]
+        start = text.find("<think>", start)
+    return text
+
+
+def _answer(data: dict) -> tuple[str, str]:
+    reasoning = data.get("reasoning", "unavailable")
+    return str(data["rating"]).strip().lower(), str(reasoning)
+
+
+class AnswerStream:
+    """
+    Watches a streamed reply for the end of the JSON answer.
+
+    Text is fed in chunks as it is generated. `<think>` blocks are skipped,
+    and braces are counted outside of JSON strings. `feed()` returns True
+    once a complete top-level object with both answer keys has been seen,
+    so generation can be cancelled instead of waiting for the model to
+    finish whatever it writes after the JSON.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.answer = None
+        # Length of the text up to and including the answer
+        self.end = None
+        self._pos = 0
+        self._depth = 0
+        self._start = None
+        self._in_string = False
+        self._escaped = False
+        self._thinking = False
+
+    def feed(self, chunk: str) -> bool:
+        self.text += chunk
+        text = self.text
+        while self.answer is None and self._pos < len(text):
+            if self._thinking:
+                end = text.find("</think>", self._pos)
+                if end < 0:
+                    # Keep a possible partial closing tag for the next chunk
+                    self._pos = max(self._pos, len(text) - len("</think>"))
+                    return False
+                self._thinking = False
+                self._pos = end + len("</think>")
+                continue
+
+            char = text[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"' and self._depth:
+                self._in_string = True
+            elif char == "{":
+                if not self._depth:
+                    self._start = self._pos
+                self._depth += 1
+            elif char == "}" and self._depth:
+                self._depth -= 1
+                if not self._depth:
+                    self._check(text[self._start : self._pos + 1])
+                    if self.answer is not None:
+                        self.end = self._pos + 1
+            elif char == "<" and not self._depth:
+                if text.startswith("<think>", self._pos):
+                    self._thinking = True
+                    self._pos += len("<think>")
+                    continue
+                if "<think>".startswith(text[self._pos :]):
+                    # Wait for the rest of a tag split across chunks
+                    return False
+            self._pos += 1
+        return self.answer is not None
+
+    def _check(self, candidate: str):
+        try:
+            data = json.loads(candidate)
+        except ValueError:
+            return
+        if isinstance(data, dict) and all(key in data for key in ANSWER_KEYS):
+            self.answer = data
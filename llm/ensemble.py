@@ -0,0 +1,79 @@
+import asyncio
+from collections import Counter
+from typing import Awaitable, Callable, Hashable
+
+from llm.answer import RATINGS, parse_answer
+
+# invoke(model_name, key) -> reply of the model to the prompt of key, e.g. a
+# (ticker, end date) pair
+Invoke = Callable[[str, Hashable], Awaitable[str]]
+
+
+def decided(ratings: list[str], remaining: int, quorum: int) -> bool:
+    """
+    Whether an ensemble's rating is settled: `quorum` models agree on it, or
+    it stays ahead even if all `remaining` models vote for the runner-up.
+    Replies without a rating do not vote.
+    """
+    counts = Counter(rating for rating in ratings if rating in RATINGS).most_common(2)
+    if not counts:
+        return False
+    leader = counts[0][1]
+    runner_up = counts[1][1] if len(counts) > 1 else 0
+    return leader >= quorum or leader > runner_up + remaining
+
+
+async def quorum_by_model(
+    invoke: Invoke, keys: list[Hashable], model_names: list[str], quorum: int
+) -> dict[Hashable, dict[str, str]]:
+    """
+    Model-major ensemble: each model in turn answers the keys whose rating
+    is not settled yet, so a model is still loaded once. Returns the replies
+    keyed by key and then by model name; models skipped for a key are left
+    out.
+    """
+    results = {key: {} for key in keys}
+    ratings = {key: [] for key in keys}
+    for i, model_name in enumerate(model_names):
+        remaining = len(model_names) - i
+        open_keys = [
+            key for key in keys if not decided(ratings[key], remaining, quorum)
+        ]
+        if not open_keys:
+            break
+        contents = await asyncio.gather(
+            *(invoke(model_name, key) for key in open_keys)
+        )
+        for key, content in zip(open_keys, contents):
+            results[key][model_name] = content
+            ratings[key].append(parse_answer(content)[0])
+    return results
+
+
+async def quorum_by_key(
+    invoke: Invoke, key: Hashable, model_names: list[str], quorum: int
+) -> dict[str, str]:
+    """
+    Ensemble for one key: the first `quorum` models are asked at once, as
+    no rating can be settled with fewer replies, then one model at a time
+    until the rating is settled.
+    """
+    first = model_names[:quorum]
+    contents = dict(
+        zip(first, await asyncio.gather(*(invoke(name, key) for name in first)))
+    )
+    ratings = [parse_answer(content)[0] for content in contents.values()]
+    for i, model_name in enumerate(model_names[quorum:], start=quorum):
+        if decided(ratings, len(model_names) - i, quorum):
+            break
+        contents[model_name] = await invoke(model_name, key)
+        ratings.append(parse_answer(contents[model_name])[0])
+    return contents
+
+
+def order_by_speed(model_names: list[str], wall_seconds: dict[str, float]) -> list[str]:
+    """
+    Models ordered by their mean wall-clock time per call, fastest first;
+    models without measurements come last, in their original order.
+    """
+    return sorted(model_names, key=lambda name: wall_seconds.get(name, float("inf")))
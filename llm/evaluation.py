@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from llm.answer import RATINGS
+
+# Realized 5-day return in percent that each rating stands for, as the prompt
+# defines them: strong buy (+5% or better), buy (+1% to +5%), hold (-1% to
+# +1%), sell (-5% to -1%), strong sell (-5% or worse)
+STRONG_BUY_RETURN, BUY_RETURN = 5.0, 1.0
+# Column of the confusion matrix counting replies without a rating
+UNRATED = len(RATINGS)
+
+
+def realized_ratings(returns: np.ndarray) -> np.ndarray:
+    """
+    Index into RATINGS of the rating each return earned, -1 where the
+    return is unknown (NaN).
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    ratings = np.select(
+        [
+            returns >= STRONG_BUY_RETURN,
+            returns >= BUY_RETURN,
+            returns > -BUY_RETURN,
+            returns > -STRONG_BUY_RETURN,
+        ],
+        [0, 1, 2, 3],
+        4,
+    )
+    ratings[np.isnan(returns)] = -1
+    return ratings
+
+
+def rating_indices(ratings: list[str]) -> np.ndarray:
+    # Index into RATINGS, UNRATED for "unavailable" and anything else
+    index = {rating: i for i, rating in enumerate(RATINGS)}
+    return np.array([index.get(rating, UNRATED) for rating in ratings], dtype=np.int64)
+
+
+@dataclass
+class ModelScore:
+    model: str
+    # Realized rating (rows, in RATINGS order) x predicted rating (columns,
+    # in RATINGS order, then UNRATED)
+    confusion: np.ndarray
+
+    @classmethod
+    def from_ratings(
+        cls, model: str, predicted: np.ndarray, realized: np.ndarray
+    ) -> "ModelScore":
+        """
+        Score rating indices against realized ones; pairs whose realized
+        rating is unknown are left out.
+        """
+        known = realized >= 0
+        cells = realized[known] * (UNRATED + 1) + predicted[known]
+        confusion = np.bincount(cells, minlength=len(RATINGS) * (UNRATED + 1))
+        return cls(model, confusion.reshape(len(RATINGS), UNRATED + 1))
+
+    @property
+    def snapshots(self) -> int:
+        return int(self.confusion.sum())
+
+    @property
+    def accuracy(self) -> float:
+        return np.trace(self.confusion[:, :UNRATED]) / max(self.snapshots, 1)
+
+    @property
+    def within_one(self) -> float:
+        """
+        Share of ratings at most one class away from the realized one, e.g.
+        buy for a strong buy.
+        """
+        near = sum(
+            self.confusion[i, j]
+            for i in range(len(RATINGS))
+            for j in range(len(RATINGS))
+            if abs(i - j) <= 1
+        )
+        return near / max(self.snapshots, 1)
+
+    @property
+    def unrated(self) -> float:
+        return self.confusion[:, UNRATED].sum() / max(self.snapshots, 1)
+
+    def confusion_rows(self) -> list[list]:
+        # For tabulate, with CONFUSION_HEADERS
+        return [
+            [f"realized {rating}", *counts]
+            for rating, counts in zip(RATINGS, self.confusion.tolist())
+        ]
+
+
+SCORE_HEADERS = ["Model", "Snapshots", "Accuracy", "Within one class", "No rating"]
+CONFUSION_HEADERS = ["", *RATINGS, "no rating"]
+
+
+def score_rows(scores: list[ModelScore]) -> list[list]:
+    """
+    One row per model for tabulate with SCORE_HEADERS, plus the accuracy of
+    always predicting the most common realized rating.
+    """
+    rows = [
+        [
+            score.model,
+            score.snapshots,
+            f"{score.accuracy:.1%}",
+            f"{score.within_one:.1%}",
+            f"{score.unrated:.1%}",
+        ]
+        for score in scores
+    ]
+    if scores:
+        realized = np.sum([score.confusion.sum(axis=1) for score in scores], axis=0)
+        common = int(np.argmax(realized))
+        rows.append(
+            [
+                f"always {RATINGS[common]}",
+                "",
+                f"{realized[common] / max(realized.sum(), 1):.1%}",
+                "",
+                "",
+            ]
+        )
+    return rows
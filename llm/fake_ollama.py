@@ -0,0 +1,327 @@
+"""
+Local stand-in for an Ollama server.
+
+Answers /api/chat like Ollama does, streamed as NDJSON or in one body, with
+a canned JSON rating that is deterministic per model and prompt. Latency is
+a fixed time to first token plus a time per generated token, and at most
+`num_parallel` requests are served at once (like OLLAMA_NUM_PARALLEL); the
+rest queue. At most `max_loaded_models` stay resident (like
+OLLAMA_MAX_LOADED_MODELS); a request for any other model first evicts the
+least recently used one and waits `load_ms`, reported as `load_duration`.
+Models also unload once their `keep_alive` runs out. Like reasoning
+models, replies of deepseek-r1 and qwen3 models think first and keep
+writing after the JSON, unless the request constrains the reply with a
+`format`; `num_predict` cuts replies short and a streamed reply stops when
+the client disconnects. A request without messages only loads the model.
+With `agreement`, each model gives the rating shared by all models for the
+same prompt with that probability, as models tend to agree on strongly
+trending stocks. Used to measure the model scheduling in llm.ollama
+without GPUs:
+
+    python -m llm.fake_ollama --port 11435 --latency-ms 200 --ms-per-token 5 --load-ms 3000 --model-latency-ms deepseek-r1:14b=2000
+    python main.py --tickers=AAPL,MSFT --ollama-url=http://127.0.0.1:11435
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm.settings import MODEL_NAMES
+
+RATINGS = ["strong buy", "buy", "hold", "sell", "strong sell"]
+DEFAULT_KEEP_ALIVE = 300.0
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 makes concurrent clients wait for a SYN retry
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        ms_per_token: float = 0.0,
+        model_latency_ms: dict[str, float] | None = None,
+        num_parallel: int = 4,
+        load_ms: float = 0.0,
+        max_loaded_models: int = 1,
+        models: list[str] | None = None,
+        agreement: float = 0.0,
+    ):
+        super().__init__((host, port), FakeOllamaHandler)
+        self.latency_ms = latency_ms
+        self.ms_per_token = ms_per_token
+        self.model_latency_ms = model_latency_ms or {}
+        self.slots = threading.Semaphore(num_parallel)
+        self.load_ms = load_ms
+        self.max_loaded_models = max_loaded_models
+        # Listed by /api/tags; chat requests are answered for any model name
+        self.models = models or MODEL_NAMES
+        self.agreement = agreement
+        self.requests = 0
+        self.loads = 0
+        self.tokens = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # Resident models and when each one unloads, least recently used first
+        self._loaded = OrderedDict()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def load(self, model: str, keep_alive) -> float:
+        """
+        Make `model` resident, loading it if needed, and return the seconds
+        spent waiting for it.
+        """
+        started = time.perf_counter()
+        with self._load_lock:
+            now = time.monotonic()
+            for name, expires in list(self._loaded.items()):
+                if expires <= now:
+                    del self._loaded[name]
+            if model not in self._loaded:
+                while len(self._loaded) >= self.max_loaded_models:
+                    self._loaded.popitem(last=False)
+                time.sleep(self.load_ms / 1000)
+                self.loads += 1
+            self._loaded[model] = time.monotonic() + parse_keep_alive(keep_alive)
+            self._loaded.move_to_end(model)
+        return time.perf_counter() - started
+
+    def answer(self, model: str, messages: list[dict], constrained: bool = False) -> str:
+        """
+        A reply in the format main.py asks for, chosen by a hash of the
+        model and the conversation. A `constrained` reply is the bare JSON
+        object, as when Ollama enforces a `format`.
+        """
+        seed = hashlib.sha256(json.dumps([model, messages]).encode()).digest()
+        rng = random.Random(seed)
+        rating = rng.choice(RATINGS)
+        if self.agreement and rng.random() < self.agreement:
+            shared = hashlib.sha256(json.dumps(messages).encode()).digest()
+            rating = random.Random(shared).choice(RATINGS)
+        words = rng.choices(
+            ["momentum", "volume", "trend", "support", "resistance", "breakout"], k=40
+        )
+        reasoning = f"The indicators point to {rating}: " + " ".join(words) + "."
+        answer = json.dumps({"reasoning": reasoning, "rating": rating})
+        if not constrained and ("r1" in model or "qwen3" in model):
+            answer = (
+                f"<think>\nWeighing {' '.join(words[:20])}.\n</think>\n\n{answer}"
+                f"\n\nNote that {' '.join(words)}."
+            )
+        return answer
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == "/api/version":
+            return self.reply(200, {"version": "0.0.0-fake"})
+        if self.path == "/api/tags":
+            models = [
+                {
+                    "name": name if ":" in name else f"{name}:latest",
+                    "model": name if ":" in name else f"{name}:latest",
+                    "digest": hashlib.sha256(name.encode()).hexdigest(),
+                }
+                for name in self.server.models
+            ]
+            return self.reply(200, {"models": models})
+        self.reply(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if self.path != "/api/chat":
+            return self.reply(404, {"error": f"Unknown path {self.path}"})
+
+        server = self.server
+        model = body.get("model", "")
+        with server._lock:
+            server.requests += 1
+        with server.slots:
+            load_duration = server.load(model, body.get("keep_alive"))
+            if not body.get("messages"):
+                # Like Ollama, a request without messages only loads the model
+                final = self.message(model, "")
+                final.update(done_reason="load", load_duration=int(load_duration * 1e9))
+                return self.reply(200, final)
+            started = time.perf_counter()
+            latency = server.model_latency_ms.get(model, server.latency_ms)
+            time.sleep(latency / 1000)
+            prompt_eval_duration = time.perf_counter() - started
+
+            tokens = server.answer(
+                model, body.get("messages", []), constrained=bool(body.get("format"))
+            ).split(" ")
+            tokens = [t + " " for t in tokens[:-1]] + tokens[-1:]
+            done_reason = "stop"
+            num_predict = (body.get("options") or {}).get("num_predict")
+            if num_predict is not None and 0 <= num_predict < len(tokens):
+                tokens = tokens[:num_predict]
+                done_reason = "length"
+
+            generated = 0
+            if body.get("stream", True):
+                self.start_stream()
+                try:
+                    for token in tokens:
+                        time.sleep(server.ms_per_token / 1000)
+                        self.write_chunk(self.message(model, token, done=False))
+                        generated += 1
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped reading; stop generating like Ollama
+                    with server._lock:
+                        server.cancelled += 1
+                        server.tokens += generated
+                    self.close_connection = True
+                    return
+            else:
+                time.sleep(server.ms_per_token * len(tokens) / 1000)
+                generated = len(tokens)
+            eval_duration = time.perf_counter() - started - prompt_eval_duration
+            with server._lock:
+                server.tokens += generated
+
+        final = self.message(model, "" if body.get("stream", True) else "".join(tokens))
+        final.update(
+            done_reason=done_reason,
+            total_duration=int(
+                (load_duration + prompt_eval_duration + eval_duration) * 1e9
+            ),
+            load_duration=int(load_duration * 1e9),
+            prompt_eval_count=sum(
+                len(m.get("content", "")) // 4 for m in body.get("messages", [])
+            ),
+            prompt_eval_duration=int(prompt_eval_duration * 1e9),
+            eval_count=generated,
+            eval_duration=int(eval_duration * 1e9),
+        )
+        if not body.get("stream", True):
+            return self.reply(200, final)
+        try:
+            self.write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client had its answer and closed before the final chunk
+            self.close_connection = True
+
+    def message(self, model: str, content: str, done: bool = True) -> dict:
+        return {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }
+
+    def start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def write_chunk(self, body: dict):
+        payload = json.dumps(body).encode() + b"\n"
+        self.wfile.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+
+    def reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def parse_keep_alive(value) -> float:
+    """
+    Seconds a model stays loaded, from Ollama's keep_alive: a number of
+    seconds or a duration like "10m"; negative means forever.
+    """
+    if value is None:
+        return DEFAULT_KEEP_ALIVE
+    if isinstance(value, str):
+        units = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+        for unit in ("ms", "s", "m", "h"):
+            if value.endswith(unit):
+                seconds = float(value[: -len(unit)]) * units[unit]
+                break
+        else:
+            seconds = float(value)
+    else:
+        seconds = float(value)
+    return float("inf") if seconds < 0 else seconds
+
+
+def parse_model_latency(values: list[str]) -> dict[str, float]:
+    latency = {}
+    for value in values:
+        model, _, ms = value.rpartition("=")
+        if not model:
+            raise ValueError(f"Expected MODEL=MS, got {value}")
+        latency[model] = float(ms)
+    return latency
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve canned Ollama chat replies")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Time to first token"
+    )
+    parser.add_argument("--ms-per-token", type=float, default=0.0)
+    parser.add_argument(
+        "--model-latency-ms",
+        action="append",
+        default=[],
+        metavar="MODEL=MS",
+        help="Time to first token of one model, overriding --latency-ms",
+    )
+    parser.add_argument("--num-parallel", type=int, default=4)
+    parser.add_argument(
+        "--load-ms", type=float, default=0.0, help="Time to load a model"
+    )
+    parser.add_argument("--max-loaded-models", type=int, default=1)
+    parser.add_argument(
+        "--agreement",
+        type=float,
+        default=0.0,
+        help="Probability that a model gives the rating shared by all models",
+    )
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        ms_per_token=args.ms_per_token,
+        model_latency_ms=parse_model_latency(args.model_latency_ms),
+        num_parallel=args.num_parallel,
+        load_ms=args.load_ms,
+        max_loaded_models=args.max_loaded_models,
+        agreement=args.agreement,
+    )
+    print(f"Fake Ollama on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,394 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+import ollama
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_ollama import ChatOllama
+
+from llm.answer import ANSWER_SCHEMA, AnswerStream
+from llm.response_cache import ResponseCache, response_key
+from llm.settings import (
+    DEFAULT_KEEP_ALIVE,
+    DEFAULT_OLLAMA_URL,
+    MODEL_NAMES,
+    SYSTEM_PROMPT,
+)
+from llm.telemetry import CallMetrics, Telemetry
+
+# Maximum tokens a model may generate per reply (num_predict). Reasoning
+# models think before answering and get a larger budget.
+DEFAULT_MAX_TOKENS = 1024
+MAX_TOKENS = {
+    "qwen3:14b": 4096,
+    "deepseek-r1:14b": 4096,
+}
+# A call whose load_duration exceeds this had to load the model weights;
+# calls to a resident model report a few milliseconds
+LOAD_THRESHOLD_SECONDS = 0.5
+
+
+@dataclass
+class ModelLoadStats:
+    calls: dict[str, int] = field(default_factory=dict)
+    # (start, end, model) of the time each call spent waiting for its model
+    load_intervals: list[tuple[float, float, str]] = field(default_factory=list)
+
+    def record(self, model_name: str, started: float, load_seconds: float):
+        self.calls[model_name] = self.calls.get(model_name, 0) + 1
+        if load_seconds > LOAD_THRESHOLD_SECONDS:
+            self.load_intervals.append((started, started + load_seconds, model_name))
+
+    @property
+    def load_cost(self) -> dict[str, float]:
+        """
+        Seconds to load each model, from the waits that did not overlap a
+        wait for another model (those include loading the other model too).
+        """
+        cost = {}
+        for a, b, model_name in self.load_intervals:
+            if any(
+                other != model_name and c < b and a < d
+                for c, d, other in self.load_intervals
+            ):
+                continue
+            cost[model_name] = min(cost.get(model_name, b - a), b - a)
+        return cost
+
+    @property
+    def load_seconds(self) -> float:
+        """
+        Wall-clock time during which at least one call waited for a load.
+        """
+        total, end = 0.0, float("-inf")
+        for a, b, _ in sorted(self.load_intervals):
+            total += max(b - max(a, end), 0.0)
+            end = max(end, b)
+        return total
+
+    @property
+    def saved_seconds(self) -> float:
+        """
+        Estimated load time saved compared to loading the model on every
+        call, as happens when consecutive calls alternate between models
+        that do not fit in memory together.
+        """
+        every_call = sum(
+            self.calls[model_name] * cost
+            for model_name, cost in self.load_cost.items()
+        )
+        return max(every_call - self.load_seconds, 0.0)
+
+    def __str__(self) -> str:
+        return (
+            f"model loads: {sum(self.calls.values())} calls, "
+            f"{self.load_seconds:.1f}s waiting for loads, "
+            f"~{self.saved_seconds:.1f}s saved vs loading on every call"
+        )
+
+
+class OllamaScheduler:
+    """
+    Runs chat calls against one or more Ollama endpoints concurrently.
+
+    At most `max_concurrency` calls are in flight overall and at most
+    `max_per_endpoint` per endpoint; each call goes to the endpoint with the
+    fewest calls in flight. Calls beyond the limits wait in the order they
+    were made, so with the default of one call at a time the models run one
+    after another as before.
+
+    Every call passes `keep_alive` to Ollama, and the `load_duration` it
+    reports is summed up in `stats`.
+
+    With a `cache`, replies are looked up by model name and digest, system
+    message, prompt, temperature, seed and token budget before any call is
+    made.
+
+    Replies are capped at `max_tokens` per model (MAX_TOKENS by default).
+    With `stream`, they are read token by token and generation is cancelled
+    as soon as a complete JSON answer has been seen; the reply then ends
+    with that answer.
+
+    Replies are constrained to `answer_format` (Ollama's `format`), by
+    default the JSON schema of a {reasoning, rating} answer, so a model
+    cannot reply with text that has no answer in it.
+
+    With `telemetry`, the timings of every call (wall-clock, time to first
+    token, and the load, prefill and generation durations Ollama reports)
+    are recorded there, cache hits included.
+    """
+
+    def __init__(
+        self,
+        base_urls: list[str] | None = None,
+        max_concurrency: int = 1,
+        max_per_endpoint: int | None = None,
+        temperature: float = 0.6,
+        keep_alive: str | int | None = DEFAULT_KEEP_ALIVE,
+        seed: int | None = None,
+        cache: ResponseCache | None = None,
+        max_tokens: dict[str, int] | None = None,
+        stream: bool = False,
+        answer_format: dict | None = ANSWER_SCHEMA,
+        telemetry: Telemetry | None = None,
+    ):
+        self.base_urls = base_urls or [DEFAULT_OLLAMA_URL]
+        self.temperature = temperature
+        self.keep_alive = keep_alive
+        self.seed = seed
+        self.cache = cache
+        self.max_tokens = {**MAX_TOKENS, **(max_tokens or {})}
+        self.stream = stream
+        self.answer_format = answer_format
+        self.telemetry = telemetry
+        self.stats = ModelLoadStats()
+        self.early_stops = 0
+        self._clients = {}
+        self._digests = {}
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._endpoint_slots = {
+            url: asyncio.Semaphore(max_per_endpoint or max_concurrency)
+            for url in self.base_urls
+        }
+        self._in_flight = dict.fromkeys(self.base_urls, 0)
+        self._chats = {}
+
+    async def chat(self, model_name: str, base_url: str) -> ChatOllama:
+        # One client per model and endpoint, so HTTP connections are reused.
+        # Creating one loads TLS certificates, so it runs off the event loop.
+        key = (model_name, base_url)
+        if key not in self._chats:
+            self._chats[key] = asyncio.ensure_future(
+                asyncio.to_thread(
+                    ChatOllama,
+                    model=model_name,
+                    base_url=base_url,
+                    temperature=self.temperature,
+                    keep_alive=self.keep_alive,
+                    seed=self.seed,
+                    num_predict=self.token_budget(model_name),
+                    format=self.answer_format,
+                )
+            )
+        return await self._chats[key]
+
+    def token_budget(self, model_name: str) -> int:
+        return self.max_tokens.get(model_name, DEFAULT_MAX_TOKENS)
+
+    async def model_digest(self, model_name: str) -> str:
+        """
+        Digest of a model as listed by the first endpoint that has it, or ""
+        if none does.
+        """
+        for base_url in self.base_urls:
+            if base_url not in self._digests:
+                self._digests[base_url] = asyncio.ensure_future(
+                    self._list_digests(base_url)
+                )
+            digests = await self._digests[base_url]
+            # Ollama lists models with their tag, e.g. "llama3.1:latest"
+            digest = digests.get(model_name) or digests.get(f"{model_name}:latest")
+            if digest:
+                return digest
+        return ""
+
+    async def _list_digests(self, base_url: str) -> dict[str, str]:
+        try:
+            listed = await (await self.client(base_url)).list()
+        except Exception:
+            return {}
+        return {model.model: model.digest for model in listed.models}
+
+    async def client(self, base_url: str) -> ollama.AsyncClient:
+        # Plain Ollama client of an endpoint, for model listings and streaming
+        if base_url not in self._clients:
+            self._clients[base_url] = asyncio.ensure_future(
+                asyncio.to_thread(ollama.AsyncClient, host=base_url)
+            )
+        return await self._clients[base_url]
+
+    async def warm_up(self, model_names: list[str]):
+        """
+        Load the models on every endpoint and create their clients, so the
+        first calls only wait for generation. Ollama loads a model without
+        generating anything for a chat request without messages, and keeps
+        it loaded for `keep_alive`.
+        """
+
+        async def load(model_name: str, base_url: str):
+            await self.chat(model_name, base_url)
+            client = await self.client(base_url)
+            await client.chat(model=model_name, messages=[], keep_alive=self.keep_alive)
+
+        await asyncio.gather(*(self.model_digest(name) for name in model_names))
+        # One model at a time, as they compete for memory bandwidth while loading
+        for model_name in model_names:
+            await asyncio.gather(*(load(model_name, url) for url in self.base_urls))
+
+    async def invoke(
+        self, model_name: str, prompt: str, system: str = SYSTEM_PROMPT
+    ) -> str:
+        called = time.time()
+        queued = time.monotonic()
+        if self.cache is not None:
+            key = response_key(
+                model_name,
+                await self.model_digest(model_name),
+                system,
+                prompt,
+                self.temperature,
+                self.seed,
+                self.token_budget(model_name),
+                self.answer_format,
+            )
+            content = self.cache.get(key)
+            if content is not None:
+                if self.telemetry is not None:
+                    self.telemetry.record(
+                        CallMetrics(model_name, None, called, cached=True)
+                    )
+                return content
+
+        async with self._slots:
+            base_url = min(self.base_urls, key=self._in_flight.get)
+            self._in_flight[base_url] += 1
+            try:
+                async with self._endpoint_slots[base_url]:
+                    if self.stream:
+                        client = await self.client(base_url)
+                        started = time.monotonic()
+                        content, metadata, ttft = await self._stream(
+                            client, model_name, prompt, system
+                        )
+                    else:
+                        chat = await self.chat(model_name, base_url)
+                        started = time.monotonic()
+                        # Aggregating a streamed reply chunk by chunk costs
+                        # event loop time across all concurrent calls
+                        response = await chat.ainvoke(
+                            [
+                                SystemMessage(content=system),
+                                HumanMessage(content=prompt),
+                            ],
+                            stream=False,
+                        )
+                        content = response.content
+                        metadata = response.response_metadata
+                        ttft = None
+                    wall = time.monotonic() - started
+            finally:
+                self._in_flight[base_url] -= 1
+
+        # A reply cancelled early has no final chunk with load_duration
+        load_seconds = metadata.get("load_duration", 0) / 1e9
+        self.stats.record(model_name, started, load_seconds)
+        if self.telemetry is not None:
+            if ttft is None and metadata.get("eval_duration") is not None:
+                # The reply came in one piece; generation started this
+                # long before it was complete
+                ttft = max(wall - metadata["eval_duration"] / 1e9, 0.0)
+            self.telemetry.record(
+                CallMetrics.from_ollama(
+                    metadata,
+                    model=model_name,
+                    endpoint=base_url,
+                    started=called,
+                    early_stop=metadata.get("early_stop", False),
+                    queued_seconds=started - queued,
+                    wall_seconds=wall,
+                    ttft_seconds=ttft,
+                )
+            )
+        if self.cache is not None:
+            self.cache.put(key, model_name, content)
+        return content
+
+    async def _stream(
+        self, client: ollama.AsyncClient, model_name: str, prompt: str, system: str
+    ) -> tuple[str, dict, float | None]:
+        """
+        Stream a reply until its JSON answer is complete. Returns the reply,
+        the fields of Ollama's final chunk and the seconds to the first
+        token. A reply cancelled early gets no final chunk; its generated
+        tokens and their duration are then counted here.
+        """
+        # Uses the Ollama client directly: ChatOllama.astream nests several
+        # generators, and cancelling it mid-reply leaves the innermost one
+        # (which holds the HTTP response) open until the event loop closes
+        options = {
+            "temperature": self.temperature,
+            "seed": self.seed,
+            "num_predict": self.token_budget(model_name),
+        }
+        started = time.monotonic()
+        parts = await client.chat(
+            model=model_name,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            stream=True,
+            options={key: value for key, value in options.items() if value is not None},
+            format=self.answer_format,
+            keep_alive=self.keep_alive,
+        )
+        answer = AnswerStream()
+        metadata = {}
+        first = last = None
+        chunks = 0
+        try:
+            async for part in parts:
+                if part.done:
+                    metadata = part.model_dump(exclude={"message"})
+                if part.message.content:
+                    last = time.monotonic()
+                    first = first or last
+                    chunks += 1
+                if answer.feed(part.message.content or ""):
+                    self.early_stops += 1
+                    break
+        finally:
+            # Closes the HTTP response, which makes Ollama stop generating
+            await parts.aclose()
+        if not metadata.get("done"):
+            # Ollama sends one chunk per token
+            metadata = {"early_stop": True, "eval_count": chunks}
+            if first is not None and last > first:
+                metadata["eval_duration"] = (last - first) * 1e9
+        ttft = first - started if first is not None else None
+        return answer.text[: answer.end], metadata, ttft
+
+    async def analyze(
+        self, prompt: str, model_names: list[str], system: str = SYSTEM_PROMPT
+    ) -> dict[str, str]:
+        """
+        Run one prompt through every model concurrently; returns the reply
+        of each model keyed by model name.
+        """
+        contents = await asyncio.gather(
+            *(self.invoke(model_name, prompt, system) for model_name in model_names)
+        )
+        return dict(zip(model_names, contents))
+
+    async def analyze_by_model(
+        self,
+        prompts: dict[str, str],
+        model_names: list[str],
+        system: str = SYSTEM_PROMPT,
+    ) -> dict[str, dict[str, str]]:
+        """
+        Run every prompt through one model before moving on to the next, so
+        each model is loaded once instead of once per prompt. Returns the
+        replies keyed by prompt key (e.g. ticker) and then by model name.
+        """
+        results = {key: {} for key in prompts}
+        for model_name in model_names:
+            contents = await asyncio.gather(
+                *(
+                    self.invoke(model_name, prompt, system)
+                    for prompt in prompts.values()
+                )
+            )
+            for key, content in zip(prompts, contents):
+                results[key][model_name] = content
+        return results
@@ -0,0 +1,53 @@
+from data.settings import PROMPT_FORMATS
+from llm.settings import SYSTEM_PROMPT
+
+# Ticker-independent, so with the compact format it goes into the system
+# message: every prompt then starts with the same prefix, which Ollama
+# evaluates once per model instead of once per ticker
+COMPACT_INSTRUCTIONS = """Each prompt gives a stock's key statistics and technical indicators as key=value pairs \
+(SMA20 = 20-day SMA, RSI14 = 14-day RSI, BB = Bollinger Bands, pos = position within band, \
+VI = Vortex, UO = Ultimate Oscillator, EoM = Ease of Movement, FI = Force Index, VPT = Volume Price Trend). \
+Rate its performance within the next 5 trading days: strong buy (+5% or better), buy (+1% to +5%), \
+hold (-1% to +1%), sell (-5% to -1%), or strong sell (-5% or worse). \
+Answer only with a JSON object with 'reasoning' (your thought process) and 'rating'."""
+
+
+def system_prompt(prompt_format: str = "verbose") -> str:
+    _check_format(prompt_format)
+    if prompt_format == "compact":
+        return f"{SYSTEM_PROMPT}\n{COMPACT_INSTRUCTIONS}"
+    return SYSTEM_PROMPT
+
+
+def chat_messages(prompt: str, prompt_format: str = "verbose") -> list[dict]:
+    # The messages a model is called with, for models run with a chat template
+    return [
+        {"role": "system", "content": system_prompt(prompt_format)},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def ticker_prompt(ticker: str, price_prompt: str, prompt_format: str = "verbose") -> str:
+    """
+    The user message for one ticker around its rendered price section.
+    """
+    _check_format(prompt_format)
+    if prompt_format == "compact":
+        return f"{ticker}\n{price_prompt}"
+    return f"""{ticker} Stock Analysis{price_prompt}
+### Instructions: for stock {ticker}, review `Key Statistics` and `Technical Indicators`, and provide a \
+rating to predict its stock performance within the next 5 trading days. The rating should be strong buy \
+(+5% or better), buy (+1% to +5%), hold (-1% to +1%), sell (-5% to -1%), or strong sell (-5% or worse). 
+
+Your answer should only contain a JSON object with the following two keywords:
+'reasoning': a detailed description of your thought process for the rating
+'rating': strong buy, buy, hold, sell, or strong sell
+Please DO NOT output anything outside the JSON.
+"""
+
+
+def _check_format(prompt_format: str):
+    if prompt_format not in PROMPT_FORMATS:
+        raise ValueError(
+            f"Unknown prompt format {prompt_format}, expected one of {PROMPT_FORMATS}"
+        )
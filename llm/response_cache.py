@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class ResponseCacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"response cache: {self.hits} hits, {self.misses} misses "
+            f"({self.hit_rate:.0%} hit rate, {self.expired} expired)"
+        )
+
+
+def response_key(
+    model_name: str,
+    model_digest: str,
+    system: str,
+    prompt: str,
+    temperature: float | None,
+    seed: int | None,
+    max_tokens: int | None = None,
+    answer_format: dict | None = None,
+) -> str:
+    """
+    Cache key of a model reply. A model pulled again under the same name
+    gets a new digest, so its replies are not served from the cache.
+    Replies constrained to a format are kept apart from unconstrained ones.
+    """
+    prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+    parts = [
+        model_name,
+        model_digest,
+        system,
+        prompt_hash,
+        temperature,
+        seed,
+        max_tokens,
+        answer_format,
+    ]
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk store of model replies keyed by response_key().
+
+    Replies older than `ttl_seconds` are treated as missing and replaced by
+    the next call; without a TTL they are kept until `clear()`.
+    """
+
+    def __init__(
+        self, path: str = ".cache/responses.sqlite", ttl_seconds: float | None = None
+    ):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.stats = ResponseCacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+            """
+        )
+
+    def close(self):
+        self._conn.close()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds is not None:
+                if row[1] < time.time() - self.ttl_seconds:
+                    self.stats.expired += 1
+                    row = None
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            return row[0]
+
+    def put(self, key: str, model_name: str, content: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, content, created) "
+                "VALUES (?, ?, ?, ?)",
+                (key, model_name, content, time.time()),
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
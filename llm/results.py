@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import threading
+import time
+
+from llm.answer import parse_answer
+from llm.settings import MODEL_NAMES
+
+# Rating stored for a model the quorum did not ask, as the rating was settled
+SKIPPED = "skipped"
+
+
+def in_model_order(contents: dict[str, str]) -> dict[str, str | None]:
+    # Models the quorum skipped get None
+    return {model_name: contents.get(model_name) for model_name in MODEL_NAMES}
+
+
+class ResultsStore:
+    """
+    On-disk store of each model's reply per ticker and end date, written as
+    soon as the reply arrives so an interrupted run can be resumed and its
+    summary rendered again without calling the models. A model the quorum
+    skipped gets a row with the SKIPPED rating, so a report can tell it
+    from a model that was never run.
+    """
+
+    def __init__(self, path: str = ".cache/results.sqlite"):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                ticker TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_format TEXT NOT NULL,
+                rating TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (ticker, end_date, model)
+            )
+            """
+        )
+
+    def close(self):
+        self._conn.close()
+
+    def put(
+        self,
+        ticker: str,
+        end_date: str,
+        model_name: str,
+        content: str,
+        prompt_format: str = "verbose",
+    ):
+        rating = parse_answer(content)[0]
+        self._insert(
+            "INSERT OR REPLACE",
+            ticker,
+            end_date,
+            model_name,
+            prompt_format,
+            rating,
+            content,
+        )
+
+    def put_skipped(
+        self,
+        ticker: str,
+        end_date: str,
+        model_name: str,
+        prompt_format: str = "verbose",
+    ):
+        # Never replaces a reply the model gave in an earlier run
+        self._insert(
+            "INSERT OR IGNORE",
+            ticker,
+            end_date,
+            model_name,
+            prompt_format,
+            SKIPPED,
+            "",
+        )
+
+    def _insert(self, statement: str, *values):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"{statement} INTO results "
+                "(ticker, end_date, model, prompt_format, rating, content, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*values, time.time()),
+            )
+
+    def get(self, ticker: str, end_date: str, model_name: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM results "
+                "WHERE ticker = ? AND end_date = ? AND model = ? AND rating != ?",
+                (ticker, end_date, model_name, SKIPPED),
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def results(
+        self, end_date: str, tickers: list[str] | None = None
+    ) -> dict[str, dict[str, str | None]]:
+        """
+        Stored replies of an end date keyed by ticker and then by model name,
+        for all tickers or the given ones. Models the quorum skipped get
+        None; models without a row are left out.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ticker, model, rating, content FROM results "
+                "WHERE end_date = ? ORDER BY ticker, created",
+                (end_date,),
+            ).fetchall()
+        results = {ticker: {} for ticker in tickers or []}
+        for ticker, model_name, rating, content in rows:
+            if tickers is None or ticker in results:
+                results.setdefault(ticker, {})[model_name] = (
+                    None if rating == SKIPPED else content
+                )
+        return results
+
+    def ratings(
+        self,
+        start_date: str,
+        end_date: str,
+        tickers: list[str] | None = None,
+        skipped: bool = False,
+    ) -> list[tuple[str, str, str, str]]:
+        """
+        (ticker, end date, model, rating) of every stored reply with an end
+        date in the range, for all tickers or the given ones. With
+        `skipped`, the rows of models the quorum skipped are included.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ticker, end_date, model, rating FROM results "
+                "WHERE end_date BETWEEN ? AND ? AND (? OR rating != ?) "
+                "ORDER BY end_date, ticker",
+                (start_date, end_date, skipped, SKIPPED),
+            ).fetchall()
+        if tickers is None:
+            return rows
+        tickers = set(tickers)
+        return [row for row in rows if row[0] in tickers]
@@ -0,0 +1,215 @@
+"""
+GRPO rewards for the rating task, computed for a whole batch of completions
+at once.
+
+Each completion is parsed once. The reward is a weighted sum of components
+computed over the batch with numpy:
+
+- "accuracy": minus the number of rating classes between the rating and the
+  realized one, capped at 2 (a reply without a rating gets -2).
+- "format": 1 when the reply, after any think blocks, is exactly the JSON
+  answer main.py asks for (both keys, a valid rating), else 0.
+- "distance": minus how far, in units of DISTANCE_SCALE percent, the realized
+  5-day return is from the range of returns the rating stands for, capped
+  at 2. A "buy" for a +5.2% week costs 0.04, not a whole class.
+
+TRL passes the dataset's other columns as keyword arguments, so `answer` and
+`forward_return` come from the shards build_dataset.py writes.
+"""
+
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from llm.answer import ANSWER_KEYS, RATINGS, _strip_think, parse_answer
+from llm.evaluation import BUY_RETURN, STRONG_BUY_RETURN, UNRATED
+
+COMPONENTS = ("accuracy", "format", "distance")
+# Percent of return that costs one point of the distance reward
+DISTANCE_SCALE = 5.0
+# Lowest reward of the accuracy and distance components
+MAX_PENALTY = 2.0
+
+_INDEX = {rating: i for i, rating in enumerate(RATINGS)}
+_ANSWER_KEYS = set(ANSWER_KEYS)
+# Range of realized returns in percent that each rating stands for
+_BOUNDS = np.array(
+    [np.inf, STRONG_BUY_RETURN, BUY_RETURN, -BUY_RETURN, -STRONG_BUY_RETURN, -np.inf]
+)
+_LOWER, _UPPER = _BOUNDS[1:], _BOUNDS[:-1]
+
+
+def completion_text(completion) -> str:
+    # TRL passes conversational completions as lists of messages
+    if isinstance(completion, str):
+        return completion
+    return "".join(message["content"] for message in completion)
+
+
+def parse_completions(completions: list) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Index into RATINGS of each completion's rating (UNRATED if it has none)
+    and whether the completion is exactly the JSON answer.
+    """
+    ratings, well_formed = [], []
+    for completion in completions:
+        text = completion_text(completion)
+        body = text.strip()
+        if "<think>" in body:
+            body = _strip_think(body).strip()
+        if body[:1] == "{" and body[-1:] == "}":
+            try:
+                data = json.loads(body)
+            except ValueError:
+                data = None
+            if isinstance(data, dict) and data.keys() >= _ANSWER_KEYS:
+                rating = _INDEX.get(str(data["rating"]).strip().lower(), UNRATED)
+                ratings.append(rating)
+                well_formed.append(rating != UNRATED)
+                continue
+        ratings.append(_INDEX.get(parse_answer(text)[0], UNRATED))
+        well_formed.append(False)
+    return np.array(ratings, dtype=np.int64), np.array(well_formed, dtype=bool)
+
+
+def accuracy_rewards(ratings: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    distance = np.abs(ratings - labels).astype(np.float64)
+    distance[ratings == UNRATED] = MAX_PENALTY
+    return -np.minimum(distance, MAX_PENALTY)
+
+
+def distance_rewards(ratings: np.ndarray, returns: np.ndarray) -> np.ndarray:
+    rated = ratings != UNRATED
+    index = np.where(rated, ratings, 0)
+    outside = np.maximum(_LOWER[index] - returns, returns - _UPPER[index])
+    rewards = -np.minimum(np.maximum(outside, 0.0) / DISTANCE_SCALE, MAX_PENALTY)
+    rewards[~rated] = -MAX_PENALTY
+    return rewards
+
+
+class RewardLog:
+    """
+    Appends one JSON line per scored batch to a file: the mean of each
+    component, the share of replies without a rating and the rating counts.
+    A `sample_rate` share of the completions is written along with them, so
+    the replies can be read without printing every one.
+    """
+
+    def __init__(self, path: str, sample_rate: float = 0.01, seed: int = 0):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.sample_rate = sample_rate
+        self._rng = random.Random(seed)
+        self._file = open(path, "a")
+
+    def close(self):
+        self._file.close()
+
+    def record(
+        self,
+        batch: int,
+        seconds: float,
+        completions: list,
+        answers: list[str],
+        ratings: np.ndarray,
+        rewards: np.ndarray,
+        components: dict[str, np.ndarray],
+    ):
+        counts = np.bincount(ratings, minlength=UNRATED + 1)
+        entry = {
+            "batch": batch,
+            "time": time.time(),
+            "completions": len(completions),
+            "seconds": seconds,
+            "reward": float(rewards.mean()),
+            "reward_std": float(rewards.std()),
+            **{name: float(values.mean()) for name, values in components.items()},
+            "unrated": float(counts[UNRATED] / len(completions)),
+            "ratings": dict(zip(RATINGS, counts[:UNRATED].tolist())),
+            "samples": [
+                {
+                    "completion": completion_text(completions[i]),
+                    "answer": answers[i],
+                    "rating": RATINGS[ratings[i]] if ratings[i] < UNRATED else None,
+                    "reward": float(rewards[i]),
+                }
+                for i in range(len(completions))
+                if self._rng.random() < self.sample_rate
+            ],
+        }
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+
+class RatingReward:
+    """
+    Reward function for trl's GRPOTrainer: the weighted sum of the given
+    components for each completion.
+    """
+
+    # GRPOTrainer names the reward in its logs after the function
+    __name__ = "rating_reward"
+
+    def __init__(
+        self,
+        weights: dict[str, float] | None = None,
+        log: RewardLog | None = None,
+    ):
+        self.weights = weights or {"accuracy": 1.0}
+        unknown = set(self.weights) - set(COMPONENTS)
+        if unknown:
+            raise ValueError(f"Unknown reward components: {', '.join(sorted(unknown))}")
+        self.log = log
+        self.batches = 0
+
+    def score(
+        self,
+        completions: list,
+        answer: list[str],
+        forward_return: list[float] | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, dict[str, np.ndarray]]:
+        """
+        Rating indices, rewards and the unweighted components of a batch.
+        """
+        ratings, well_formed = parse_completions(completions)
+        labels = np.array([_INDEX[label] for label in answer], dtype=np.int64)
+        components = {}
+        if "accuracy" in self.weights:
+            components["accuracy"] = accuracy_rewards(ratings, labels)
+        if "format" in self.weights:
+            components["format"] = well_formed.astype(np.float64)
+        if "distance" in self.weights:
+            if forward_return is None:
+                raise ValueError("The distance reward needs forward_return")
+            returns = np.asarray(forward_return, dtype=np.float64)
+            components["distance"] = distance_rewards(ratings, returns)
+        rewards = sum(
+            self.weights[name] * values for name, values in components.items()
+        )
+        return ratings, rewards, components
+
+    def __call__(
+        self,
+        prompts: list,
+        completions: list,
+        answer: list[str],
+        forward_return: list[float] | None = None,
+        **kwargs,
+    ) -> list[float]:
+        started = time.perf_counter()
+        ratings, rewards, components = self.score(completions, answer, forward_return)
+        if self.log is not None:
+            self.log.record(
+                self.batches,
+                time.perf_counter() - started,
+                completions,
+                answer,
+                ratings,
+                rewards,
+                components,
+            )
+        self.batches += 1
+        return rewards.tolist()
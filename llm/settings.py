@@ -0,0 +1,18 @@
+# Constants the command-line scripts need before any model is called. Kept
+# apart from llm.ollama, which imports langchain and the Ollama client, so
+# that parsing arguments or printing a report stays fast.
+
+DEFAULT_OLLAMA_URL = "http://localhost:11434"  # Default for local Ollama
+MODEL_NAMES = [
+    "llama3.1",
+    "gemma3:12b",
+    "mistral-nemo:12b",
+    "qwen3:14b",
+    "deepseek-r1:14b",
+]
+SYSTEM_PROMPT = "You are a helpful trading analyst. Your job is to predict how a stock performs in the next 5 trading days."
+# How long Ollama keeps a model loaded after a call; covers the gaps
+# between calls of a model-major pass
+DEFAULT_KEEP_ALIVE = "10m"
+# Port of the analyst service started with main.py --serve
+DEFAULT_PORT = 8700
@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+
+# Durations in Ollama's chat responses
+DURATIONS = ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")
+
+
+@dataclass
+class CallMetrics:
+    """
+    Timings of one model call. Durations are in seconds; the ones Ollama
+    reports are None for cached replies, and for streamed replies cancelled
+    early they are measured on the client (Ollama sends them with the final
+    chunk, which a cancelled reply does not get).
+    """
+
+    model: str
+    endpoint: str | None
+    # Unix time the call was made
+    started: float
+    cached: bool = False
+    early_stop: bool = False
+    done_reason: str | None = None
+    # Waiting for a free slot in the scheduler
+    queued_seconds: float = 0.0
+    # From sending the request to having the whole reply
+    wall_seconds: float = 0.0
+    # From sending the request to the first generated token
+    ttft_seconds: float | None = None
+    total_duration: float | None = None
+    load_duration: float | None = None
+    prompt_eval_count: int | None = None
+    prompt_eval_duration: float | None = None
+    eval_count: int | None = None
+    eval_duration: float | None = None
+
+    @property
+    def prefill_tokens_per_second(self) -> float | None:
+        if not self.prompt_eval_count or not self.prompt_eval_duration:
+            return None
+        return self.prompt_eval_count / self.prompt_eval_duration
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        if not self.eval_count or not self.eval_duration:
+            return None
+        return self.eval_count / self.eval_duration
+
+    @classmethod
+    def from_ollama(cls, metadata: dict, **fields) -> "CallMetrics":
+        """
+        Metrics from the fields of Ollama's final chat chunk; durations
+        there are in nanoseconds.
+        """
+        for name in DURATIONS:
+            if metadata.get(name) is not None:
+                fields.setdefault(name, metadata[name] / 1e9)
+        for name in ("prompt_eval_count", "eval_count", "done_reason"):
+            if metadata.get(name) is not None:
+                fields.setdefault(name, metadata[name])
+        return cls(**fields)
+
+
+class Telemetry:
+    """
+    Collects the CallMetrics of a run and appends each one to a JSONL file
+    as it is recorded.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.calls = []
+        self._lock = threading.Lock()
+        self._file = None
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "a")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record(self, metrics: CallMetrics):
+        with self._lock:
+            self.calls.append(metrics)
+            if self._file is not None:
+                self._file.write(json.dumps(asdict(metrics)) + "\n")
+                self._file.flush()
+
+    def by_model(self) -> dict[str, list[CallMetrics]]:
+        calls = {}
+        for metrics in self.calls:
+            calls.setdefault(metrics.model, []).append(metrics)
+        return calls
+
+    def summary_rows(self) -> list[list]:
+        """
+        One row per model, in the order the models were first called, with
+        the columns of SUMMARY_HEADERS. Cached replies only count as calls.
+        """
+        total_wall = sum(m.wall_seconds for m in self.calls if not m.cached)
+        rows = []
+        for model, calls in self.by_model().items():
+            served = [m for m in calls if not m.cached]
+            wall = np.array([m.wall_seconds for m in served])
+            ttft = [m.ttft_seconds for m in served if m.ttft_seconds is not None]
+            prefill = _rate(served, "prompt_eval_count", "prompt_eval_duration")
+            generate = _rate(served, "eval_count", "eval_duration")
+            rows.append(
+                [
+                    model,
+                    f"{len(calls)} ({len(calls) - len(served)} cached)",
+                    f"{np.percentile(wall, 50):.2f}" if served else "-",
+                    f"{np.percentile(wall, 95):.2f}" if served else "-",
+                    f"{np.mean(ttft):.2f}" if ttft else "-",
+                    f"{sum(m.load_duration or 0.0 for m in served):.1f}",
+                    f"{prefill:.0f}" if prefill else "-",
+                    f"{generate:.1f}" if generate else "-",
+                    f"{wall.sum() / total_wall:.0%}" if total_wall else "-",
+                ]
+            )
+        return rows
+
+    def write_prometheus(self, path: str, prefix: str = "ai_trading_analyst_llm"):
+        """
+        Write per-model totals of the run in the Prometheus text format, for
+        node_exporter's textfile collector. The file is replaced atomically.
+        """
+        metrics = {
+            "calls": ("Model calls", lambda m: 1),
+            "cached_calls": ("Calls answered from the cache", lambda m: m.cached),
+            "wall_seconds": ("Wall-clock seconds of calls", lambda m: m.wall_seconds),
+            "queued_seconds": ("Seconds waiting for a slot", lambda m: m.queued_seconds),
+            "ttft_seconds": ("Seconds to the first token", lambda m: m.ttft_seconds),
+            "load_seconds": ("Seconds loading the model", lambda m: m.load_duration),
+            "prompt_eval_seconds": (
+                "Seconds evaluating prompts",
+                lambda m: m.prompt_eval_duration,
+            ),
+            "prompt_tokens": ("Prompt tokens evaluated", lambda m: m.prompt_eval_count),
+            "eval_seconds": ("Seconds generating", lambda m: m.eval_duration),
+            "eval_tokens": ("Tokens generated", lambda m: m.eval_count),
+        }
+        lines = []
+        by_model = self.by_model()
+        for name, (help_text, value) in metrics.items():
+            lines.append(f"# HELP {prefix}_{name} {help_text} in the last run")
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            for model, calls in by_model.items():
+                total = sum(float(value(m) or 0) for m in calls)
+                lines.append(f'{prefix}_{name}{{model="{model}"}} {total}')
+        lines.append(f"# HELP {prefix}_last_run_timestamp_seconds End of the last run")
+        lines.append(f"# TYPE {prefix}_last_run_timestamp_seconds gauge")
+        lines.append(f"{prefix}_last_run_timestamp_seconds {time.time()}")
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+
+def mean_wall_seconds(path: str) -> dict[str, float]:
+    """
+    Mean wall-clock seconds per call of each model in a metrics JSONL file,
+    over the calls that were not answered from the cache.
+    """
+    totals = {}
+    if not os.path.exists(path):
+        return totals
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run that was killed mid-write
+                continue
+            if record.get("cached") or not record.get("wall_seconds"):
+                continue
+            total, count = totals.get(record["model"], (0.0, 0))
+            totals[record["model"]] = (total + record["wall_seconds"], count + 1)
+    return {model: total / count for model, (total, count) in totals.items()}
+
+
+SUMMARY_HEADERS = [
+    "Model",
+    "Calls",
+    "Wall p50 (s)",
+    "Wall p95 (s)",
+    "TTFT (s)",
+    "Load (s)",
+    "Prefill tok/s",
+    "Gen tok/s",
+    "Share of call time",
+]
+
+
+def _rate(calls: list[CallMetrics], count: str, duration: str) -> float | None:
+    # Tokens per second over all calls that report both values
+    tokens = seconds = 0
+    for metrics in calls:
+        if getattr(metrics, count) and getattr(metrics, duration):
+            tokens += getattr(metrics, count)
+            seconds += getattr(metrics, duration)
+    return tokens / seconds if seconds else None
@@ -0,0 +1,67 @@
+import re
+
+# Hugging Face repositories with the tokenizer of each Ollama model
+TOKENIZERS = {
+    "llama3.1": "meta-llama/Llama-3.1-8B-Instruct",
+    "gemma3:12b": "google/gemma-3-12b-it",
+    "mistral-nemo:12b": "mistralai/Mistral-Nemo-Instruct-2407",
+    "qwen3:14b": "Qwen/Qwen3-14B",
+    "deepseek-r1:14b": "deepseek-ai/DeepSeek-R1-Distill-Qwen-14B",
+}
+# Tokenizers that split numbers into single digits rather than groups of up
+# to three; numbers make up most of a price prompt
+SINGLE_DIGIT_MODELS = ("gemma", "qwen", "deepseek-r1")
+
+_PIECES = re.compile(r" ?[A-Za-z]+| ?\d{1,3}| ?[^\sA-Za-z\d]+|\s+")
+_SINGLE_DIGIT_PIECES = re.compile(r" ?[A-Za-z]+|\d| ?[^\sA-Za-z\d]+|\s+")
+
+
+class TokenCounter:
+    """
+    Counts prompt tokens with each model's own tokenizer.
+
+    With `load_tokenizers`, tokenizers are loaded from Hugging Face with
+    `transformers` the first time a model is counted. Otherwise, without
+    `transformers`, or for a model whose tokenizer cannot be loaded (e.g.
+    offline, or a gated repository), the count is estimated from the word,
+    number and punctuation pieces of the text; `exact()` tells which one a
+    model got. A tokenizer that fails to load is reported once.
+    """
+
+    def __init__(
+        self, tokenizers: dict[str, str] | None = None, load_tokenizers: bool = True
+    ):
+        self.tokenizers = {**TOKENIZERS, **(tokenizers or {})}
+        self.load_tokenizers = load_tokenizers
+        self._loaded = {}
+
+    def tokenizer(self, model_name: str):
+        if not self.load_tokenizers:
+            return None
+        if model_name not in self._loaded:
+            self._loaded[model_name] = None
+            repo = self.tokenizers.get(model_name)
+            if repo is None:
+                print(f"prompt tokens: no tokenizer known for {model_name}, estimating")
+                return None
+            try:
+                from transformers import AutoTokenizer
+
+                self._loaded[model_name] = AutoTokenizer.from_pretrained(repo)
+            except Exception as e:
+                print(
+                    f"prompt tokens: estimating for {model_name}, could not load "
+                    f"the {repo} tokenizer ({type(e).__name__}: {e})"
+                )
+        return self._loaded[model_name]
+
+    def exact(self, model_name: str) -> bool:
+        return self.tokenizer(model_name) is not None
+
+    def count(self, model_name: str, text: str) -> int:
+        tokenizer = self.tokenizer(model_name)
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, add_special_tokens=False))
+        if any(family in model_name for family in SINGLE_DIGIT_MODELS):
+            return len(_SINGLE_DIGIT_PIECES.findall(text))
+        return len(_PIECES.findall(text))
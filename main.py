@@ -1,79 +1,72 @@
-import re
-from langchain_ollama import ChatOllama
-from langchain_core.messages import HumanMessage, SystemMessage
-import requests
-from datetime import timedelta, datetime
-import os
-from data.models import FinancialMetricsResponse, InsiderTradeResponse, PriceResponse
+from datetime import datetime
+from data.settings import DEFAULT_BASE_URL, PROMPT_FORMATS
+from llm.answer import parse_answer
+from llm.settings import (
+    DEFAULT_KEEP_ALIVE,
+    DEFAULT_OLLAMA_URL,
+    DEFAULT_PORT,
+    MODEL_NAMES,
+)
 import argparse
-import json
-from colorama import Fore, Style
-from tabulate import tabulate
+import signal
+import sys
 import textwrap
 
+# Only the modules needed to parse the arguments are imported up front. The
+# data, model and table libraries are imported by the stage that uses them,
+# so --help, argument errors, --report and --server start quickly.
 
-def get_prices(ticker: str, start_date: str, end_date: str) -> PriceResponse:
-    """
-    Fetch price data from API.
-    """
-    # If not in cache or no data in range, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
-    url = f"https://api.financialdatasets.ai/prices/?ticker={ticker}&interval=day&interval_multiplier=1&start_date={start_date}&end_date={end_date}"
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(
-            f"Error fetching data: {ticker} - {response.status_code} - {response.text}"
-        )
 
-    # Parse response with Pydantic model
-    return PriceResponse(**response.json())
+def summary_row(model_name: str, content: str | None) -> list[str]:
+    from colorama import Fore, Style
+
+    if content is None:
+        return [
+            model_name,
+            f"{Style.DIM}skipped{Style.RESET_ALL}",
+            "Not asked: the other models had already settled the rating",
+        ]
+    rating, reasoning = parse_answer(content)
+    rating_color = {
+        "strong buy": Fore.GREEN,
+        "buy": Fore.GREEN,
+        "hold": Fore.YELLOW,
+        "sell": Fore.RED,
+        "strong sell": Fore.RED,
+    }.get(rating, Fore.WHITE)
 
+    return [
+        model_name,
+        f"{rating_color}{rating}{Style.RESET_ALL}",
+        "\n".join(textwrap.wrap(reasoning, width=100)),
+    ]
 
-def get_financial_metrics(
-    ticker: str, start_date: str, end_date: str
-) -> FinancialMetricsResponse:
-    """
-    Fetch financial metrics data from API.
-    """
-    # If not in cache or no data in range, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
-    url = f"https://api.financialdatasets.ai/financial-metrics/snapshot?ticker={ticker}"
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(
-            f"Error fetching data: {ticker} - {response.status_code} - {response.text}"
-        )
 
-    # Parse response with Pydantic model
-    return FinancialMetricsResponse(**response.json())
+def not_run_row(model_name: str) -> list[str]:
+    from colorama import Style
 
+    return [
+        model_name,
+        f"{Style.DIM}not run{Style.RESET_ALL}",
+        "No stored reply: the model was not asked about this ticker and date",
+    ]
 
-def get_insider_trades(
-    ticker: str, start_date: str, end_date: str
-) -> InsiderTradeResponse:
+
+def print_summary(ticker: str, contents: dict[str, str | None]):
     """
-    Fetch insider trade data from API.
+    Print a ticker's replies. A model with None was skipped by the quorum;
+    a model left out of `contents` was not run, e.g. in a run cut short.
     """
-    # If not in cache or no data in range, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
-    url = f"https://api.financialdatasets.ai/insider-trades/?ticker={ticker}&filing_date_gte={start_date}&filing_date_lte={end_date}"
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(
-            f"Error fetching data: {ticker} - {response.status_code} - {response.text}"
-        )
+    from tabulate import tabulate
 
-    # Parse response with Pydantic model
-    return InsiderTradeResponse(**response.json())
+    summary = [
+        summary_row(model_name, contents[model_name])
+        if model_name in contents
+        else not_run_row(model_name)
+        for model_name in MODEL_NAMES
+    ]
+    print(f"{ticker} Stock Analysis")
+    print(tabulate(summary, tablefmt="grid", colalign=("left", "center", "left")))
 
 
 if __name__ == "__main__":
@@ -81,14 +74,254 @@ if __name__ == "__main__":
     parser.add_argument(
         "--tickers",
         type=str,
-        required=True,
         help="stock ticker symbol to analyze. Without an API key, only the following are available: AAPL, BRK.B, GOOGL, MSFT, NVDA, TSLA",
     )
     parser.add_argument(
         "--end-date", type=str, help="End date (YYYY-MM-DD). Defaults to today"
     )
+    parser.add_argument(
+        "--cache-path",
+        type=str,
+        default=".cache/prices.sqlite",
+        help="SQLite file used to cache daily price bars",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Always fetch prices from the API"
+    )
+    parser.add_argument(
+        "--prompt-cache-path",
+        type=str,
+        default=".cache/prompts.sqlite",
+        help="SQLite file used to cache rendered prompts",
+    )
+    parser.add_argument(
+        "--no-prompt-cache",
+        action="store_true",
+        help="Always recompute indicators and render prompts",
+    )
+    parser.add_argument(
+        "--api-base-url",
+        type=str,
+        default=DEFAULT_BASE_URL,
+        help="Base URL of the financialdatasets.ai API, e.g. a local data.replay server",
+    )
+    parser.add_argument(
+        "--record-dir",
+        type=str,
+        default=None,
+        help="Directory to record API responses to, for replay with data.replay",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=8,
+        help="Maximum number of concurrent API requests",
+    )
+    parser.add_argument(
+        "--requests-per-second",
+        type=float,
+        default=None,
+        help="Maximum number of API requests started per second. Defaults to unlimited",
+    )
+
+    parser.add_argument(
+        "--ollama-url",
+        type=str,
+        default=DEFAULT_OLLAMA_URL,
+        help="Comma-separated Ollama endpoints, e.g. a local llm.fake_ollama server",
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=1,
+        help="Maximum number of model calls in flight. Defaults to one at a time",
+    )
+    parser.add_argument(
+        "--llm-endpoint-concurrency",
+        type=int,
+        default=None,
+        help="Maximum number of model calls in flight per Ollama endpoint",
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=["model", "ticker"],
+        default="model",
+        help="Run all tickers through one model before the next (model), so each "
+        "model is loaded once, or all models for one ticker at a time (ticker)",
+    )
+    parser.add_argument(
+        "--keep-alive",
+        type=str,
+        default=None,
+        help=f"How long Ollama keeps a model loaded after a call, e.g. 10m. Defaults "
+        f"to {DEFAULT_KEEP_ALIVE}, and to forever with --serve",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Sampling seed passed to the models; part of the response cache key",
+    )
+    parser.add_argument(
+        "--llm-cache-path",
+        type=str,
+        default=".cache/responses.sqlite",
+        help="SQLite file used to cache model replies",
+    )
+    parser.add_argument(
+        "--llm-cache-ttl-hours",
+        type=float,
+        default=None,
+        help="Re-query models for cached replies older than this. Defaults to never",
+    )
+    parser.add_argument(
+        "--no-llm-cache", action="store_true", help="Always query the models"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream replies and stop generating once the JSON answer is complete",
+    )
+    parser.add_argument(
+        "--no-json-schema",
+        action="store_true",
+        help="Let models reply freely instead of constraining them to the JSON "
+        "answer schema",
+    )
+    parser.add_argument(
+        "--max-tokens",
+        action="append",
+        default=[],
+        metavar="MODEL=N",
+        help="Maximum tokens a model may generate per reply, overriding the defaults "
+        "in llm/ollama.py",
+    )
+    parser.add_argument(
+        "--prompt-format",
+        action="append",
+        default=[],
+        metavar="[MODEL=]FORMAT",
+        help=f"Prompt format ({', '.join(PROMPT_FORMATS)}) of all models or of one "
+        "model. Defaults to verbose",
+    )
+    parser.add_argument(
+        "--prompt-token-log",
+        type=str,
+        default=None,
+        help="JSONL file to append the prompt token count of each ticker and model to",
+    )
+    parser.add_argument(
+        "--metrics-path",
+        type=str,
+        default=".cache/llm_calls.jsonl",
+        help="JSONL file to append the timings of every model call to",
+    )
+    parser.add_argument(
+        "--quorum",
+        type=int,
+        default=None,
+        help="Ask the models one after another, fastest first by the timings in "
+        "--metrics-path, and stop once this many agree on a rating or the "
+        "remaining models could not change it",
+    )
+    parser.add_argument(
+        "--results-path",
+        type=str,
+        default=".cache/results.sqlite",
+        help="SQLite file each model's reply per ticker and end date is stored in",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse the stored reply of every ticker and model already done for "
+        "this end date",
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help="Only print the summary tables of the stored replies, without "
+        "fetching data or calling the models",
+    )
+    parser.add_argument(
+        "--prometheus-textfile",
+        type=str,
+        default=None,
+        help="Also write per-model totals of the run to this Prometheus textfile",
+    )
+    parser.add_argument(
+        "--backtest-start",
+        type=str,
+        default=None,
+        help="Walk the end date from this date (YYYY-MM-DD) to --end-date, ask the "
+        "models about every ticker on each trading day and print each model's "
+        "accuracy against the realized 5-day returns (see backtest.py). With "
+        "--report, only score the stored replies",
+    )
+    parser.add_argument(
+        "--backtest-step",
+        type=int,
+        default=1,
+        help="Only use every Nth trading day as an end date in the backtest",
+    )
+    parser.add_argument(
+        "--backtest-batch",
+        type=int,
+        default=1000,
+        help="Number of (ticker, end date) snapshots of the backtest computed and "
+        "sent to the models at once",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Load everything once and serve analysis jobs over HTTP (see service.py)",
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--server",
+        type=str,
+        default=None,
+        help="URL of a running --serve instance to send the job to, e.g. "
+        f"http://127.0.0.1:{DEFAULT_PORT}",
+    )
+    parser.add_argument(
+        "--import-report",
+        action="store_true",
+        help="Run again under python -X importtime and print the time spent "
+        "importing each package",
+    )
 
     args = parser.parse_args()
+    if args.import_report:
+        from startup import profiling_imports, run_with_import_report
+
+        if not profiling_imports():
+            sys.exit(run_with_import_report())
+    if not args.serve and not args.tickers:
+        parser.error("--tickers is required unless --serve is given")
+    if args.quorum is not None and not 1 <= args.quorum <= len(MODEL_NAMES):
+        parser.error(f"--quorum must be between 1 and {len(MODEL_NAMES)}")
+    if args.keep_alive is None:
+        # A service keeps its models loaded between jobs
+        args.keep_alive = -1 if args.serve else DEFAULT_KEEP_ALIVE
+
+    if args.serve:
+        from analyst import Analyst
+        from service import AnalystService
+
+        analyst = Analyst(args)
+        service = AnalystService(analyst, host=args.host, port=args.port)
+        service.warm_up()
+        print(f"Serving analysis jobs on {service.base_url}")
+        # Stop on SIGTERM like on Ctrl-C, printing the run's statistics
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            service.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        analyst.print_stats(args.prometheus_textfile)
+        sys.exit()
+
     tickers = [ticker.strip() for ticker in args.tickers.split(",")]
 
     # Set the start and end dates
@@ -98,114 +331,55 @@ if __name__ == "__main__":
         except ValueError:
             raise ValueError("End date must be in YYYY-MM-DD format")
     end_date = args.end_date or datetime.now().strftime("%Y-%m-%d")
-    start_date = (
-        datetime.strptime(end_date, "%Y-%m-%d") - timedelta(days=90)
-    ).strftime("%Y-%m-%d")
-
-    for ticker in tickers:
-        prompt = f"{ticker} Stock Analysis"
-
-        # Get price signals
-        prices = get_prices(
-            ticker=ticker,
-            start_date=start_date,
-            end_date=end_date,
-        )
-        prompt += prices.create_prompt()
-
-        # Get financial metrics signals
-        # financial_metrics = get_financial_metrics(
-        #     ticker=ticker,
-        #     start_date=start_date,
-        #     end_date=end_date,
-        # )
-        # prompt += financial_metrics.create_prompt()
-
-        # Get insider trade signals
-        # insider_trades = get_insider_trades(
-        #     ticker=ticker,
-        #     start_date=start_date,
-        #     end_date=end_date,
-        # )
-        # prompt += insider_trades.create_prompt()
-
-        prompt += f"""
-### Instructions: for stock {ticker}, review `Key Statistics` and `Technical Indicators`, and provide a \
-rating to predict its stock performance within the next 5 trading days. The rating should be strong buy \
-(+5% or better), buy (+1% to +5%), hold (-1% to +1%), sell (-5% to -1%), or strong sell (-5% or worse). 
-
-Your answer should only contain a JSON object with the following two keywords:
-'reasoning': a detailed description of your thought process for the rating
-'rating': strong buy, buy, hold, sell, or strong sell
-Please DO NOT output anything outside the JSON.
-"""
-
-        # print(prompt)
-
-        # Ollama Settings
-        model_names = [
-            "llama3.1",
-            "gemma3:12b",
-            "mistral-nemo:12b",
-            "qwen3:14b",
-            "deepseek-r1:14b",
-        ]
-        base_url = "http://localhost:11434"  # Default for local Ollama
-        summary = []
-
-        for model_name in model_names:
-            # Initialize ChatOllama
-            chat = ChatOllama(
-                model=model_name,
-                base_url=base_url,
-                temperature=0.6,
-            )
 
-            # Send a message
-            response = chat.invoke(
-                [
-                    SystemMessage(
-                        content="You are a helpful trading analyst. Your job is to predict how a stock performs in the next 5 trading days."
-                    ),
-                    HumanMessage(content=prompt),
-                ]
-            )
-            # Print the response
-            # print("------------------------------------------------------------")
-            # print("model name: ", model_name)
-            # print("response: ", response.content)
-            # print("------------------------------------------------------------")
-
-            json_str = (
-                re.sub(r"<think>.*?</think>", "", response.content, flags=re.DOTALL)
-                .replace("```json", "")
-                .replace("```", "")
-                .strip()
-            )
+    if args.backtest_start:
+        try:
+            datetime.strptime(args.backtest_start, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError("Backtest start date must be in YYYY-MM-DD format")
+        if args.backtest_start > end_date:
+            parser.error("--backtest-start must not be after --end-date")
+        if args.backtest_step < 1 or args.backtest_batch < 1:
+            parser.error("--backtest-step and --backtest-batch must be at least 1")
+        from backtest import run_backtest
+        from data.api import FetchError
 
-            try:
-                data = json.loads(json_str)
-                rating = data.get("rating", "unavailable").lower()
-                reasoning = data.get("reasoning", "unavailable")
-            except:
-                rating = "unavailable"
-                reasoning = json_str
-
-            rating_color = {
-                "strong buy": Fore.GREEN,
-                "buy": Fore.GREEN,
-                "hold": Fore.YELLOW,
-                "sell": Fore.RED,
-                "strong sell": Fore.RED,
-            }.get(rating, Fore.WHITE)
-
-            summary.append(
-                [
-                    model_name,
-                    f"{rating_color}{rating}{Style.RESET_ALL}",
-                    "\n".join(textwrap.wrap(reasoning, width=100)),
-                ]
-            )
+        try:
+            run_backtest(args, tickers, end_date)
+        except FetchError as e:
+            sys.exit(str(e))
+        sys.exit()
 
-        print(f"{ticker} Stock Analysis")
-        print(tabulate(summary, tablefmt="grid", colalign=("left", "center", "left")))
+    if args.report:
+        from llm.results import ResultsStore
+
+        stored = ResultsStore(args.results_path).results(end_date, tickers)
+        for ticker in tickers:
+            if stored[ticker]:
+                print_summary(ticker, stored[ticker])
+            else:
+                print(f"{ticker}: no stored results as of {end_date}")
+        sys.exit()
+
+    if args.server:
+        from service import analyze_remote
+
+        results = analyze_remote(args.server, tickers, end_date, resume=args.resume)
+        for ticker in tickers:
+            print_summary(ticker, results[ticker])
+        sys.exit()
+
+    import asyncio
+    from analyst import Analyst
+    from data.api import FetchError
+
+    analyst = Analyst(args)
+    try:
+        asyncio.run(
+            analyst.analyze(
+                tickers, end_date, resume=args.resume, on_ticker=print_summary
+            )
+        )
+    except FetchError as e:
+        sys.exit(str(e))
+    analyst.print_stats(args.prometheus_textfile)
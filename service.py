@@ -0,0 +1,182 @@
+"""
+Long-running analyst service. Imports, the data client and caches, the
+connections to Ollama and the loaded models stay warm between jobs, so a
+job only waits for data it has not fetched yet and for the models.
+
+    python main.py --serve --port=8700 --ollama-url=http://localhost:11434
+    python main.py --tickers=AAPL,MSFT --server=http://127.0.0.1:8700
+
+POST /analyze with {"tickers": ["AAPL"], "end_date": "YYYY-MM-DD", "resume": false}
+(end_date defaults to today) returns
+{"end_date": ..., "seconds": ..., "results": {ticker: {model: reply or null}}}
+where a reply is {"rating": ..., "content": ...} and null marks a model the
+quorum skipped. GET /health returns the models and the number of jobs
+served.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm.answer import parse_answer
+from llm.settings import DEFAULT_PORT
+
+
+def parse_job(body: bytes) -> tuple[list[str], str, bool]:
+    """
+    Tickers, end date and resume flag of a POST /analyze body. Raises
+    ValueError for a body that is not a valid job.
+    """
+    job = json.loads(body)
+    if not isinstance(job, dict):
+        raise ValueError("The request body must be a JSON object")
+    tickers = job.get("tickers")
+    if (
+        not isinstance(tickers, list)
+        or not tickers
+        or not all(isinstance(t, str) and t for t in tickers)
+    ):
+        raise ValueError("tickers must be a non-empty list of ticker symbols")
+    end_date = job.get("end_date") or datetime.now().strftime("%Y-%m-%d")
+    if not isinstance(end_date, str):
+        raise ValueError("end_date must be a YYYY-MM-DD string")
+    datetime.strptime(end_date, "%Y-%m-%d")
+    return tickers, end_date, bool(job.get("resume", False))
+
+
+class AnalystService(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, analyst, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        super().__init__((host, port), AnalystHandler)
+        self.analyst = analyst
+        self.jobs = 0
+        self._lock = threading.Lock()
+        # Jobs run on one event loop, so they share the scheduler's limits on
+        # calls in flight
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "AnalystService":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def run(self, coroutine):
+        # Called from the request threads
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def warm_up(self):
+        started = time.perf_counter()
+        self.run(self.analyst.warm_up())
+        print(f"Models loaded in {time.perf_counter() - started:.1f}s")
+
+
+class AnalystHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == "/health":
+            return self.reply(
+                200,
+                {
+                    "status": "ok",
+                    # Model names and their prompt formats
+                    "models": self.server.analyst.prompt_formats,
+                    "jobs": self.server.jobs,
+                },
+            )
+        self.reply(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if self.path != "/analyze":
+            self.rfile.read(length)
+            return self.reply(404, {"error": f"Unknown path {self.path}"})
+        try:
+            tickers, end_date, resume = parse_job(self.rfile.read(length))
+        except (ValueError, TypeError) as e:
+            return self.reply(400, {"error": str(e)})
+
+        server = self.server
+        started = time.perf_counter()
+        try:
+            results = server.run(
+                server.analyst.analyze(tickers, end_date, resume=resume)
+            )
+        except Exception as e:
+            return self.reply(500, {"error": f"{type(e).__name__}: {e}"})
+        seconds = time.perf_counter() - started
+        with server._lock:
+            server.jobs += 1
+        print(f"{len(tickers)} tickers as of {end_date} in {seconds:.2f}s")
+
+        self.reply(
+            200,
+            {
+                "end_date": end_date,
+                "seconds": seconds,
+                "results": {
+                    ticker: {
+                        model_name: None
+                        if content is None
+                        else {"rating": parse_answer(content)[0], "content": content}
+                        for model_name, content in contents.items()
+                    }
+                    for ticker, contents in results.items()
+                },
+            },
+        )
+
+    def reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def analyze_remote(
+    server_url: str,
+    tickers: list[str],
+    end_date: str | None = None,
+    resume: bool = False,
+) -> dict[str, dict[str, str | None]]:
+    """
+    Run a job on a service and return its replies keyed by ticker and then
+    by model name, like Analyst.analyze().
+    """
+    request = urllib.request.Request(
+        f"{server_url.rstrip('/')}/analyze",
+        data=json.dumps(
+            {"tickers": tickers, "end_date": end_date, "resume": resume}
+        ).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            body = json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(json.loads(e.read()).get("error", str(e))) from None
+    return {
+        ticker: {
+            model_name: None if reply is None else reply["content"]
+            for model_name, reply in replies.items()
+        }
+        for ticker, replies in body["results"].items()
+    }
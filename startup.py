@@ -0,0 +1,114 @@
+"""
+Import-time report for the command-line scripts. The command is run again
+under `python -X importtime`, and the per-module timings Python writes to
+stderr are summed per top-level package:
+
+    python main.py --tickers=AAPL --report --import-report
+
+benchmarks/startup.py uses the same timings to check that the CLI starts
+within a fixed budget and without its heavy dependencies.
+"""
+
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+
+IMPORTTIME_PREFIX = "import time:"
+
+
+@dataclass
+class ImportTime:
+    module: str
+    # Microseconds spent in the module itself and including its imports
+    self_us: int
+    cumulative_us: int
+
+    @property
+    def package(self) -> str:
+        return self.module.split(".")[0]
+
+
+def profiling_imports() -> bool:
+    return "importtime" in sys._xoptions
+
+
+def parse_importtime(stderr: str) -> tuple[list[ImportTime], list[str]]:
+    """
+    Split the stderr of a `-X importtime` run into the module timings and
+    the other lines the command wrote.
+    """
+    imports, lines = [], []
+    for line in stderr.splitlines():
+        if not line.startswith(IMPORTTIME_PREFIX):
+            lines.append(line)
+            continue
+        self_us, cumulative_us, module = line[len(IMPORTTIME_PREFIX) :].split("|")
+        if self_us.strip().isdigit():  # Skip the header line
+            imports.append(ImportTime(module.strip(), int(self_us), int(cumulative_us)))
+    return imports, lines
+
+
+def time_imports(
+    argv: list[str], quiet: bool = False
+) -> tuple[float, int, list[ImportTime], list[str]]:
+    """
+    Run `python -X importtime *argv` with its stdout passed through, or
+    discarded if `quiet`. Returns the wall-clock seconds, the exit code, the
+    module timings and the other lines written to stderr.
+    """
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        stdout=subprocess.DEVNULL if quiet else None,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    seconds = time.perf_counter() - started
+    imports, lines = parse_importtime(process.stderr)
+    return seconds, process.returncode, imports, lines
+
+
+def package_rows(imports: list[ImportTime]) -> list[list]:
+    """
+    Import milliseconds, module count and share of all import time per
+    top-level package, slowest first.
+    """
+    total = sum(i.self_us for i in imports) or 1
+    packages = {}
+    for i in imports:
+        us, modules = packages.get(i.package, (0, 0))
+        packages[i.package] = (us + i.self_us, modules + 1)
+    return [
+        [package, f"{us / 1000:.1f}", modules, f"{us / total:.0%}"]
+        for package, (us, modules) in sorted(
+            packages.items(), key=lambda item: item[1][0], reverse=True
+        )
+    ]
+
+
+def run_with_import_report(argv: list[str] | None = None, top: int = 15) -> int:
+    """
+    Run the command again under `-X importtime`, then print its stderr and
+    the `top` slowest packages to import. Returns the command's exit code.
+    """
+    from tabulate import tabulate
+
+    argv = sys.argv if argv is None else argv
+    seconds, returncode, imports, lines = time_imports(argv)
+    for line in lines:
+        print(line, file=sys.stderr)
+    total_us = sum(i.self_us for i in imports)
+    print(
+        f"\nImports: {len(imports)} modules in {total_us / 1e6:.2f}s of "
+        f"{seconds:.2f}s wall-clock time",
+        file=sys.stderr,
+    )
+    print(
+        tabulate(
+            package_rows(imports)[:top],
+            headers=["Package", "Import ms", "Modules", "Share"],
+        ),
+        file=sys.stderr,
+    )
+    return returncode
@@ -1,85 +1,343 @@
-from datasets import Dataset
-from trl import GRPOTrainer
-from trl import GRPOConfig, GRPOTrainer
-import torch
-import re
+"""
+GRPO training on the set build_dataset.py writes.
+
+    python train_trl.py --batch-size=16 --num-generations=8 --max-completion-length=256
+    python train_trl.py --model=trl-internal-testing/tiny-Qwen2ForCausalLM-2.5 --cpu \\
+        --max-steps=20 --batch-size=8 --num-generations=4
+
+The prompts are rendered with the model's chat template and tokenized once,
+and the rendered prompts and their token counts are saved under
+--tokenized-dir. Later runs on the same shards, model and options load them
+from there. Prompts longer than --max-prompt-length are dropped rather than
+truncated, which would cut off the instructions at the end.
+
+Each generation batch takes prompts of similar length, so little of it is
+left padding. The prompts are shuffled, split into runs of --bucket-batches
+generation batches, and sorted by length within each run. The order of the
+batches is then shuffled again. The padding share of the prompt tokens is
+printed before and after.
+
+Every logging step prints and appends to <output-dir>/throughput.jsonl the
+step time, completions per second and tokens per second.
+
+Tested with trl 0.20, transformers 4.55, datasets 5.0 and torch 2.14 (see
+requirements-train.txt, and Example_Training_Run.txt for a CPU run's output).
+GRPOConfig's max_prompt_length and shuffle_dataset options change between
+trl releases, so other versions may reject them.
+"""
+
+import argparse
+import glob
+import hashlib
 import json
-from training_data_dummy import training_data
-from transformers import AutoModelForCausalLM, AutoTokenizer
+import os
+import time
 
-# Load dummy training data
-dataset = Dataset.from_list([{"prompt": x[0], "answer": x[1]} for x in training_data])
+import numpy as np
+from datasets import load_dataset, load_from_disk
+from transformers import AutoTokenizer, TrainerCallback
+from trl import GRPOConfig, GRPOTrainer
 
-training_args = GRPOConfig(
-    output_dir="qwen-GRPO",
-    per_device_train_batch_size=1,
-    gradient_accumulation_steps=8,
-    num_train_epochs=1,
+from data.settings import PROMPT_FORMATS
+from llm.prompts import chat_messages
+from llm.rewards import COMPONENTS, RatingReward, RewardLog
 
+DEFAULT_MODEL = "Qwen/Qwen3-0.6B"
+# Training set written by build_dataset.py; the Parquet shards are memory-mapped
+TRAINING_DATA = "datasets/train/*.parquet"
 
-    
-    logging_steps=1,
-)
 
+def tokenized_key(
+    data_files: list[str],
+    model: str,
+    prompt_format: str,
+    max_prompt_length: int,
+    enable_thinking: bool,
+) -> str:
+    """
+    Cache key of the tokenized set. Rewritten shards have a new size or
+    modification time, so they are tokenized again.
+    """
+    files = [
+        (path, os.path.getsize(path), os.path.getmtime(path)) for path in data_files
+    ]
+    parts = [files, model, prompt_format, max_prompt_length, enable_thinking]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()[:16]
 
-def extract_rating(response):
-    print("raw response: ", response)
-    json_str = (
-        re.sub(r"<think>.*?</think>", "", response, flags=re.DOTALL)
-        .replace("```json", "")
-        .replace("```", "")
-        .strip()
+
+def tokenize_dataset(
+    data_files: list[str],
+    tokenizer,
+    prompt_format: str = "verbose",
+    max_prompt_length: int = 2048,
+    enable_thinking: bool = False,
+    num_proc: int | None = None,
+):
+    """
+    The training set with each prompt rendered with the chat template and
+    its token count in `prompt_tokens`, without the prompts longer than
+    `max_prompt_length` tokens.
+    """
+    def render(batch: dict) -> dict:
+        prompts = [
+            tokenizer.apply_chat_template(
+                chat_messages(prompt, prompt_format),
+                tokenize=False,
+                add_generation_prompt=True,
+                enable_thinking=enable_thinking,
+            )
+            for prompt in batch["prompt"]
+        ]
+        input_ids = tokenizer(prompts, add_special_tokens=False)["input_ids"]
+        return {"prompt": prompts, "prompt_tokens": [len(ids) for ids in input_ids]}
+
+    dataset = load_dataset("parquet", data_files=data_files, split="train")
+    dataset = dataset.map(render, batched=True, batch_size=1000, num_proc=num_proc)
+    return dataset.filter(
+        lambda counts: [count <= max_prompt_length for count in counts],
+        input_columns="prompt_tokens",
+        batched=True,
     )
 
-    try:
-        data = json.loads(json_str)
-        rating = data.get("rating", "unavailable").lower()
-        return rating
-    except:
-        if '"rating": "strong buy"' in response:
-            return "strong buy"
-        if '"rating": "strong sell"' in response:
-            return "strong sell"
-        if '"rating": "hold"' in response:
-            return "hold"
-        if '"rating": "buy"' in response:
-            return "buy"
-        if '"rating": "sell"' in response:
-            return "sell"
-        return "unavailable"
-
-
-def get_rating_score(rating, label):
-    d = {
-        "strong buy": 2,
-        "buy": 1,
-        "hold": 0,
-        "sell": -1,
-        "strong sell": -2,
-    }
-    diff = abs(d.get(rating.lower(), 10) - d[label])
-    return -min(diff, 2)
-
-
-def reward_func(prompts, completions, answer, **kwargs) -> list[float]:
+
+def length_buckets(
+    lengths: np.ndarray, batch_prompts: int, bucket_batches: int = 50, seed: int = 0
+) -> np.ndarray:
     """
-    Reward function that checks how accurate the rating is compared with ground-truth label
+    Order of the prompts that puts prompts of similar length in the same
+    batch of `batch_prompts`: random runs of `bucket_batches` batches,
+    sorted by length within each run, with the batches then shuffled.
     """
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(lengths))
+    run = batch_prompts * bucket_batches
+    order = np.concatenate(
+        [
+            order[start : start + run][
+                np.argsort(-lengths[order[start : start + run]], kind="stable")
+            ]
+            for start in range(0, len(order), run)
+        ]
+    )
+    # Whole batches only, so that no batch mixes two runs
+    batches = order[: len(order) // batch_prompts * batch_prompts]
+    batches = batches.reshape(-1, batch_prompts)
+    return batches[rng.permutation(len(batches))].ravel()
+
 
-    extracted_responses = [extract_rating(c) for c in completions]
-    results = [get_rating_score(x, y) for x, y in zip(extracted_responses, answer)]
-    print("scores: ", results)
-    return results
+def padding_share(lengths: np.ndarray, batch_prompts: int) -> float:
+    # Share of the prompt tokens of left-padded batches that are padding
+    batches = len(lengths) // batch_prompts
+    if not batches:
+        return 0.0
+    batched = lengths[: batches * batch_prompts].reshape(batches, batch_prompts)
+    padded = batched.max(axis=1).sum() * batch_prompts
+    return 1 - batched.sum() / padded
 
 
-tokenizer = AutoTokenizer.from_pretrained("Qwen/Qwen3-0.6B")
+class ThroughputLog(TrainerCallback):
+    """
+    Prints and appends to a JSONL file the seconds, completions per second
+    and tokens per second of the steps since the last log. Tokens are the
+    prompt and completion tokens GRPOTrainer counts in `num_tokens`;
+    completion tokens per second come from the mean completion length.
+    """
 
-trainer = GRPOTrainer(
-    model="Qwen/Qwen3-0.6B",
-    processing_class=tokenizer,
-    reward_funcs=reward_func,
-    train_dataset=dataset,
-    args=training_args,
-)
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a")
+        self._time = None
+        self._step = 0
+        self._tokens = 0.0
 
-trainer.train()
+    def on_train_begin(self, args, state, control, **kwargs):
+        self._time = time.perf_counter()
+        self._step = state.global_step
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        logs = logs or {}
+        steps = state.global_step - self._step
+        if not steps or "loss" not in logs:
+            return
+        now = time.perf_counter()
+        seconds = now - self._time
+        completions = steps * (
+            args.per_device_train_batch_size
+            * args.gradient_accumulation_steps
+            * args.world_size
+        )
+        entry = {
+            "step": state.global_step,
+            "time": time.time(),
+            "step_seconds": seconds / steps,
+            "completions_per_second": completions / seconds,
+        }
+        if "num_tokens" in logs:
+            entry["tokens_per_second"] = (logs["num_tokens"] - self._tokens) / seconds
+            self._tokens = logs["num_tokens"]
+        if "completions/mean_length" in logs:
+            generated = logs["completions/mean_length"] * completions
+            entry["completion_tokens_per_second"] = generated / seconds
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        print(
+            f"Step {state.global_step}: {entry['step_seconds']:.1f}s/step, "
+            f"{entry['completions_per_second']:.2f} completions/s"
+            + (
+                f", {entry['tokens_per_second']:.0f} tokens/s"
+                if "tokens_per_second" in entry
+                else ""
+            )
+        )
+        self._time, self._step = now, state.global_step
+
+    def on_train_end(self, args, state, control, **kwargs):
+        self._file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GRPO training of the rating model")
+    parser.add_argument("--model", type=str, default=DEFAULT_MODEL)
+    parser.add_argument("--train-data", type=str, default=TRAINING_DATA)
+    parser.add_argument("--prompt-format", choices=PROMPT_FORMATS, default="verbose")
+    parser.add_argument("--output-dir", type=str, default="qwen-GRPO")
+    parser.add_argument("--tokenized-dir", type=str, default="datasets/tokenized")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=8,
+        help="Completions per device and step (per_device_train_batch_size)",
+    )
+    parser.add_argument("--gradient-accumulation-steps", type=int, default=1)
+    parser.add_argument(
+        "--num-generations", type=int, default=8, help="Completions per prompt"
+    )
+    parser.add_argument("--max-prompt-length", type=int, default=2048)
+    parser.add_argument("--max-completion-length", type=int, default=256)
+    parser.add_argument(
+        "--bucket-batches",
+        type=int,
+        default=50,
+        help="Batches whose prompts are sorted by length together; 1 for no bucketing",
+    )
+    parser.add_argument("--enable-thinking", action="store_true")
+    parser.add_argument(
+        "--reward",
+        type=str,
+        action="append",
+        help=(
+            "COMPONENT=WEIGHT of the reward; repeat for several components "
+            f"({', '.join(COMPONENTS)}; default accuracy=1 and format=0.25)"
+        ),
+    )
+    parser.add_argument("--learning-rate", type=float, default=1e-6)
+    parser.add_argument("--num-train-epochs", type=float, default=1)
+    parser.add_argument("--max-steps", type=int, default=-1)
+    parser.add_argument("--logging-steps", type=int, default=1)
+    parser.add_argument("--cpu", action="store_true", help="Train on the CPU only")
+    parser.add_argument("--tokenize-workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = (
+        args.batch_size,
+        args.gradient_accumulation_steps,
+        args.num_generations,
+        args.max_prompt_length,
+        args.max_completion_length,
+        args.bucket_batches,
+    )
+    if min(sizes) < 1:
+        parser.error("Batch, generation, length and bucket sizes must be at least 1")
+    # GRPOTrainer generates for batch-size x accumulation steps completions at once
+    generation_batch = args.batch_size * args.gradient_accumulation_steps
+    if generation_batch % args.num_generations:
+        parser.error(
+            "--batch-size x --gradient-accumulation-steps must be a multiple of "
+            "--num-generations"
+        )
+    weights = {"accuracy": 1.0, "format": 0.25}
+    if args.reward:
+        weights = {}
+        for reward in args.reward:
+            name, _, weight = reward.partition("=")
+            if name not in COMPONENTS:
+                parser.error(f"Unknown reward component {name}")
+            try:
+                weights[name] = float(weight)
+            except ValueError:
+                parser.error(f"Invalid weight in --reward={reward}")
+    data_files = sorted(glob.glob(args.train_data))
+    if not data_files:
+        parser.error(f"No training shards match {args.train_data}")
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    key = tokenized_key(
+        data_files,
+        args.model,
+        args.prompt_format,
+        args.max_prompt_length,
+        args.enable_thinking,
+    )
+    tokenized_path = os.path.join(args.tokenized_dir, key)
+    started = time.perf_counter()
+    if os.path.isdir(tokenized_path):
+        dataset = load_from_disk(tokenized_path)
+        print(f"Loaded {len(dataset)} tokenized prompts from {tokenized_path}")
+    else:
+        dataset = tokenize_dataset(
+            data_files,
+            tokenizer,
+            args.prompt_format,
+            args.max_prompt_length,
+            args.enable_thinking,
+            args.tokenize_workers,
+        )
+        dataset.save_to_disk(tokenized_path)
+        print(
+            f"Tokenized {len(dataset)} prompts in {time.perf_counter() - started:.1f}s "
+            f"into {tokenized_path}"
+        )
+
+    lengths = np.asarray(dataset["prompt_tokens"])
+    batch_prompts = generation_batch // args.num_generations
+    order = length_buckets(lengths, batch_prompts, args.bucket_batches, args.seed)
+    shuffled = np.random.default_rng(args.seed).permutation(len(lengths))
+    print(
+        f"Prompts: {np.mean(lengths):.0f} tokens on average, {lengths.max()} at most; "
+        f"padding {padding_share(lengths[shuffled], batch_prompts):.1%} shuffled, "
+        f"{padding_share(lengths[order], batch_prompts):.1%} bucketed"
+    )
+    dataset = dataset.select(order)
+
+    training_args = GRPOConfig(
+        output_dir=args.output_dir,
+        per_device_train_batch_size=args.batch_size,
+        gradient_accumulation_steps=args.gradient_accumulation_steps,
+        num_generations=args.num_generations,
+        max_prompt_length=args.max_prompt_length,
+        max_completion_length=args.max_completion_length,
+        learning_rate=args.learning_rate,
+        num_train_epochs=args.num_train_epochs,
+        max_steps=args.max_steps,
+        logging_steps=args.logging_steps,
+        # The order above is the bucketing
+        shuffle_dataset=False,
+        use_cpu=args.cpu,
+        seed=args.seed,
+    )
+    reward_log = RewardLog(
+        os.path.join(args.output_dir, "rewards.jsonl"), sample_rate=0.02
+    )
+    trainer = GRPOTrainer(
+        model=args.model,
+        processing_class=tokenizer,
+        reward_funcs=RatingReward(weights, reward_log),
+        train_dataset=dataset,
+        args=training_args,
+        callbacks=[ThroughputLog(os.path.join(args.output_dir, "throughput.jsonl"))],
+    )
+    trainer.train()
+    # The final model, which evaluate.py loads from --output-dir
+    trainer.save_model()
+    reward_log.close()